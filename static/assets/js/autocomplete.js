@@ -0,0 +1,30 @@
+(function($) {
+  'use strict';
+
+  // Selects rendered by student_record.widgets hold only their selected options; the rest are
+  // fetched page by page from the autocomplete endpoint as the user types.
+  $('select[data-autocomplete-url]').each(function() {
+    var select = $(this);
+    var form = select.closest('form');
+    var forward = (select.data('autocomplete-forward') || '').split(',').filter(Boolean);
+
+    select.select2({
+      width: '100%',
+      placeholder: select.data('placeholder') || '',
+      allowClear: !select.prop('required'),
+      minimumInputLength: 0,
+      ajax: {
+        url: select.data('autocomplete-url'),
+        dataType: 'json',
+        delay: 250,
+        data: function(params) {
+          var query = {q: params.term || '', page: params.page || 1};
+          forward.forEach(function(name) {
+            query[name] = form.find('[name="' + name + '"]').val() || '';
+          });
+          return query;
+        }
+      }
+    });
+  });
+})(jQuery);
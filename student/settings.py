@@ -51,27 +51,114 @@ INSTALLED_APPS = [
 REST_FRAMEWORK = {
     "DEFAULT_AUTHENTICATION_CLASSES": [
         "rest_framework.authentication.SessionAuthentication",
-        "rest_framework.authentication.TokenAuthentication",
+        "student_record.api.authentication.CachedTokenAuthentication",
     ],
     "DEFAULT_PERMISSION_CLASSES": [
         "rest_framework.permissions.IsAuthenticated",
     ],
+    "DEFAULT_RENDERER_CLASSES": [
+        "student_record.api.renderers.FastJSONRenderer",
+        "rest_framework.renderers.BrowsableAPIRenderer",
+    ],
+    "DEFAULT_PARSER_CLASSES": [
+        "student_record.api.renderers.FastJSONParser",
+        "rest_framework.parsers.FormParser",
+        "rest_framework.parsers.MultiPartParser",
+    ],
     "DEFAULT_PAGINATION_CLASS": "rest_framework.pagination.PageNumberPagination",
     "PAGE_SIZE": 20,
     "DEFAULT_FILTER_BACKENDS": [
         "django_filters.rest_framework.DjangoFilterBackend",
-        "rest_framework.filters.SearchFilter",
-        "rest_framework.filters.OrderingFilter",
+        "student_record.api.filters.RankedSearchFilter",
+        "student_record.api.filters.RankedOrderingFilter",
     ],
 }
+# Set CACHE_URL (e.g. redis://localhost:6379/0) when running several workers: cached token
+# principals are only used with a cache they all share, so a revoked token stops working at once.
+CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.redis.RedisCache",
+        "LOCATION": os.environ["CACHE_URL"],
+    } if os.environ.get("CACHE_URL") else {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+    }
+}
+# Catalog API responses are invalidated by model version bumps, so they can live long. The
+# versions are kept in the database (CacheVersion), so a per-process cache never serves stale data.
+API_CACHE_TIMEOUT = 60 * 60
+# Token -> user principals cached by CachedTokenAuthentication. None enables the cache only
+# when CACHES["default"] is shared between processes (not locmem or dummy).
+AUTH_TOKEN_CACHE = None
+AUTH_TOKEN_CACHE_TTL = 5 * 60
+# Rows fetched per server-side cursor round trip by the streaming export endpoints.
+EXPORT_CHUNK_SIZE = 2000
+# ?updated_since= sync: synced_at is set this far back so rows committed late are not missed,
+# and tombstones (and so cursors) older than the retention are dropped by prune_tombstones.
+SYNC_OVERLAP_SECONDS = 60
+TOMBSTONE_RETENTION_DAYS = 30
+# Fan-out limits for POST /api/v1/batch/.
+API_BATCH_MAX_REQUESTS = 10
+API_BATCH_MAX_WORKERS = 4
+# Largest cohort accepted by POST /api/enrollments/bulk/.
+BULK_ENROLLMENT_MAX_ITEMS = 500
+# Rows per page of the keyset-paginated HTML list pages.
+LIST_PAGE_SIZE = 25
+# Matches per page returned by the autocomplete endpoints behind the large select boxes.
+AUTOCOMPLETE_PAGE_SIZE = 20
+# Seconds to keep request.principal (role, student and teacher ids) in the session; 0 looks it up per request.
+PRINCIPAL_SESSION_TTL = 0
+# QueryMetricsMiddleware: statements repeated this often in one request count as likely N+1;
+# SQL_METRICS_LOG adds a JSON line per request on the "student_record.requests" logger.
+SQL_METRICS_DUPLICATE_THRESHOLD = 5
+SQL_METRICS_LOG = False
+# GET /metrics is served to "Authorization: Bearer <METRICS_TOKEN>" and to admins; with no
+# token set, to admins only.
+METRICS_TOKEN = os.environ.get("METRICS_TOKEN")
+# ProfilingMiddleware: share of requests profiled without the admin X-Profile header, seconds
+# between stack samples, and where (and how many) folded-stack profiles are kept.
+PROFILER_SAMPLE_RATE = 0.0
+PROFILER_INTERVAL = 0.005
+PROFILER_DIR = BASE_DIR / 'profiles'
+PROFILER_MAX_PROFILES = 500
+# Statements slower than this are logged with their view and calling frame (None disables).
+# Parameter values are left out unless SLOW_QUERY_LOG_PARAMS is on; then a share of slow
+# SELECTs is also EXPLAINed (plans show the values too), with ANALYZE re-running the query.
+SLOW_QUERY_THRESHOLD_MS = 200
+SLOW_QUERY_LOG = BASE_DIR / 'slow_queries.ndjson'
+SLOW_QUERY_LOG_PARAMS = False
+SLOW_QUERY_EXPLAIN_RATE = 0.1
+SLOW_QUERY_EXPLAIN_ANALYZE = False
+# TracingMiddleware: share of requests traced without the admin X-Trace header, where the
+# OTLP/JSON traces are appended, and the most spans kept per request.
+TRACING_SAMPLE_RATE = 0.0
+TRACING_FILE = BASE_DIR / 'traces.ndjson'
+TRACING_MAX_SPANS = 5000
+# MemoryBudgetMiddleware: share of requests measured with tracemalloc without the admin
+# X-Memory-Profile header, the default peak budget and per-view overrides (dotted view path
+# to MiB, None for no budget), traceback depth, allocation sites kept, and the log file.
+MEMORY_SAMPLE_RATE = 0.0
+MEMORY_BUDGET_MB = 64
+MEMORY_BUDGETS = {}
+MEMORY_TRACE_FRAMES = 25
+MEMORY_TOP_SITES = 10
+MEMORY_LOG = BASE_DIR / 'memory.ndjson'
+# bench_routes: where its report and regression baseline are written by default.
+BENCH_DIR = BASE_DIR / 'bench'
+
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    'student_record.middleware.QueryMetricsMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'student_record.middleware.PrincipalMiddleware',
+    'student_record.middleware.ProfilingMiddleware',
+    'student_record.middleware.SlowQueryMiddleware',
+    'student_record.middleware.MemoryBudgetMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'student_record.middleware.TracingMiddleware',
 ]
 
 ROOT_URLCONF = 'student.urls'
@@ -23,6 +23,8 @@ from rest_framework import permissions
 from drf_yasg.views import get_schema_view
 from drf_yasg import openapi
 
+from student_record.metrics import metrics_view
+
 from . import views
 schema_view = get_schema_view(
    openapi.Info(
@@ -42,6 +44,7 @@ urlpatterns = [
     # path('', views.home, name='home'),
     path("api/", include("student_record.api.urls")),
     path('students/', include('student_record.urls')),
+    path('metrics', metrics_view, name='metrics'),
 
     path('swagger(<format>\.json|\.yaml)', schema_view.without_ui(cache_timeout=0), name='schema-json'),
     path('swagger/', schema_view.with_ui('swagger', cache_timeout=0), name='schema-swagger-ui'),
@@ -0,0 +1,70 @@
+import hashlib
+
+from django.conf import settings
+from django.core.cache import cache
+from rest_framework.authentication import TokenAuthentication
+
+SHARED_KEY_PREFIX = "auth-token"
+# Backends whose entries live in one process: an eviction there would not reach other workers.
+PROCESS_LOCAL_BACKENDS = (
+    "django.core.cache.backends.locmem.LocMemCache",
+    "django.core.cache.backends.dummy.DummyCache",
+)
+
+
+class PrincipalCache:
+    """
+    Token -> (user, token) entries in the shared cache, with a TTL.
+
+    Revoking a token or deactivating a user must take effect on every worker at once, so
+    entries are only kept in a cache all of them share, where an eviction is seen immediately.
+    With a process-local default cache, caching is off unless ``AUTH_TOKEN_CACHE`` is True
+    (a single process, such as ``bench_auth``).
+    """
+
+    def __init__(self, ttl=300):
+        self.ttl = ttl
+
+    @staticmethod
+    def digest(key):
+        return hashlib.sha256(key.encode()).hexdigest()
+
+    @property
+    def enabled(self):
+        enabled = getattr(settings, "AUTH_TOKEN_CACHE", None)
+        if enabled is None:
+            return settings.CACHES["default"]["BACKEND"] not in PROCESS_LOCAL_BACKENDS
+        return enabled
+
+    def get(self, key):
+        if not self.enabled:
+            return None
+        return cache.get(f"{SHARED_KEY_PREFIX}:{self.digest(key)}")
+
+    def set(self, key, principal):
+        if self.enabled:
+            cache.set(f"{SHARED_KEY_PREFIX}:{self.digest(key)}", principal, self.ttl)
+
+    def evict(self, key):
+        cache.delete(f"{SHARED_KEY_PREFIX}:{self.digest(key)}")
+
+
+principal_cache = PrincipalCache(ttl=getattr(settings, "AUTH_TOKEN_CACHE_TTL", 300))
+
+
+class CachedTokenAuthentication(TokenAuthentication):
+    """``TokenAuthentication`` that resolves a token to its user once per TTL instead of per request."""
+
+    def authenticate_credentials(self, key):
+        principal = principal_cache.get(key)
+        if principal is None:
+            principal = super().authenticate_credentials(key)
+            principal_cache.set(key, principal)
+        return principal
+
+
+def evict_user_tokens(user_id):
+    from rest_framework.authtoken.models import Token
+
+    for key in Token.objects.filter(user_id=user_id).values_list("key", flat=True):
+        principal_cache.evict(key)
@@ -0,0 +1,108 @@
+import json
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.db import connection, connections
+from django.test.client import RequestFactory
+from django.urls import Resolver404, resolve
+from django.utils.functional import SimpleLazyObject
+from rest_framework import status
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from ..middleware import resolve_principal
+from .serializers import BatchRequestSerializer
+
+SAFE_METHODS = ("GET", "HEAD", "OPTIONS")
+FORWARDED_HEADERS = ("ETag", "Last-Modified")
+
+
+def response_body(response):
+    if not response.content:
+        return None
+    try:
+        return json.loads(response.content)
+    except ValueError:
+        return response.content.decode(response.charset or "utf-8", errors="replace")
+
+
+class BatchRequestAPIView(APIView):
+    """
+    Run several ``/api/v1/`` requests in one round trip.
+
+    The caller is authenticated once and every sub-request runs in-process as that user.
+    Read-only batches run on a small thread pool; batches containing writes run sequentially
+    in the order given. Each entry of the response carries the sub-request's status and body
+    (decoded JSON, or text for other content); streaming responses such as ``export/`` cannot
+    be batched and get a 400 entry.
+
+    Sub-requests are dispatched straight to the view and skip the middleware stack, so they
+    get the caller's ``user`` and ``principal`` but no session, messages, metrics or tracing
+    of their own.
+    """
+
+    def post(self, request):
+        serializer = BatchRequestSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        sub_requests = serializer.validated_data["requests"]
+
+        concurrent = (
+            all(sub["method"] in SAFE_METHODS for sub in sub_requests)
+            and not connection.in_atomic_block
+        )
+        if concurrent:
+            workers = min(len(sub_requests), getattr(settings, "API_BATCH_MAX_WORKERS", 4))
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                responses = list(executor.map(lambda sub: self.run_in_thread(request, sub), sub_requests))
+        else:
+            responses = [self.run(request, sub) for sub in sub_requests]
+
+        return Response({"responses": responses}, status=status.HTTP_200_OK)
+
+    def run_in_thread(self, request, sub):
+        try:
+            return self.run(request, sub)
+        finally:
+            for conn in connections.all(initialized_only=True):
+                conn.close()
+
+    def run(self, request, sub):
+        factory = RequestFactory()
+        body = json.dumps(sub["body"]) if "body" in sub else ""
+        django_request = factory.generic(
+            sub["method"],
+            sub["path"],
+            data=body,
+            content_type="application/json",
+            secure=request.is_secure(),
+            HTTP_HOST=request.get_host(),
+            HTTP_ACCEPT="application/json",
+        )
+        django_request._force_auth_user = request.user
+        django_request._force_auth_token = request.auth
+        django_request.user = request.user
+        principal = getattr(request._request, "principal", None)
+        if principal is None:
+            principal = SimpleLazyObject(lambda: resolve_principal(django_request))
+        django_request.principal = principal
+
+        try:
+            match = resolve(django_request.path_info)
+        except Resolver404:
+            return {"status": status.HTTP_404_NOT_FOUND, "body": {"detail": "Not found."}}
+
+        response = match.func(django_request, *match.args, **match.kwargs)
+        if response.streaming:
+            # Not closed: close() sends request_finished, which would close the caller's connection.
+            return {
+                "status": status.HTTP_400_BAD_REQUEST,
+                "body": {"detail": "Streaming responses cannot be batched; request this path directly."},
+            }
+        if hasattr(response, "render"):
+            response.render()
+
+        result = {"status": response.status_code, "body": response_body(response)}
+        headers = {name: response[name] for name in FORWARDED_HEADERS if response.has_header(name)}
+        if headers:
+            result["headers"] = headers
+        return result
@@ -0,0 +1,125 @@
+import hashlib
+from urllib.parse import urlencode
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import IntegrityError, transaction
+from django.db.models import F
+from django.utils import timezone
+from django.utils.http import http_date, parse_etags, parse_http_date_safe
+from rest_framework import status
+from rest_framework.response import Response
+
+VERSION_KEY_PREFIX = "api-version"
+RESPONSE_KEY_PREFIX = "api-response"
+
+
+def version_key(model):
+    return f"{VERSION_KEY_PREFIX}:{model._meta.label_lower}"
+
+
+def bump_model_version(model):
+    """
+    Invalidate every cached response built from ``model`` by moving its version forward.
+
+    Versions live in the database rather than the cache, so a bump made by any worker or
+    management command is seen by all of them, and it commits or rolls back with the change.
+    """
+    from ..models import CacheVersion
+
+    name = version_key(model)
+    now = timezone.now()
+    with transaction.atomic():
+        if CacheVersion.objects.filter(name=name).update(version=F("version") + 1, changed_at=now):
+            return
+        try:
+            with transaction.atomic():
+                CacheVersion.objects.create(name=name, version=1, changed_at=now)
+        except IntegrityError:
+            # Another writer created the row first.
+            CacheVersion.objects.filter(name=name).update(version=F("version") + 1, changed_at=now)
+
+
+def model_versions(models):
+    """Return ``(version, changed_at)`` of each model; ``(0, None)`` for one never bumped."""
+    from ..models import CacheVersion
+
+    keys = [version_key(model) for model in models]
+    rows = {
+        name: (version, changed_at)
+        for name, version, changed_at in CacheVersion.objects.filter(name__in=keys).values_list(
+            "name", "version", "changed_at"
+        )
+    }
+    return [rows.get(key, (0, None)) for key in keys]
+
+
+def normalized_query(request):
+    return urlencode(sorted(request.query_params.lists()), doseq=True)
+
+
+class CachedResponseMixin:
+    """
+    Cache ``list`` and ``retrieve`` payloads for read-mostly ViewSets.
+
+    Entries are keyed on the path, the sorted query string and the version of every model in
+    ``cache_models``; saving or deleting any of those models bumps its version (see
+    ``student_record.signals``), so stale entries are never served and simply expire. The
+    payloads may sit in a per-process cache; the versions are read from the database.
+    Responses carry ``ETag`` and ``Last-Modified`` and honour ``If-None-Match`` /
+    ``If-Modified-Since`` with a 304.
+    """
+    cache_models = ()
+
+    def list(self, request, *args, **kwargs):
+        return self.cached_response(super().list, request, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.cached_response(super().retrieve, request, *args, **kwargs)
+
+    def cached_response(self, handler, request, *args, **kwargs):
+        versions = model_versions(self.cache_models)
+        changed = [changed_at for _, changed_at in versions if changed_at is not None]
+        last_modified = int(max(changed).timestamp()) if changed else None
+
+        key_parts = [
+            type(self).__name__,
+            self.action,
+            request.build_absolute_uri(request.path),
+            normalized_query(request),
+            # changed_at too, so a version row that is deleted and recreated cannot revive old entries.
+            *(f"{version}@{changed_at}" for version, changed_at in versions),
+        ]
+        digest = hashlib.sha1("|".join(key_parts).encode()).hexdigest()
+        etag = f'"{digest}"'
+        if_none_match = request.headers.get("If-None-Match")
+        etags = parse_etags(if_none_match) if if_none_match else []
+
+        if self.is_not_modified(request, etags, etag, last_modified):
+            response = Response(status=status.HTTP_304_NOT_MODIFIED)
+        else:
+            cache_key = f"{RESPONSE_KEY_PREFIX}:{digest}"
+            data = cache.get(cache_key)
+            if data is not None:
+                response = Response(data)
+            else:
+                response = handler(request, *args, **kwargs)
+                if response.status_code != status.HTTP_200_OK:
+                    return response
+                cache.set(cache_key, response.data, getattr(settings, "API_CACHE_TIMEOUT", 3600))
+            if "*" in etags:
+                # "*" matches any current representation, so only once the object is known to exist.
+                response = Response(status=status.HTTP_304_NOT_MODIFIED)
+
+        response["ETag"] = etag
+        if last_modified is not None:
+            response["Last-Modified"] = http_date(last_modified)
+        response["Cache-Control"] = "private, no-cache"
+        return response
+
+    def is_not_modified(self, request, etags, etag, last_modified):
+        if etags:
+            return etag in {tag.removeprefix("W/") for tag in etags}
+
+        if_modified_since = parse_http_date_safe(request.headers.get("If-Modified-Since", ""))
+        return bool(if_modified_since and last_modified and last_modified <= if_modified_since)
@@ -0,0 +1,67 @@
+import csv
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import StreamingHttpResponse
+from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
+
+from .renderers import orjson
+
+EXPORT_CONTENT_TYPES = {
+    "csv": "text/csv; charset=utf-8",
+    "ndjson": "application/x-ndjson",
+}
+
+
+class Echo:
+    """Pseudo-buffer that hands each written CSV line straight back to the caller."""
+
+    def write(self, value):
+        return value
+
+
+def dumps_line(row):
+    if orjson is not None:
+        return orjson.dumps(row, default=str) + b"\n"
+    return (DjangoJSONEncoder(separators=(",", ":")).encode(row) + "\n").encode()
+
+
+class ExportMixin:
+    """
+    ``GET <list>/export/?output=csv|ndjson`` streaming every filtered row of the ViewSet.
+
+    Rows come from ``.values_list(*export_fields).iterator(chunk_size=...)`` (a server-side
+    cursor on PostgreSQL), so memory stays flat and the header is sent before the first chunk
+    is fetched. All filter, search and ordering query parameters of the list endpoint apply.
+    """
+    export_fields = ()
+
+    @action(detail=False, methods=["get"], url_path="export")
+    def export(self, request):
+        output = request.query_params.get("output", "csv")
+        if output not in EXPORT_CONTENT_TYPES:
+            raise ValidationError({"output": f"Choose one of: {', '.join(EXPORT_CONTENT_TYPES)}."})
+
+        columns = [column for column, _ in self.export_fields]
+        paths = [path for _, path in self.export_fields]
+        rows = (
+            self.filter_queryset(self.get_queryset())
+            .values_list(*paths)
+            .iterator(chunk_size=getattr(settings, "EXPORT_CHUNK_SIZE", 2000))
+        )
+
+        stream = self.stream_csv(columns, rows) if output == "csv" else self.stream_ndjson(columns, rows)
+        response = StreamingHttpResponse(stream, content_type=EXPORT_CONTENT_TYPES[output])
+        response["Content-Disposition"] = f'attachment; filename="{self.basename}s.{output}"'
+        return response
+
+    def stream_csv(self, columns, rows):
+        writer = csv.writer(Echo())
+        yield writer.writerow(columns)
+        for row in rows:
+            yield writer.writerow(row)
+
+    def stream_ndjson(self, columns, rows):
+        for row in rows:
+            yield dumps_line(dict(zip(columns, row)))
@@ -1,7 +1,30 @@
 from django_filters import rest_framework as filters
+from rest_framework.filters import OrderingFilter, SearchFilter
 from student_record.models import Enrollment, Profile, Installment
+from student_record.search import search
 from django.db.models import F
 
+
+class RankedSearchFilter(SearchFilter):
+    """``SearchFilter`` backed by ``student_record.search`` (trigram/full-text on PostgreSQL)."""
+
+    def filter_queryset(self, request, queryset, view):
+        search_fields = self.get_search_fields(view, request)
+        term = ' '.join(self.get_search_terms(request))
+        if not search_fields or not term:
+            return queryset
+        return search(queryset, term, list(search_fields))
+
+
+class RankedOrderingFilter(OrderingFilter):
+    """Order searched results by relevance unless the client asked for an explicit ordering."""
+
+    def get_ordering(self, request, queryset, view):
+        params = request.query_params.get(self.ordering_param)
+        if not params and 'search_rank' in queryset.query.annotations:
+            return ['-search_rank', *(self.get_default_ordering(view) or [])]
+        return super().get_ordering(request, queryset, view)
+
 class EnrollmentFilter(filters.FilterSet):
     student_name = filters.CharFilter(field_name="student__name", lookup_expr="icontains")
     batch_code = filters.CharFilter(field_name="batch__batch_code", lookup_expr="icontains")
@@ -13,7 +36,7 @@ class EnrollmentFilter(filters.FilterSet):
 
     class Meta:
         model = Enrollment
-        fields = []
+        fields = ["student", "batch"]
 
     def filter_is_fully_paid(self, queryset, name, value):
         if value:
@@ -53,4 +76,4 @@ class InstallmentFilter(filters.FilterSet):
 
     class Meta:
         model = Installment
-        fields = []
\ No newline at end of file
+        fields = ["enrollment", "due_date"]
\ No newline at end of file
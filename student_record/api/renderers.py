@@ -0,0 +1,51 @@
+from django.conf import settings
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+class FastJSONRenderer(JSONRenderer):
+    """
+    ``JSONRenderer`` that encodes with orjson when it is installed.
+
+    Output matches the stdlib path (compact, UTF-8, U+2028/U+2029 escaped). Indented output,
+    values orjson cannot encode natively and a missing orjson all fall back to ``JSONRenderer``.
+    """
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if orjson is None or data is None:
+            return super().render(data, accepted_media_type, renderer_context)
+
+        if self.get_indent(accepted_media_type, renderer_context or {}) is not None:
+            return super().render(data, accepted_media_type, renderer_context)
+
+        try:
+            ret = orjson.dumps(data, default=self.encoder_class().default, option=orjson.OPT_NON_STR_KEYS)
+        except (orjson.JSONEncodeError, TypeError):
+            return super().render(data, accepted_media_type, renderer_context)
+        return ret.replace('\u2028'.encode(), b'\\u2028').replace('\u2029'.encode(), b'\\u2029')
+
+
+class FastJSONParser(JSONParser):
+    """``JSONParser`` that decodes with orjson when it is installed."""
+
+    renderer_class = FastJSONRenderer
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        if orjson is None:
+            return super().parse(stream, media_type, parser_context)
+
+        parser_context = parser_context or {}
+        encoding = parser_context.get('encoding', settings.DEFAULT_CHARSET)
+        raw = stream.read()
+        try:
+            if encoding.lower().replace('_', '-') not in ('utf-8', 'utf8'):
+                raw = raw.decode(encoding)
+            return orjson.loads(raw)
+        except (orjson.JSONDecodeError, UnicodeDecodeError, LookupError) as exc:
+            raise ParseError('JSON parse error - %s' % str(exc))
@@ -1,7 +1,9 @@
 from rest_framework import serializers
 from rest_framework.validators import UniqueValidator
 
+from django.conf import settings
 from django.contrib.auth.models import User
+from django.core.exceptions import ValidationError as DjangoValidationError
 from django.utils import timezone
 from django.utils.timezone import now
 
@@ -238,19 +240,7 @@ class EnrollmentWriteSerializer(serializers.ModelSerializer):
         if not student or not batch:
             raise serializers.ValidationError("Both student and batch are required.")
 
-        # Check student max 3 courses
-        enrolled_courses = Enrollment.objects.filter(student=student).values_list('batch__course', flat=True).distinct()
-        if len(enrolled_courses) >= 3:
-            raise serializers.ValidationError(f"{student.name} is already enrolled in 3 courses.")
-
-        # Prevent enrolling in same course twice
-        if Enrollment.objects.filter(student=student, batch__course=batch.course).exists():
-            raise serializers.ValidationError(f"{student.name} is already enrolled in {batch.course.title}.")
-
-        # Check batch capacity
-        if batch.enrollments.count() >= 10:
-            raise serializers.ValidationError(f"Batch {batch.number} of {batch.course.title} is already full.")
-
+        # Course, seat and duplicate limits are enforced when the enrollment is saved.
         return attrs
 
     def create(self, validated_data):
@@ -261,9 +251,37 @@ class EnrollmentWriteSerializer(serializers.ModelSerializer):
         if 'paid_amount' not in validated_data or not validated_data['paid_amount']:
             validated_data['paid_amount'] = 0
 
-        enrollment = Enrollment.objects.create(**validated_data)
+        try:
+            enrollment = Enrollment.objects.create(**validated_data)
+        except DjangoValidationError as exc:
+            raise serializers.ValidationError(exc.messages)
         return enrollment
 
+    def update(self, instance, validated_data):
+        try:
+            return super().update(instance, validated_data)
+        except DjangoValidationError as exc:
+            raise serializers.ValidationError(exc.messages)
+
+
+class EnrollmentTransitionSerializer(serializers.Serializer):
+    status = serializers.ChoiceField(choices=Enrollment._meta.get_field('status').choices)
+    ids = serializers.ListField(child=serializers.IntegerField(), required=False, allow_empty=False)
+
+
+class BulkEnrollmentItemSerializer(serializers.Serializer):
+    # Plain ids: existence is checked by ``bulk_enroll`` in one query for the whole list.
+    student = serializers.IntegerField()
+    batch = serializers.IntegerField()
+    status = serializers.ChoiceField(choices=Enrollment._meta.get_field('status').choices, default='enrolled')
+    fee_type = serializers.ChoiceField(choices=Enrollment.FEE_TYPE_CHOICES, default='one_time')
+
+
+class BulkEnrollmentSerializer(serializers.Serializer):
+    enrollments = BulkEnrollmentItemSerializer(
+        many=True, allow_empty=False, max_length=getattr(settings, 'BULK_ENROLLMENT_MAX_ITEMS', 500)
+    )
+
 
 class TeacherReadSerializer(serializers.ModelSerializer):
     course_titles = serializers.SerializerMethodField()
@@ -468,3 +486,24 @@ class InstallmentWriteSerializer(serializers.ModelSerializer):
     class Meta:
         model = Installment
         fields = ['enrollment', 'due_date', 'amount', 'paid_amount', 'status', 'paid_date']
+
+
+class SubRequestSerializer(serializers.Serializer):
+    method = serializers.ChoiceField(choices=["GET", "POST", "PUT", "PATCH", "DELETE"], default="GET")
+    path = serializers.CharField()
+    body = serializers.JSONField(required=False)
+
+    def validate_path(self, value):
+        if not value.startswith("/api/v1/") or value.startswith("/api/v1/batch/"):
+            raise serializers.ValidationError("Only /api/v1/ resource routes can be batched.")
+        return value
+
+
+class BatchRequestSerializer(serializers.Serializer):
+    requests = SubRequestSerializer(many=True, allow_empty=False)
+
+    def validate_requests(self, value):
+        limit = getattr(settings, "API_BATCH_MAX_REQUESTS", 10)
+        if len(value) > limit:
+            raise serializers.ValidationError(f"At most {limit} requests can be batched.")
+        return value
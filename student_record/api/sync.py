@@ -0,0 +1,68 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from rest_framework.exceptions import ValidationError
+
+from ..models import Tombstone
+
+
+def tombstone_cutoff():
+    """Tombstones older than this are pruned, so no ``updated_since`` before it can be served."""
+    return timezone.now() - timedelta(days=getattr(settings, "TOMBSTONE_RETENTION_DAYS", 30))
+
+
+class DeltaSyncMixin:
+    """
+    ``?updated_since=<ISO datetime>`` on list endpoints for incremental client sync.
+
+    Only rows whose ``updated_at`` is at or after the cutoff are listed, and the response adds
+    ``deleted`` (ids removed since then, from ``Tombstone``) and ``synced_at``, the value to
+    send as ``updated_since`` next time.
+
+    ``updated_at`` is stamped before its transaction commits, so ``synced_at`` is set
+    ``SYNC_OVERLAP_SECONDS`` back: rows committed late are sent on the next sync, at the cost
+    of some rows being sent twice. Cursors older than ``TOMBSTONE_RETENTION_DAYS`` are
+    rejected, since the deletions before them may have been pruned; such clients resync fully.
+    """
+    updated_since_param = "updated_since"
+
+    def get_updated_since(self):
+        value = self.request.query_params.get(self.updated_since_param)
+        if not value:
+            return None
+        since = parse_datetime(value)
+        if since is None:
+            raise ValidationError({self.updated_since_param: "Use an ISO 8601 datetime."})
+        if timezone.is_naive(since):
+            since = timezone.make_aware(since)
+        if since < tombstone_cutoff():
+            raise ValidationError({
+                self.updated_since_param: "Older than the deletion history; sync again without it.",
+            })
+        return since
+
+    def filter_queryset(self, queryset):
+        queryset = super().filter_queryset(queryset)
+        since = self.get_updated_since()
+        if since is not None:
+            queryset = queryset.filter(updated_at__gte=since)
+        return queryset
+
+    def list(self, request, *args, **kwargs):
+        synced_at = timezone.now() - timedelta(seconds=getattr(settings, "SYNC_OVERLAP_SECONDS", 60))
+        response = super().list(request, *args, **kwargs)
+        since = self.get_updated_since()
+        if since is None:
+            return response
+
+        if not isinstance(response.data, dict):
+            response.data = {"results": response.data}
+        response.data["deleted"] = list(
+            Tombstone.objects.filter(model=self.queryset.model._meta.label_lower, deleted_at__gte=since)
+            .values_list("object_id", flat=True)
+            .distinct()
+        )
+        response.data["synced_at"] = synced_at.isoformat()
+        return response
@@ -1,6 +1,7 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
 
+from .batch_requests import BatchRequestAPIView
 from .views import (
     RegisterAPIView,
     LoginAPIView,
@@ -27,5 +28,6 @@ router.register("installments", InstallmentViewSet, basename="installment")
 urlpatterns = [
     path("register/", RegisterAPIView.as_view(), name="register"),
     path("login/", LoginAPIView.as_view(), name="login"),
+    path("v1/batch/", BatchRequestAPIView.as_view(), name="batch-request"),
     path("v1/", include(router.urls)),
 ]
@@ -9,10 +9,18 @@ from rest_framework.permissions import IsAdminUser, IsAuthenticatedOrReadOnly
 from rest_framework.viewsets import ModelViewSet
 from rest_framework.response import Response
 from rest_framework import status
+from rest_framework.decorators import action
+from django.utils import timezone
 from django.contrib.auth import authenticate
+from django.contrib.auth.models import User
+from django.core.exceptions import ValidationError as DjangoValidationError
 from rest_framework.authtoken.models import Token
 from student_record.models import Student, Course, Batch, Profile
 from ..models import Batch, Enrollment, Teacher, Lesson, Installment
+from ..services import bulk_enroll
+from .cache import CachedResponseMixin
+from .exports import ExportMixin
+from .sync import DeltaSyncMixin
 from .filters import EnrollmentFilter, ProfileFilter, InstallmentFilter
 
 from .serializers import (
@@ -26,6 +34,8 @@ from .serializers import (
     BatchWriteSerializer,
     EnrollmentReadSerializer,
     EnrollmentWriteSerializer,
+    EnrollmentTransitionSerializer,
+    BulkEnrollmentSerializer,
     TeacherReadSerializer,
     TeacherWriteSerializer,
     LessonReadSerializer,
@@ -68,11 +78,12 @@ class LoginAPIView(APIView):
             "email": user.email
         }, status=status.HTTP_200_OK)
 
-class CourseViewSet(ModelViewSet):
+class CourseViewSet(CachedResponseMixin, DeltaSyncMixin, ModelViewSet):
+    cache_models = (Course,)
     queryset = Course.objects.all().order_by("id")
     filterset_fields = ["title", "level", "course_code", "duration"]
     search_fields = ["title", "course_code", "description"]
-    ordering_fields = ["id", "title", "duration", "level"]
+    ordering_fields = ["id", "title", "duration", "level", "updated_at"]
     ordering = ["id"]
 
     def get_permissions(self):
@@ -86,11 +97,11 @@ class CourseViewSet(ModelViewSet):
         return CourseReadSerializer
 
 
-class StudentViewSet(ModelViewSet):
+class StudentViewSet(DeltaSyncMixin, ModelViewSet):
     queryset = Student.objects.all().order_by("id")
     filterset_fields = ["name", "roll_number", "email", "phone_number", "age"]
     search_fields = ["name", "roll_number", "email", "phone_number"]
-    ordering_fields = ["id", "name", "age", "roll_number", "date_of_birth", "email"]
+    ordering_fields = ["id", "name", "age", "roll_number", "date_of_birth", "email", "updated_at"]
     ordering = ["id"]
 
     def get_permissions(self):
@@ -104,11 +115,12 @@ class StudentViewSet(ModelViewSet):
         return StudentReadSerializer
 
 
-class BatchViewSet(ModelViewSet):
+class BatchViewSet(CachedResponseMixin, DeltaSyncMixin, ModelViewSet):
+    cache_models = (Batch, Course, Teacher)
     queryset = Batch.objects.all().order_by("id")
     filterset_fields = ["course", "teacher", "number", "start_date", "end_date", "fee"]
-    search_fields = ["course__title", "teacher__username", "batch_code"]
-    ordering_fields = ["id", "number", "start_date", "end_date", "fee"]
+    search_fields = ["course__title", "teacher__name", "batch_code"]
+    ordering_fields = ["id", "number", "start_date", "end_date", "fee", "updated_at"]
     ordering = ["id"]
 
     def get_permissions(self):
@@ -122,12 +134,26 @@ class BatchViewSet(ModelViewSet):
         return BatchReadSerializer
 
 
-class EnrollmentViewSet(ModelViewSet):
+class EnrollmentViewSet(ExportMixin, DeltaSyncMixin, ModelViewSet):
     queryset = Enrollment.objects.all().order_by("id")
-    filterset_fields = ["student", "batch", "status", "fee_type"]
+    filterset_class = EnrollmentFilter
     search_fields = ["student__name", "roll_number", "batch__batch_code", "batch__course__title"]
-    ordering_fields = ["id", "enrolled_on", "fee_at_enrollment", "paid_amount"]
+    ordering_fields = ["id", "enrolled_on", "fee_at_enrollment", "paid_amount", "updated_at"]
     ordering = ["id"]
+    export_fields = [
+        ("id", "id"),
+        ("roll_number", "roll_number"),
+        ("student", "student_id"),
+        ("student_name", "student__name"),
+        ("batch", "batch_id"),
+        ("batch_code", "batch__batch_code"),
+        ("course_title", "batch__course__title"),
+        ("enrolled_on", "enrolled_on"),
+        ("status", "status"),
+        ("fee_type", "fee_type"),
+        ("fee_at_enrollment", "fee_at_enrollment"),
+        ("paid_amount", "paid_amount"),
+    ]
 
     def get_permissions(self):
         if self.action in ["list", "retrieve"]:
@@ -139,12 +165,78 @@ class EnrollmentViewSet(ModelViewSet):
             return EnrollmentWriteSerializer
         return EnrollmentReadSerializer
 
+    @action(detail=False, methods=["post"], url_path="transition")
+    def transition(self, request):
+        """
+        Set ``status`` on many enrollments with one UPDATE.
 
-class TeacherViewSet(ModelViewSet):
+        Targets are the ``ids`` in the body, narrowed by any list filters in the query string
+        (e.g. ``?batch=3&status=enrolled``). Only the status changes, so the seat, course and
+        roll-number checks in ``Enrollment.save`` are not re-run.
+        """
+        serializer = EnrollmentTransitionSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        new_status = serializer.validated_data["status"]
+        ids = serializer.validated_data.get("ids")
+
+        # Parameters with blank values (?batch=) filter nothing, so they do not count as criteria.
+        filterset = self.filterset_class(request.query_params, queryset=self.get_queryset(), request=request)
+        if not filterset.is_valid():
+            return Response(filterset.errors, status=status.HTTP_400_BAD_REQUEST)
+        filters_given = any(
+            value not in (None, "", []) for value in filterset.form.cleaned_data.values()
+        ) or bool(request.query_params.get("search", "").strip())
+        if ids is None and not filters_given:
+            return Response(
+                {"detail": "Provide enrollment ids or filter criteria."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        queryset = self.filter_queryset(self.get_queryset())
+        if ids is not None:
+            queryset = queryset.filter(pk__in=ids)
+
+        updated = (
+            Enrollment.objects.filter(pk__in=queryset.values("pk"))
+            .exclude(status=new_status)
+            .update(status=new_status, updated_at=timezone.now())
+        )
+        return Response({"status": new_status, "updated": updated})
+
+    @action(detail=False, methods=["post"], url_path="bulk")
+    def bulk(self, request):
+        """Enroll a whole cohort in one transaction; any invalid item rejects the request."""
+        serializer = BulkEnrollmentSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+
+        try:
+            enrollments = bulk_enroll(serializer.validated_data["enrollments"])
+        except DjangoValidationError as exc:
+            return Response({"enrollments": exc.message_dict}, status=status.HTTP_400_BAD_REQUEST)
+
+        return Response(
+            {
+                "created": len(enrollments),
+                "enrollments": [
+                    {
+                        "id": enrollment.pk,
+                        "student": enrollment.student_id,
+                        "batch": enrollment.batch_id,
+                        "roll_number": enrollment.roll_number,
+                    }
+                    for enrollment in enrollments
+                ],
+            },
+            status=status.HTTP_201_CREATED,
+        )
+
+
+class TeacherViewSet(CachedResponseMixin, DeltaSyncMixin, ModelViewSet):
+    cache_models = (Teacher, Course, User)
     queryset = Teacher.objects.all().order_by("id")
     filterset_fields = ["name", "email", "specialization"]
     search_fields = ["name", "email", "teacher_code", "specialization"]
-    ordering_fields = ["id", "name", "email"]
+    ordering_fields = ["id", "name", "email", "updated_at"]
     ordering = ["id"]
 
     def get_permissions(self):
@@ -158,11 +250,11 @@ class TeacherViewSet(ModelViewSet):
         return TeacherReadSerializer
 
 
-class LessonViewSet(ModelViewSet):
+class LessonViewSet(DeltaSyncMixin, ModelViewSet):
     queryset = Lesson.objects.all().order_by("id")
     filterset_fields = ["course", "batch", "teacher"]
     search_fields = ["title", "content", "teacher__name", "batch__batch_code"]
-    ordering_fields = ["id", "created_at", "title"]
+    ordering_fields = ["id", "created_at", "title", "updated_at"]
     ordering = ["id"]
 
     def get_permissions(self):
@@ -176,10 +268,10 @@ class LessonViewSet(ModelViewSet):
         return LessonReadSerializer
 
 
-class ProfileViewSet(ModelViewSet):
+class ProfileViewSet(DeltaSyncMixin, ModelViewSet):
     queryset = Profile.objects.all().order_by("id")
     search_fields = ["full_name", "user__username", "user__email"]
-    ordering_fields = ["id", "full_name"]
+    ordering_fields = ["id", "full_name", "updated_at"]
     ordering = ["id"]
 
     def get_permissions(self):
@@ -193,12 +285,24 @@ class ProfileViewSet(ModelViewSet):
         return ProfileReadSerializer
 
 
-class InstallmentViewSet(ModelViewSet):
+class InstallmentViewSet(ExportMixin, DeltaSyncMixin, ModelViewSet):
     queryset = Installment.objects.all().order_by("due_date")
-    filterset_fields = ["enrollment", "status", "due_date"]
+    filterset_class = InstallmentFilter
     search_fields = ["enrollment__roll_number", "enrollment__student__name"]
-    ordering_fields = ["id", "due_date", "amount", "paid_amount"]
+    ordering_fields = ["id", "due_date", "amount", "paid_amount", "updated_at"]
     ordering = ["due_date"]
+    export_fields = [
+        ("id", "id"),
+        ("enrollment", "enrollment_id"),
+        ("enrollment_roll_number", "enrollment__roll_number"),
+        ("student_name", "enrollment__student__name"),
+        ("batch_code", "enrollment__batch__batch_code"),
+        ("due_date", "due_date"),
+        ("amount", "amount"),
+        ("paid_amount", "paid_amount"),
+        ("status", "status"),
+        ("paid_date", "paid_date"),
+    ]
 
     def get_permissions(self):
         if self.action in ["list", "retrieve"]:
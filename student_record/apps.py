@@ -4,3 +4,9 @@ from django.apps import AppConfig
 class StudentRecordConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'student_record'
+
+    def ready(self):
+        from . import signals  # noqa: F401
+        from . import memory, tracing
+        memory.instrument()
+        tracing.instrument()
@@ -0,0 +1,97 @@
+from functools import reduce
+from operator import or_
+
+from django.conf import settings
+from django.db.models import Case, IntegerField, Q, Value, When
+from django.utils import timezone
+
+from .models import Batch, Course, Student, Teacher
+from .search import search
+
+
+def _students(principal, params):
+    students = Student.objects.all()
+    if principal.role == 'teacher':
+        students = students.filter(enrollments__batch__teacher_id=principal.teacher_id).distinct()
+    elif not principal.is_admin:
+        students = students.filter(pk=principal.student_id)
+    if params.get('batch', '').isdigit():
+        students = students.filter(enrollments__batch_id=params['batch'])
+    return students
+
+
+def _batches(principal, params):
+    batches = Batch.objects.select_related('course', 'teacher')
+    if principal.role == 'teacher':
+        batches = batches.filter(teacher_id=principal.teacher_id)
+    elif not principal.is_admin:
+        batches = batches.filter(enrollments__student_id=principal.student_id)
+    if params.get('current'):
+        batches = batches.filter(end_date__gte=timezone.now().date())
+    return batches
+
+
+def _teachers(principal, params):
+    teachers = Teacher.objects.all()
+    if not principal.is_admin:
+        teachers = teachers.filter(pk=principal.teacher_id)
+    return teachers
+
+
+# Per source: the rows a principal may look up (narrowed by whitelisted query parameters),
+# the fields searched, the fields matched by prefix (ranked first) and by trigram similarity,
+# and the order of an empty search. Labels are ``str(obj)``, as in ``ModelChoiceField``.
+SOURCES = {
+    'students': {
+        'queryset': _students,
+        'fields': ('name', 'roll_number', 'email'),
+        'prefix': ('name', 'roll_number'),
+        'fuzzy': ('name',),
+        'order': ('name', 'id'),
+    },
+    'batches': {
+        'queryset': _batches,
+        'fields': ('batch_code', 'course__title', 'teacher__name'),
+        'prefix': ('batch_code',),
+        'fuzzy': (),
+        'order': ('course', 'number'),
+    },
+    'courses': {
+        'queryset': lambda principal, params: Course.objects.all(),
+        'fields': ('title', 'course_code'),
+        'prefix': ('title', 'course_code'),
+        'fuzzy': ('title',),
+        'order': ('title', 'id'),
+    },
+    'teachers': {
+        'queryset': _teachers,
+        'fields': ('name', 'teacher_code', 'email'),
+        'prefix': ('name', 'teacher_code'),
+        'fuzzy': ('name',),
+        'order': ('name', 'id'),
+    },
+}
+
+
+def lookup(source, principal, term, page=1, params=None):
+    """
+    One page of ``(id, label)`` matches for ``term`` from ``SOURCES[source]`` and whether more
+    follow. Prefix matches come first, then the best ``search`` matches.
+    """
+    config = SOURCES[source]
+    per_page = getattr(settings, 'AUTOCOMPLETE_PAGE_SIZE', 20)
+    queryset = config['queryset'](principal, params or {})
+    term = term.strip()
+    if term:
+        prefix = reduce(or_, (Q(**{f"{field}__istartswith": term}) for field in config['prefix']))
+        queryset = (
+            search(queryset, term, config['fields'], fuzzy_fields=config['fuzzy'])
+            .annotate(prefix_match=Case(When(prefix, then=Value(1)), default=Value(0), output_field=IntegerField()))
+            .order_by('-prefix_match', '-search_rank', *config['order'])
+        )
+    else:
+        queryset = queryset.order_by(*config['order'])
+
+    offset = (max(page, 1) - 1) * per_page
+    rows = list(queryset[offset:offset + per_page + 1])
+    return [(row.pk, str(row)) for row in rows[:per_page]], len(rows) > per_page
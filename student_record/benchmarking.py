@@ -0,0 +1,133 @@
+import re
+import statistics
+from contextlib import contextmanager
+
+from django.test.runner import DiscoverRunner
+from django.test.utils import setup_test_environment, teardown_test_environment
+from django.urls import URLResolver, get_resolver
+
+BENCH_URLCONFS = ("student_record.urls", "student_record.api.urls")
+_URL_PARAMETER = re.compile(r"<(?:\w+:)?(\w+)>|\(\?P<(\w+)>[^)]*\)")
+
+
+@contextmanager
+def isolated_database(verbosity=0, keepdb=False):
+    """Run a benchmark against a throwaway test database instead of the configured one."""
+    runner = DiscoverRunner(verbosity=verbosity, interactive=False, keepdb=keepdb)
+    setup_test_environment()
+    old_config = runner.setup_databases()
+    try:
+        yield
+    finally:
+        runner.teardown_databases(old_config)
+        teardown_test_environment()
+
+
+def percentile(values, pct):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = max(0, min(len(ordered) - 1, round(pct / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+def summarize(samples):
+    """Summarize latency samples given in seconds as milliseconds."""
+    return {
+        "p50_ms": round(percentile(samples, 50) * 1000, 3),
+        "p95_ms": round(percentile(samples, 95) * 1000, 3),
+        "mean_ms": round(statistics.fmean(samples) * 1000, 3) if samples else 0.0,
+    }
+
+
+def iter_routes(urlconfs=BENCH_URLCONFS):
+    """
+    Yield ``(template, pattern)`` for every URL pattern included from ``urlconfs``.
+
+    Templates are full paths with parameters written as ``<name>``, whether the pattern is
+    a ``path()`` route or a router regex, e.g. ``/api/v1/students/<pk>/``.
+    """
+    def walk(patterns, prefix, included):
+        for entry in patterns:
+            route = prefix + str(entry.pattern).lstrip("^").rstrip("$")
+            if isinstance(entry, URLResolver):
+                if included or getattr(entry.urlconf_module, "__name__", None) in urlconfs:
+                    yield from walk(entry.url_patterns, route, True)
+            elif included:
+                yield _URL_PARAMETER.sub(lambda match: f"<{match.group(1) or match.group(2)}>", route), entry
+
+    yield from walk(get_resolver().url_patterns, "/", False)
+
+
+def create_sample_records(students=200):
+    """
+    Bulk-create a small, rule-abiding institute (10 seats per batch, 3 batches per course)
+    for benchmarks that only need representative rows.
+    """
+    from datetime import date
+
+    from dateutil.relativedelta import relativedelta
+    from django.contrib.auth.hashers import make_password
+    from django.contrib.auth.models import User
+
+    from .models import Batch, Course, Enrollment, Installment, Lesson, Profile, Student, Teacher
+
+    courses_needed = max(1, -(-students // 30))
+    courses = [Course(title=f"Course {i}", description="Benchmark course") for i in range(courses_needed)]
+    Course.allocate_course_codes(courses)
+    courses = Course.objects.bulk_create(courses)
+
+    teachers = [Teacher(name=f"Teacher {i}", email=f"teacher{i}@example.com") for i in range(courses_needed)]
+    Teacher.allocate_teacher_codes(teachers)
+    teachers = Teacher.objects.bulk_create(teachers)
+    Teacher.courses.through.objects.bulk_create([
+        Teacher.courses.through(teacher_id=teacher.id, course_id=course.id)
+        for teacher, course in zip(teachers, courses)
+    ])
+
+    start = date(2025, 1, 1)
+    batches = Batch.objects.bulk_create([
+        Batch(course=course, teacher=teacher, number=number, start_date=start,
+              end_date=start + relativedelta(months=4), fee=12000,
+              batch_code=f"{course.course_code}-B{number}")
+        for course, teacher in zip(courses, teachers)
+        for number in (1, 2, 3)
+    ])
+
+    password = make_password(None)
+    users = User.objects.bulk_create([
+        User(username=f"student{i}", email=f"student{i}@example.com", password=password)
+        for i in range(students)
+    ])
+    Profile.objects.bulk_create([
+        Profile(user=user, role='student', full_name=f"Student {i}") for i, user in enumerate(users)
+    ])
+    student_rows = [
+        Student(user=user, name=f"Student {i}", age=20, email=user.email) for i, user in enumerate(users)
+    ]
+    Student.allocate_roll_numbers(student_rows)
+    student_rows = Student.objects.bulk_create(student_rows)
+
+    enrollments = [
+        Enrollment(student=student, batch=batches[i // 10], fee_type='installment', fee_at_enrollment=12000)
+        for i, student in enumerate(student_rows)
+    ]
+    Enrollment.allocate_roll_numbers(enrollments)
+    enrollments = Enrollment.objects.bulk_create(enrollments)
+    Student.objects.filter(pk__in=[student.pk for student in student_rows]).update(course_count=1)
+    for batch in batches:
+        batch.enrolled_count = sum(enrollment.batch_id == batch.pk for enrollment in enrollments)
+    Batch.objects.bulk_update(batches, ['enrolled_count'])
+    Installment.objects.bulk_create([
+        Installment(enrollment=enrollment, due_date=start + relativedelta(months=month),
+                    amount=3000, status='pending')
+        for enrollment in enrollments
+        for month in range(4)
+    ])
+
+    Lesson.objects.bulk_create([
+        Lesson(title=f"Lesson {n}", content="Benchmark lesson", teacher=batch.teacher,
+               course=batch.course, batch=batch)
+        for batch in batches
+        for n in range(2)
+    ])
@@ -0,0 +1,238 @@
+import random
+from datetime import date
+
+from dateutil.relativedelta import relativedelta
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.db import transaction
+
+from .api.cache import bump_model_version
+from .models import (
+    BATCH_CAPACITY, MAX_COURSES_PER_STUDENT, Batch, CodeSequence, Course, Enrollment, Installment, Lesson, Profile,
+    Student, Teacher,
+)
+
+COURSES_PER_SCALE = 100
+BATCHES_PER_COURSE = 3
+COURSES_PER_TEACHER = 3
+# Courses whose rows are built and inserted together; bounds memory at any scale.
+COURSE_CHUNK = 50
+INSERT_BATCH_SIZE = 2000
+
+LEVELS = ['beginner', 'intermediate', 'advanced']
+SUBJECTS = ['Python', 'Data Science', 'Web Design', 'Accounting', 'Marketing', 'Networking', 'Statistics', 'English']
+FEE_TYPES = ['one_time', 'installment', 'custom']
+FEE_TYPE_WEIGHTS = [3, 6, 1]
+STATUSES = ['enrolled', 'completed', 'dropped']
+STATUS_WEIGHTS = [7, 2, 1]
+
+
+def plan_seats(rng, courses):
+    """
+    Decide how many seats each batch fills and which student takes each seat.
+
+    Students are dealt out in one shuffled cycle, so a course (at most 30 consecutive seats)
+    never gets the same student twice, and the student count is chosen so nobody goes past
+    ``MAX_COURSES_PER_STUDENT`` passes through the cycle.
+    """
+    fills = [
+        [rng.randint(BATCH_CAPACITY * 6 // 10, BATCH_CAPACITY) for _ in range(BATCHES_PER_COURSE)]
+        for _ in range(courses)
+    ]
+    seats = sum(map(sum, fills))
+    students = max(BATCH_CAPACITY * BATCHES_PER_COURSE, -(-seats // (MAX_COURSES_PER_STUDENT - 1)))
+    order = list(range(students))
+    rng.shuffle(order)
+    assignment = [order[seat % students] for seat in range(seats)]
+    return fills, students, assignment
+
+
+def generate_dataset(scale=1, seed=0, password="password", progress=None):
+    """
+    Bulk-insert a deterministic institute of ``scale * COURSES_PER_SCALE`` courses.
+
+    Every course gets three batches of up to ``BATCH_CAPACITY`` students, nobody takes more
+    than ``MAX_COURSES_PER_STUDENT`` courses, and codes, roll numbers, seat counters and
+    installment schedules follow the same formats as the app. The same ``scale`` and ``seed``
+    always produce the same rows (ids and timestamps aside).
+    """
+    rng = random.Random(seed)
+    course_total = max(1, int(scale * COURSES_PER_SCALE))
+    fills, student_total, assignment = plan_seats(rng, course_total)
+    password_hash = make_password(password)
+    report = progress or (lambda label, count: None)
+
+    course_counts = [0] * student_total
+    for student in assignment:
+        course_counts[student] += 1
+
+    with transaction.atomic():
+        student_ids = _create_students(rng, seed, student_total, course_counts, password_hash)
+        report("students", student_total)
+
+        teacher_ids = _create_teachers(seed, -(-course_total // COURSES_PER_TEACHER), password_hash)
+        report("teachers", len(teacher_ids))
+
+        seat = 0
+        totals = {"courses": 0, "enrollments": 0, "installments": 0, "lessons": 0}
+        for first in range(0, course_total, COURSE_CHUNK):
+            indexes = range(first, min(first + COURSE_CHUNK, course_total))
+            seats_in_chunk = sum(sum(fills[index]) for index in indexes)
+            counts = _create_courses(
+                rng, indexes, fills, teacher_ids,
+                [student_ids[student] for student in assignment[seat:seat + seats_in_chunk]],
+            )
+            seat += seats_in_chunk
+            for key, value in counts.items():
+                totals[key] += value
+            report("courses", totals["courses"])
+
+    # bulk_create sends no signals, so cached responses would outlive the new rows.
+    for model in (User, Student, Teacher, Course, Batch, Enrollment, Installment, Lesson, Profile):
+        bump_model_version(model)
+    return {"students": student_total, "teachers": len(teacher_ids), **totals}
+
+
+def _create_students(rng, seed, total, course_counts, password_hash):
+    ids = []
+    for first in range(0, total, INSERT_BATCH_SIZE):
+        numbers = range(first, min(first + INSERT_BATCH_SIZE, total))
+        users = User.objects.bulk_create([
+            User(username=f"student{seed}_{i}", email=f"student{seed}_{i}@example.com", password=password_hash)
+            for i in numbers
+        ])
+        Profile.objects.bulk_create([
+            Profile(user=user, role='student', full_name=f"Student {i}") for i, user in zip(numbers, users)
+        ])
+        students = [
+            Student(
+                user=user,
+                name=f"Student {i}",
+                age=rng.randint(17, 45),
+                email=user.email,
+                phone_number=f"98{rng.randrange(10 ** 8):08d}",
+                date_of_birth=date(2007, 1, 1) - relativedelta(days=rng.randrange(365 * 25)),
+                course_count=course_counts[i],
+            )
+            for i, user in zip(numbers, users)
+        ]
+        Student.allocate_roll_numbers(students)
+        ids.extend(student.pk for student in Student.objects.bulk_create(students))
+    return ids
+
+
+def _create_teachers(seed, total, password_hash):
+    users = User.objects.bulk_create([
+        User(username=f"teacher{seed}_{i}", email=f"teacher{seed}_{i}@example.com", password=password_hash)
+        for i in range(total)
+    ], batch_size=INSERT_BATCH_SIZE)
+    Profile.objects.bulk_create([
+        Profile(user=user, role='teacher', full_name=f"Teacher {i}") for i, user in enumerate(users)
+    ], batch_size=INSERT_BATCH_SIZE)
+    teachers = [
+        Teacher(user=user, name=f"Teacher {i}", email=user.email, specialization=SUBJECTS[i % len(SUBJECTS)])
+        for i, user in enumerate(users)
+    ]
+    Teacher.allocate_teacher_codes(teachers)
+    return [teacher.pk for teacher in Teacher.objects.bulk_create(teachers, batch_size=INSERT_BATCH_SIZE)]
+
+
+def _create_courses(rng, indexes, fills, teacher_ids, seat_students):
+    courses = [
+        Course(
+            title=f"{SUBJECTS[index % len(SUBJECTS)]} {index // len(SUBJECTS) + 1}",
+            description=f"Generated course {index}.",
+            duration=rng.choice([4, 8, 12, 16]),
+            level=rng.choice(LEVELS),
+        )
+        for index in indexes
+    ]
+    Course.allocate_course_codes(courses)
+    courses = Course.objects.bulk_create(courses)
+    Teacher.courses.through.objects.bulk_create([
+        Teacher.courses.through(teacher_id=teacher_ids[index // COURSES_PER_TEACHER], course_id=course.pk)
+        for index, course in zip(indexes, courses)
+    ])
+
+    batches = []
+    for index, course in zip(indexes, courses):
+        for number in range(1, BATCHES_PER_COURSE + 1):
+            start = date(2024, 1, 1) + relativedelta(months=rng.randrange(30))
+            batches.append(Batch(
+                course=course,
+                teacher_id=teacher_ids[index // COURSES_PER_TEACHER],
+                number=number,
+                start_date=start,
+                end_date=start + relativedelta(months=rng.randint(3, 6)),
+                fee=rng.randrange(8000, 20001, 500),
+                batch_code=f"{course.course_code}-B{number}",
+                enrolled_count=fills[index][number - 1],
+            ))
+    batches = Batch.objects.bulk_create(batches)
+
+    enrollments = []
+    seats = iter(seat_students)
+    for batch in batches:
+        for seat in range(1, batch.enrolled_count + 1):
+            fee_type = rng.choices(FEE_TYPES, FEE_TYPE_WEIGHTS)[0]
+            paid = batch.fee if fee_type == 'one_time' and rng.random() < 0.7 else 0
+            enrollments.append(Enrollment(
+                student_id=next(seats),
+                batch=batch,
+                status=rng.choices(STATUSES, STATUS_WEIGHTS)[0],
+                fee_type=fee_type,
+                fee_at_enrollment=batch.fee,
+                paid_amount=paid,
+                # New batches start numbering at 1, as Enrollment.allocate_roll_numbers would.
+                roll_number=f"{batch.course.course_code}-B{batch.number}-{seat:04d}",
+            ))
+    enrollments = Enrollment.objects.bulk_create(enrollments, batch_size=INSERT_BATCH_SIZE)
+    CodeSequence.objects.bulk_create([
+        CodeSequence(name=f"enrollment:{batch.pk}", last_value=batch.enrolled_count) for batch in batches
+    ])
+
+    installments = 0
+    pending = []
+    for enrollment in enrollments:
+        if enrollment.fee_type != 'installment':
+            continue
+        for installment in enrollment.build_installments():
+            if installment.due_date < date(2025, 6, 1) and rng.random() < 0.8:
+                installment.status = 'paid'
+                installment.paid_amount = installment.amount
+                installment.paid_date = installment.due_date + relativedelta(days=rng.randrange(10))
+            pending.append(installment)
+        if len(pending) >= INSERT_BATCH_SIZE:
+            installments += len(Installment.objects.bulk_create(pending))
+            pending = []
+    installments += len(Installment.objects.bulk_create(pending))
+
+    lessons = Lesson.objects.bulk_create([
+        Lesson(
+            title=f"{batch.batch_code} lesson {n}",
+            content="Generated lesson content.",
+            teacher_id=batch.teacher_id,
+            course_id=batch.course_id,
+            batch=batch,
+        )
+        for batch in batches
+        for n in range(1, rng.randint(3, 8) + 1)
+    ], batch_size=INSERT_BATCH_SIZE)
+
+    batch_students = {}
+    for enrollment in enrollments:
+        batch_students.setdefault(enrollment.batch_id, []).append(enrollment.student_id)
+    Lesson.students.through.objects.bulk_create([
+        Lesson.students.through(lesson_id=lesson.pk, student_id=student_id)
+        for lesson in lessons
+        for student_id in batch_students.get(lesson.batch_id, ())
+        if rng.random() < 0.5
+    ], batch_size=INSERT_BATCH_SIZE)
+
+    return {
+        "courses": len(courses),
+        "enrollments": len(enrollments),
+        "installments": installments,
+        "lessons": len(lessons),
+    }
+
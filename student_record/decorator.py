@@ -1,3 +1,4 @@
+from django.contrib.auth.views import redirect_to_login
 from django.shortcuts import redirect
 from functools import wraps
 
@@ -5,12 +6,22 @@ def role_required(allowed_roles=[]):
     def decorator(view_func):
         @wraps(view_func)
         def wrapper(request, *args, **kwargs):
-            user = request.user
-            if user.is_superuser:
+            principal = request.principal
+            if principal.is_superuser:
                 return view_func(request, *args, **kwargs)  # superuser sees all
-            profile = getattr(user, 'profile', None)
-            if profile and profile.role in allowed_roles:
+            if principal.role and principal.role in allowed_roles:
                 return view_func(request, *args, **kwargs)
             return redirect('no_access')  # redirect if role not allowed
         return wrapper
     return decorator
+
+def principal_passes_test(test_func):
+    """Like ``user_passes_test``, but ``test_func`` receives ``request.principal``."""
+    def decorator(view_func):
+        @wraps(view_func)
+        def wrapper(request, *args, **kwargs):
+            if test_func(request.principal):
+                return view_func(request, *args, **kwargs)
+            return redirect_to_login(request.get_full_path())
+        return wrapper
+    return decorator
@@ -4,6 +4,7 @@ from .models import Student, Course, Enrollment, Teacher, Lesson, LessonImage, B
 from django.core.exceptions import ValidationError
 from django.utils import timezone
 from django.contrib.auth.models import User
+from .widgets import AutocompleteSelect, AutocompleteSelectMultiple
 
 ROLE_CHOICES = (
     ('', 'All Roles'),
@@ -67,9 +68,13 @@ class EnrollmentForm(forms.ModelForm):
     class Meta:
         model = Enrollment
         fields = ['student', 'batch', 'status', 'fee_type', 'fee_at_enrollment', 'paid_amount']
+        widgets = {
+            'student': AutocompleteSelect('students'),
+            'batch': AutocompleteSelect('batches', params={'current': 1}),
+        }
 
     def __init__(self, *args, **kwargs):
-        self.user = kwargs.pop('user', None)
+        self.principal = kwargs.pop('principal', None)
         super().__init__(*args, **kwargs)
         today = date.today()
 
@@ -80,7 +85,7 @@ class EnrollmentForm(forms.ModelForm):
         for field in self.fields.values():
             field.widget.attrs.update({'class': 'form-control'})
 
-        if self.user and getattr(self.user.profile, 'role', None) == 'student':
+        if self.principal and self.principal.role == 'student':
             self.fields['fee_at_enrollment'].widget.attrs['readonly'] = True
             self.fields['paid_amount'].widget.attrs['readonly'] = True
             self.fields['fee_type'].widget.attrs['disabled'] = True
@@ -120,14 +125,13 @@ class TeacherForm(forms.ModelForm):
         model = Teacher
         fields = ['name', 'email', 'phone', 'specialization', 'courses']
         widgets = {
-            'courses': forms.CheckboxSelectMultiple(),
+            'courses': AutocompleteSelectMultiple('courses'),
         }
 
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
-        for name, field in self.fields.items():
-            if name != 'courses':
-                field.widget.attrs.update({'class': 'form-control'})
+        for field in self.fields.values():
+            field.widget.attrs.update({'class': 'form-control'})
 
 class BatchForm(forms.ModelForm):
     class Meta:
@@ -189,19 +193,19 @@ class LessonFilterForm(forms.Form):
         queryset=Course.objects.all(),
         required=False,
         empty_label="All Courses",
-        widget=forms.Select(attrs={'class': 'form-control'})
+        widget=AutocompleteSelect('courses', attrs={'class': 'form-control', 'data-placeholder': 'All Courses'})
     )
     batch = forms.ModelChoiceField(
         queryset=Batch.objects.all(),
         required=False,
         empty_label="All Batches",
-        widget=forms.Select(attrs={'class': 'form-control'})
+        widget=AutocompleteSelect('batches', attrs={'class': 'form-control', 'data-placeholder': 'All Batches'})
     )
     student = forms.ModelChoiceField(
         queryset=Student.objects.all(),
         required=False,
         empty_label="All Students",
-        widget=forms.Select(attrs={'class': 'form-control'})
+        widget=AutocompleteSelect('students', forward=('batch',), attrs={'class': 'form-control', 'data-placeholder': 'All Students'})
     )
 
 class LessonForm(forms.ModelForm):
@@ -209,19 +213,19 @@ class LessonForm(forms.ModelForm):
         queryset=Batch.objects.none(),
         required=True,
         empty_label="Select batch",
-        widget=forms.Select(attrs={'class': 'form-control'})
+        widget=AutocompleteSelect('batches', attrs={'class': 'form-control'})
     )
 
     teacher = forms.ModelChoiceField(
         queryset=Teacher.objects.none(),
         required=False,
-        widget=forms.Select(attrs={'class': 'form-control'})
+        widget=AutocompleteSelect('teachers', attrs={'class': 'form-control'})
     )
 
     students = forms.ModelMultipleChoiceField(
         queryset=Student.objects.none(),
         required=False,
-        widget=forms.SelectMultiple(attrs={'class': 'form-control'})
+        widget=AutocompleteSelectMultiple('students', forward=('batch',), attrs={'class': 'form-control'})
     )
 
     class Meta:
@@ -229,11 +233,10 @@ class LessonForm(forms.ModelForm):
         fields = ['title', 'content', 'batch', 'teacher', 'students']
 
     def __init__(self, *args, **kwargs):
-        user = kwargs.pop('user', None)
-        teacher = kwargs.pop('teacher', None)
+        principal = kwargs.pop('principal', None)
         super().__init__(*args, **kwargs)
 
-        role = getattr(user.profile, 'role', None) if user else None
+        role = principal.role if principal else None
 
         if role == 'admin':
             self.fields['batch'].queryset = Batch.objects.all()
@@ -241,24 +244,24 @@ class LessonForm(forms.ModelForm):
             self.fields['students'].queryset = Student.objects.all()
 
         elif role == 'teacher':
-            teacher = Teacher.objects.filter(user=user).first()
-            if teacher:
-                self.fields['batch'].queryset = Batch.objects.filter(teacher=teacher)
-                self.fields['teacher'].queryset = Teacher.objects.filter(id=teacher.id)
-                self.fields['teacher'].initial = teacher.id
+            teacher_id = principal.teacher_id
+            if teacher_id:
+                self.fields['batch'].queryset = Batch.objects.filter(teacher_id=teacher_id)
+                self.fields['teacher'].queryset = Teacher.objects.filter(id=teacher_id)
+                self.fields['teacher'].initial = teacher_id
                 self.fields['teacher'].disabled = True
 
-                enrolled_students = Student.objects.filter(enrollments__batch__teacher=teacher).distinct()
+                enrolled_students = Student.objects.filter(enrollments__batch__teacher_id=teacher_id).distinct()
                 self.fields['students'].queryset = enrolled_students
 
         elif role == 'student':
-            student = Student.objects.filter(user=user).first()
-            if student:
-                enrolled_batches = Batch.objects.filter(enrollments__student=student)
+            student_id = principal.student_id
+            if student_id:
+                enrolled_batches = Batch.objects.filter(enrollments__student_id=student_id)
                 self.fields['batch'].queryset = enrolled_batches
 
-                self.fields['students'].queryset = Student.objects.filter(id=student.id)
-                self.fields['students'].initial = [student.id]
+                self.fields['students'].queryset = Student.objects.filter(id=student_id)
+                self.fields['students'].initial = [student_id]
                 self.fields['students'].disabled = True
 
         # Dynamically populate students if batch selected (for admin/teacher)
@@ -0,0 +1,196 @@
+import codecs
+import csv
+from itertools import islice
+from pathlib import Path
+
+from django import forms
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+
+from .models import Batch, Enrollment, Student
+from .provisioning import check_accounts, provision_students, provision_teachers
+from .services import bulk_enroll
+
+ENCODING_SAMPLE_SIZE = 64 * 1024
+
+
+def detect_encoding(path):
+    """
+    Guess the text encoding of a CSV file from its first bytes.
+
+    A BOM wins; otherwise UTF-8 is used if the sample decodes cleanly, then whatever
+    ``charset_normalizer`` suggests when it is installed, and finally cp1252, which accepts
+    any byte (the same fallback ``convert_to_utf8.py`` relied on).
+    """
+    with open(path, "rb") as source:
+        sample = source.read(ENCODING_SAMPLE_SIZE)
+
+    for bom, encoding in ((codecs.BOM_UTF8, "utf-8-sig"), (codecs.BOM_UTF16_LE, "utf-16"), (codecs.BOM_UTF16_BE, "utf-16")):
+        if sample.startswith(bom):
+            return encoding
+    try:
+        # An incremental decode tolerates a multi-byte character cut off by the sample size.
+        codecs.getincrementaldecoder("utf-8")().decode(sample, final=False)
+        return "utf-8"
+    except UnicodeDecodeError:
+        pass
+    try:
+        from charset_normalizer import from_bytes
+    except ImportError:
+        return "cp1252"
+    match = from_bytes(sample).best()
+    return match.encoding if match else "cp1252"
+
+
+def iter_rows(path, encoding=None):
+    """
+    Yield ``(line_number, row_dict)`` from a CSV or XLSX file without loading it whole.
+
+    CSV line numbers are physical lines, so a row with quoted newlines reports its last line.
+    """
+    if Path(path).suffix.lower() in (".xlsx", ".xlsm"):
+        yield from _iter_xlsx_rows(path)
+        return
+
+    with open(path, newline="", encoding=encoding or detect_encoding(path)) as source:
+        reader = csv.DictReader(source)
+        for row in reader:
+            yield reader.line_num, {key.strip(): (value or "").strip() for key, value in row.items() if key}
+
+
+def _iter_xlsx_rows(path):
+    try:
+        from openpyxl import load_workbook
+    except ImportError:
+        raise ImportError("Reading .xlsx files requires openpyxl (pip install openpyxl).")
+
+    workbook = load_workbook(path, read_only=True, data_only=True)
+    try:
+        rows = workbook.active.iter_rows(values_only=True)
+        header = [str(cell).strip() if cell is not None else "" for cell in next(rows, ())]
+        for line, values in enumerate(rows, start=2):
+            if not any(value not in (None, "") for value in values):
+                continue
+            yield line, {
+                key: value.strip() if isinstance(value, str) else ("" if value is None else value)
+                for key, value in zip(header, values) if key
+            }
+    finally:
+        workbook.close()
+
+
+def chunked(iterable, size):
+    iterator = iter(iterable)
+    while chunk := list(islice(iterator, size)):
+        yield chunk
+
+
+class StudentRowForm(forms.Form):
+    name = forms.CharField(max_length=30)
+    email = forms.EmailField()
+    age = forms.IntegerField(min_value=0)
+    phone_number = forms.CharField(max_length=15, required=False)
+    date_of_birth = forms.DateField(required=False)
+    username = forms.CharField(max_length=150, required=False)
+    password = forms.CharField(required=False)
+
+
+class TeacherRowForm(forms.Form):
+    name = forms.CharField(max_length=100)
+    email = forms.EmailField()
+    phone = forms.CharField(max_length=20, required=False)
+    specialization = forms.CharField(max_length=100, required=False)
+    courses = forms.CharField(required=False, help_text="Course codes separated by ';'.")
+    username = forms.CharField(max_length=150, required=False)
+    password = forms.CharField(required=False)
+
+    def clean_courses(self):
+        return [code.strip() for code in self.cleaned_data["courses"].split(";") if code.strip()]
+
+
+class EnrollmentRowForm(forms.Form):
+    student = forms.CharField(help_text="Student roll number or email.")
+    batch = forms.CharField(help_text="Batch code, e.g. CRS-01-B1.")
+    status = forms.ChoiceField(choices=Enrollment._meta.get_field("status").choices, required=False)
+    fee_type = forms.ChoiceField(choices=Enrollment.FEE_TYPE_CHOICES, required=False)
+
+
+def validate_rows(chunk, form_class):
+    """Run ``form_class`` over ``(line, row)`` pairs; return the cleaned rows and the errors."""
+    valid, errors = [], []
+    for line, row in chunk:
+        form = form_class(row)
+        if form.is_valid():
+            valid.append((line, form.cleaned_data))
+        else:
+            errors.append((line, "; ".join(
+                f"{field}: {' '.join(messages)}" if field != "__all__" else " ".join(messages)
+                for field, messages in form.errors.items()
+            )))
+    return valid, errors
+
+
+def import_students(chunk, workers=None):
+    """Create the valid student rows of ``chunk``; return ``(created, [(line, error), ...])``."""
+    rows, errors = validate_rows(chunk, StudentRowForm)
+    rows, rejected = check_accounts(rows, "student")
+    errors += rejected
+    if rows:
+        provision_students([row for _, row in rows], workers=workers)
+    return len(rows), errors
+
+
+def import_teachers(chunk, workers=None):
+    rows, errors = validate_rows(chunk, TeacherRowForm)
+    rows, rejected = check_accounts(rows, "teacher")
+    errors += rejected
+    if rows:
+        provision_teachers([row for _, row in rows], workers=workers)
+    return len(rows), errors
+
+
+def import_enrollments(chunk, workers=None):
+    rows, errors = validate_rows(chunk, EnrollmentRowForm)
+
+    keys = {row["student"] for _, row in rows}
+    students = {}
+    for pk, roll_number, email in Student.objects.filter(
+        Q(roll_number__in=keys) | Q(email__in=keys)
+    ).values_list("pk", "roll_number", "email"):
+        students[roll_number] = pk
+        students.setdefault(email, pk)
+    batches = dict(
+        Batch.objects.filter(batch_code__in={row["batch"] for _, row in rows}).values_list("batch_code", "pk")
+    )
+
+    items = []
+    for line, row in rows:
+        if row["student"] not in students:
+            errors.append((line, f"unknown student {row['student']}"))
+        elif row["batch"] not in batches:
+            errors.append((line, f"unknown batch {row['batch']}"))
+        else:
+            items.append((line, {
+                "student": students[row["student"]],
+                "batch": batches[row["batch"]],
+                "status": row["status"] or "enrolled",
+                "fee_type": row["fee_type"] or "one_time",
+            }))
+
+    # bulk_enroll is all-or-nothing; drop the rows it rejects and retry the rest.
+    while items:
+        try:
+            bulk_enroll([item for _, item in items])
+            break
+        except ValidationError as exc:
+            rejected = exc.message_dict
+            errors.extend((line, " ".join(rejected[index])) for index, (line, _) in enumerate(items) if index in rejected)
+            items = [entry for index, entry in enumerate(items) if index not in rejected]
+    return len(items), errors
+
+
+IMPORTERS = {
+    "students": import_students,
+    "teachers": import_teachers,
+    "enrollments": import_enrollments,
+}
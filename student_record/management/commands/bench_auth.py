@@ -0,0 +1,51 @@
+import time
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test.utils import CaptureQueriesContext, override_settings
+from rest_framework.authentication import TokenAuthentication
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIRequestFactory
+
+from student_record.api.authentication import CachedTokenAuthentication, principal_cache
+from student_record.api.views import CourseViewSet
+from student_record.benchmarking import isolated_database, summarize
+
+
+class Command(BaseCommand):
+    help = "Compare database round trips of token authentication with and without the principal cache."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--requests", type=int, default=500)
+        parser.add_argument("--rate", type=int, default=50, help="Expected API requests per second.")
+
+    def handle(self, *args, **options):
+        # One process, so the principal cache is safe to use with the local cache here.
+        with isolated_database(), override_settings(AUTH_TOKEN_CACHE=True):
+            user = User.objects.create_user("bench-admin", "bench@example.com", "bench-pass", is_staff=True)
+            token = Token.objects.create(user=user)
+            factory = APIRequestFactory()
+
+            results = {}
+            for auth_class in (TokenAuthentication, CachedTokenAuthentication):
+                view = CourseViewSet.as_view({"get": "list"}, authentication_classes=[auth_class])
+                cache.clear()
+                samples, auth_queries = [], 0
+                for _ in range(options["requests"]):
+                    request = factory.get("/api/v1/courses/", HTTP_AUTHORIZATION=f"Token {token.key}")
+                    started = time.perf_counter()
+                    with CaptureQueriesContext(connection) as queries:
+                        view(request).render()
+                    samples.append(time.perf_counter() - started)
+                    auth_queries += sum('"authtoken_token"' in q["sql"] for q in queries.captured_queries)
+                results[auth_class.__name__] = (auth_queries / options["requests"], summarize(samples))
+
+        for name, (per_request, stats) in results.items():
+            self.stdout.write(
+                f"{name}: {per_request:.3f} token queries/request, "
+                f"p50 {stats['p50_ms']} ms, p95 {stats['p95_ms']} ms"
+            )
+        saved = (results["TokenAuthentication"][0] - results["CachedTokenAuthentication"][0]) * options["rate"]
+        self.stdout.write(self.style.SUCCESS(f"Saves ~{saved:.1f} queries/s at {options['rate']} requests/s."))
@@ -0,0 +1,238 @@
+import json
+import logging
+import os
+import re
+import time
+import tracemalloc
+from pathlib import Path
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, reset_queries
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+
+from student_record.benchmarking import isolated_database, iter_routes, summarize
+from student_record.datasets import generate_dataset
+from student_record.models import Batch, Course, Enrollment, Installment, Lesson, Profile, Student, Teacher
+
+ROLES = ("admin", "teacher", "student")
+SKIPPED_ROUTES = {"logout"}
+# Models behind ``<pk>`` in the HTML routes; API routes take it from the viewset queryset.
+PK_MODELS = {
+    "student_edit": Student,
+    "student_delete": Student,
+    "user_update_role": User,
+    "user_delete": User,
+    "teacher_edit": Teacher,
+    "teacher_delete": Teacher,
+    "lesson_update": Lesson,
+    "lesson_delete": Lesson,
+}
+PARAMETER_MODELS = {
+    "batch_id": Batch,
+    "course_id": Course,
+    "enrollment_id": Enrollment,
+    "installment_id": Installment,
+    "lesson_id": Lesson,
+    "user_id": User,
+}
+QUERY_PARAMETERS = {
+    "get_batch_students": {"batch_id": Batch},
+    "get_batch_teachers": {"batch_id": Batch},
+}
+
+
+class Command(BaseCommand):
+    help = (
+        "GET every student_record HTML and API route as an admin, a teacher and a student against a "
+        "generated dataset, recording p50/p95 latency, query count and peak memory. Writes a JSON "
+        "report and fails when a route regresses against the stored baseline."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--scale", type=float, default=0.2, help="generate_dataset scale.")
+        parser.add_argument("--seed", type=int, default=0)
+        parser.add_argument("--repeat", type=int, default=10, help="Timed requests per route and role.")
+        parser.add_argument("--routes", help="Only routes whose '<role> <path>' key matches this regex.")
+        parser.add_argument("--report", help="Default: bench_routes.json in BENCH_DIR.")
+        parser.add_argument("--baseline", help="Default: bench_routes_baseline.json in BENCH_DIR.")
+        parser.add_argument("--update-baseline", action="store_true", help="Store this run as the new baseline.")
+        parser.add_argument("--tolerance", type=float, default=0.5,
+                            help="Allowed relative growth of p50 latency and peak memory.")
+        parser.add_argument("--slack-ms", type=float, default=5.0,
+                            help="Latency growth below this is never a regression.")
+
+    def handle(self, *args, **options):
+        bench_dir = Path(getattr(settings, "BENCH_DIR", Path(settings.BASE_DIR) / "bench"))
+        options["report"] = options["report"] or bench_dir / "bench_routes.json"
+        options["baseline"] = options["baseline"] or bench_dir / "bench_routes_baseline.json"
+
+        baseline = None
+        if not options["update_baseline"] and os.path.exists(options["baseline"]):
+            with open(options["baseline"]) as source:
+                baseline = json.load(source)
+            if baseline["dataset"] != {"scale": options["scale"], "seed": options["seed"]}:
+                raise CommandError(
+                    f"{options['baseline']} was recorded with {baseline['dataset']}; rerun with the same "
+                    "--scale/--seed or refresh it with --update-baseline."
+                )
+
+        selected = re.compile(options["routes"]) if options["routes"] else None
+        report = {"dataset": {"scale": options["scale"], "seed": options["seed"]}, "routes": {}}
+        # Failing routes are reported in the table; their tracebacks would bury it.
+        request_logger = logging.getLogger("django.request")
+        was_disabled, request_logger.disabled = request_logger.disabled, True
+        try:
+            with isolated_database():
+                generate_dataset(scale=options["scale"], seed=options["seed"])
+                samples = self.sample_objects()
+                clients = self.role_clients(samples)
+
+                for template, pattern in iter_routes():
+                    url = self.build_url(template, pattern, samples)
+                    if url is None:
+                        continue
+                    for role, client in clients.items():
+                        key = f"{role} {template}"
+                        if selected and not selected.search(key):
+                            continue
+                        result = self.measure(client, url, options["repeat"])
+                        report["routes"][key] = result
+                        style = self.style.ERROR if result["status"] >= 500 else (lambda text: text)
+                        self.stdout.write(style(
+                            f"{key:<60} {result['status']:>4} {result['queries']:>5} q "
+                            f"p50 {result['p50_ms']:>8.2f} ms  p95 {result['p95_ms']:>8.2f} ms  {result['peak_kb']:>8.1f} KiB"
+                        ))
+        finally:
+            request_logger.disabled = was_disabled
+
+        Path(options["report"]).parent.mkdir(parents=True, exist_ok=True)
+        with open(options["report"], "w") as target:
+            json.dump(report, target, indent=2, sort_keys=True)
+        self.stdout.write(f"Wrote {options['report']} ({len(report['routes'])} measurements).")
+
+        if options["update_baseline"]:
+            Path(options["baseline"]).parent.mkdir(parents=True, exist_ok=True)
+            with open(options["baseline"], "w") as target:
+                json.dump(report, target, indent=2, sort_keys=True)
+            self.stdout.write(self.style.SUCCESS(f"Stored the baseline in {options['baseline']}."))
+            return
+        if baseline is None:
+            self.stdout.write(self.style.WARNING(f"No baseline at {options['baseline']}; nothing to compare."))
+            return
+
+        regressions = compare(report, baseline, options["tolerance"], options["slack_ms"])
+        if regressions:
+            raise CommandError("Route regressions:\n" + "\n".join(regressions))
+        self.stdout.write(self.style.SUCCESS("No regressions against the baseline."))
+
+    def sample_objects(self):
+        """One coherent record per model: the teacher and student roles own or take part in all of them."""
+        enrollment = (
+            Enrollment.objects.filter(fee_type="installment")
+            .select_related("student__user__profile", "batch__course", "batch__teacher")
+            .order_by("pk").first()
+        )
+        if enrollment is None:
+            raise CommandError("The generated dataset has no installment enrollments; increase --scale.")
+        student = enrollment.student
+        return {
+            Enrollment: enrollment,
+            Student: student,
+            User: student.user,
+            Profile: student.user.profile,
+            Batch: enrollment.batch,
+            Course: enrollment.batch.course,
+            Teacher: enrollment.batch.teacher,
+            Installment: enrollment.installments.order_by("pk").first(),
+            Lesson: enrollment.batch.lessons.order_by("pk").first(),
+        }
+
+    def role_clients(self, samples):
+        admin = User.objects.create_superuser("bench-admin", "bench-admin@example.com", None)
+        Profile.objects.create(user=admin, role="admin", full_name="Bench Admin")
+        users = {"admin": admin, "teacher": samples[Teacher].user, "student": samples[Student].user}
+
+        clients = {}
+        for role in ROLES:
+            # Record server errors as 500s instead of aborting the run.
+            clients[role] = Client(raise_request_exception=False)
+            clients[role].force_login(users[role])
+        return clients
+
+    def build_url(self, template, pattern, samples):
+        parameters = re.findall(r"<(\w+)>", template)
+        actions = getattr(pattern.callback, "actions", None)
+        if pattern.name in SKIPPED_ROUTES or "format" in parameters or (actions is not None and "get" not in actions):
+            return None
+
+        url = template
+        for name in parameters:
+            if name == "pk":
+                viewset = getattr(pattern.callback, "cls", None)
+                model = viewset.queryset.model if viewset is not None else PK_MODELS.get(pattern.name)
+            else:
+                model = PARAMETER_MODELS.get(name)
+            if model is None or samples.get(model) is None:
+                self.stderr.write(f"Skipping {template}: no sample for <{name}>.")
+                return None
+            url = url.replace(f"<{name}>", str(samples[model].pk))
+
+        query = QUERY_PARAMETERS.get(pattern.name)
+        if query:
+            url += "?" + "&".join(f"{name}={samples[model].pk}" for name, model in query.items())
+        return url
+
+    def measure(self, client, url, repeat):
+        # The first request warms caches and templates and is the one whose queries are counted.
+        # The query log is a bounded deque, so it must be emptied for the count to be right.
+        reset_queries()
+        with CaptureQueriesContext(connection) as queries:
+            status = fetch(client, url)
+        # Read now: captured_queries slices the live log, which the next request resets.
+        query_count = len(queries)
+
+        timings = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            fetch(client, url)
+            timings.append(time.perf_counter() - started)
+
+        tracemalloc.start()
+        try:
+            fetch(client, url)
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+
+        return {"status": status, "queries": query_count, "peak_kb": round(peak / 1024, 1), **summarize(timings)}
+
+
+def fetch(client, url):
+    response = client.get(url)
+    if response.streaming:
+        # Exports stream; their queries only run while the body is consumed.
+        for _ in response.streaming_content:
+            pass
+    return response.status_code
+
+
+def compare(report, baseline, tolerance, slack_ms):
+    """Describe every route that got slower, chattier, heavier or changed status since ``baseline``."""
+    regressions = []
+    for key, result in sorted(report["routes"].items()):
+        before = baseline["routes"].get(key)
+        if before is None:
+            continue
+        if result["status"] != before["status"]:
+            regressions.append(f"{key}: status {before['status']} -> {result['status']}")
+        if result["queries"] > before["queries"]:
+            regressions.append(f"{key}: {before['queries']} -> {result['queries']} queries")
+        # p95 over a handful of requests is mostly noise; gate on the median.
+        if result["p50_ms"] > before["p50_ms"] * (1 + tolerance) + slack_ms:
+            regressions.append(f"{key}: p50 {before['p50_ms']} -> {result['p50_ms']} ms")
+        if result["peak_kb"] > before["peak_kb"] * (1 + tolerance):
+            regressions.append(f"{key}: peak {before['peak_kb']} -> {result['peak_kb']} KiB")
+    return regressions
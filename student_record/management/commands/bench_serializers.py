@@ -0,0 +1,67 @@
+import time
+
+from django.core.management.base import BaseCommand
+from rest_framework.renderers import JSONRenderer
+
+from student_record.api import views
+from student_record.api.renderers import FastJSONRenderer, orjson
+from student_record.benchmarking import create_sample_records, isolated_database
+
+READ_VIEWSETS = [
+    views.StudentViewSet,
+    views.CourseViewSet,
+    views.BatchViewSet,
+    views.EnrollmentViewSet,
+    views.TeacherViewSet,
+    views.LessonViewSet,
+    views.ProfileViewSet,
+    views.InstallmentViewSet,
+]
+
+
+class Command(BaseCommand):
+    help = "Measure serialize-plus-render throughput of each read serializer with the stdlib and fast JSON renderers."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--students", type=int, default=300)
+        parser.add_argument("--rounds", type=int, default=5)
+
+    def handle(self, *args, **options):
+        if orjson is None:
+            self.stdout.write(self.style.WARNING("orjson is not installed; FastJSONRenderer uses the stdlib path."))
+
+        renderers = {"json": JSONRenderer(), "fast": FastJSONRenderer()}
+        with isolated_database():
+            create_sample_records(students=options["students"])
+
+            self.stdout.write(f"{'serializer':<28}{'rows':>7}{'serialize ms':>14}"
+                              f"{'json ms':>10}{'fast ms':>10}{'json rows/s':>13}{'fast rows/s':>13}")
+            for viewset in READ_VIEWSETS:
+                view = viewset()
+                view.action = "list"
+                serializer_class = view.get_serializer_class()
+                instances = list(viewset.queryset)
+
+                serialize_time = 0.0
+                render_time = dict.fromkeys(renderers, 0.0)
+                for _ in range(options["rounds"]):
+                    started = time.perf_counter()
+                    data = serializer_class(instances, many=True).data
+                    serialize_time += time.perf_counter() - started
+                    for name, renderer in renderers.items():
+                        started = time.perf_counter()
+                        renderer.render(data)
+                        render_time[name] += time.perf_counter() - started
+
+                rows = len(instances) * options["rounds"]
+                throughput = {
+                    name: rows / (serialize_time + elapsed) if serialize_time + elapsed else 0.0
+                    for name, elapsed in render_time.items()
+                }
+                self.stdout.write(
+                    f"{serializer_class.__name__:<28}{len(instances):>7}"
+                    f"{serialize_time / options['rounds'] * 1000:>14.2f}"
+                    f"{render_time['json'] / options['rounds'] * 1000:>10.2f}"
+                    f"{render_time['fast'] / options['rounds'] * 1000:>10.2f}"
+                    f"{throughput['json']:>13.0f}{throughput['fast']:>13.0f}"
+                )
@@ -0,0 +1,116 @@
+import json
+import re
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.db.models import Count, Sum
+
+from student_record.benchmarking import isolated_database
+from student_record.datasets import generate_dataset
+from student_record.models import Batch, Enrollment, Installment, Lesson, Student
+
+# A fixed "today" inside the generated dataset's date range keeps the plans reproducible.
+TODAY = date(2025, 6, 15)
+_SQLITE_STEP = re.compile(r"\b(SCAN|SEARCH) (\w+)(.*)$")
+
+
+def key_querysets():
+    """
+    ``(label, queryset, tables)`` for the hot view and API queries; each must reach the
+    listed tables through an index rather than a sequential scan.
+    """
+    batch = Batch.objects.order_by("pk").first()
+    student = Student.objects.filter(course_count__gt=0).order_by("pk").first()
+    enrollment = Enrollment.objects.filter(fee_type="installment").order_by("pk").first()
+    return [
+        ("overdue installments (fee_management, installments API)",
+         Installment.objects.filter(status="pending", due_date__lt=TODAY).order_by("due_date"),
+         ["student_record_installment"]),
+        ("fee collected this month (admin_analytics)",
+         Installment.objects.filter(paid_date__year=TODAY.year, paid_date__month=TODAY.month)
+         .values("status").annotate(total=Sum("paid_amount")),
+         ["student_record_installment"]),
+        ("installments API paid-date range",
+         Installment.objects.filter(paid_date__gte=date(2025, 1, 1), paid_date__lte=date(2025, 1, 31)),
+         ["student_record_installment"]),
+        ("installment schedule (enrollment detail)",
+         Installment.objects.filter(enrollment_id=enrollment.pk).order_by("due_date"),
+         ["student_record_installment"]),
+        ("recent enrollments (admin_analytics, dashboard)",
+         Enrollment.objects.order_by("-enrolled_on")[:10],
+         ["student_record_enrollment"]),
+        ("enrollments per month (admin_analytics chart)",
+         Enrollment.objects.filter(enrolled_on__gte=date(2025, 5, 1), enrolled_on__lte=date(2025, 5, 31)),
+         ["student_record_enrollment"]),
+        ("batch roster by roll number (get_batch_students)",
+         Enrollment.objects.filter(batch_id=batch.pk).order_by("roll_number"),
+         ["student_record_enrollment"]),
+        ("student enrollments (student_dashboard)",
+         Enrollment.objects.filter(student_id=student.pk).order_by("-enrolled_on"),
+         ["student_record_enrollment"]),
+        ("batch lessons newest first (lesson_list)",
+         Lesson.objects.filter(batch_id=batch.pk).order_by("-created_at")[:20],
+         ["student_record_lesson"]),
+        ("lesson completion counts (lessons API)",
+         Lesson.objects.filter(batch_id=batch.pk).annotate(completed=Count("students")),
+         ["student_record_lesson"]),
+    ]
+
+
+def sequential_scans(queryset):
+    """Tables the backend plans to read with a full sequential scan."""
+    if connection.vendor == "postgresql":
+        scans = []
+        pending = [json.loads(queryset.explain(format="json"))[0]["Plan"]]
+        while pending:
+            node = pending.pop()
+            if node["Node Type"] == "Seq Scan":
+                scans.append(node["Relation Name"])
+            pending.extend(node.get("Plans", ()))
+        return scans
+
+    scans = []
+    for line in queryset.explain().splitlines():
+        match = _SQLITE_STEP.search(line)
+        if match and match.group(1) == "SCAN" and "USING" not in match.group(3):
+            scans.append(match.group(2))
+    return scans
+
+
+class Command(BaseCommand):
+    help = (
+        "Generate a dataset, then check that the hot view and API querysets reach their main "
+        "tables through indexes. On PostgreSQL sequential scans are disabled while planning, so "
+        "any remaining Seq Scan means no usable index exists."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--scale", type=float, default=0.5, help="generate_dataset scale.")
+        parser.add_argument("--seed", type=int, default=0)
+        parser.add_argument("--verbose-plans", action="store_true", help="Print each plan.")
+
+    def handle(self, *args, **options):
+        failures = []
+        with isolated_database():
+            generate_dataset(scale=options["scale"], seed=options["seed"])
+            with connection.cursor() as cursor:
+                cursor.execute("ANALYZE")
+
+            with transaction.atomic():
+                if connection.vendor == "postgresql":
+                    with connection.cursor() as cursor:
+                        cursor.execute("SET LOCAL enable_seqscan = off")
+
+                for label, queryset, tables in key_querysets():
+                    scanned = sorted(set(sequential_scans(queryset)) & set(tables))
+                    if scanned:
+                        failures.append(f"{label}: sequential scan on {', '.join(scanned)}")
+                        self.stdout.write(self.style.ERROR(f"SEQ SCAN  {label} ({', '.join(scanned)})"))
+                    else:
+                        self.stdout.write(self.style.SUCCESS(f"index     {label}"))
+                    if options["verbose_plans"]:
+                        self.stdout.write(queryset.explain())
+
+        if failures:
+            raise CommandError("Query plans without index access:\n" + "\n".join(failures))
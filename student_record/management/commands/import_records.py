@@ -0,0 +1,78 @@
+import csv
+import json
+import os
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from student_record.importing import IMPORTERS, chunked, iter_rows
+
+
+class Command(BaseCommand):
+    help = (
+        "Import students, teachers or enrollments from a CSV or XLSX file in validated chunks. "
+        "Rejected rows go to an errors CSV; after a failure, --resume continues from the last "
+        "committed chunk."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("kind", choices=sorted(IMPORTERS))
+        parser.add_argument("path")
+        parser.add_argument("--chunk-size", type=int, default=1000, help="Rows validated and committed together.")
+        parser.add_argument("--encoding", help="Override CSV encoding detection.")
+        parser.add_argument("--workers", type=int, default=None, help="Password hashing processes.")
+        parser.add_argument("--errors", help="Where to write rejected rows (default: <path>.errors.csv).")
+        parser.add_argument("--resume", action="store_true", help="Skip rows committed by a previous run.")
+
+    def handle(self, *args, **options):
+        path = options["path"]
+        if not os.path.exists(path):
+            raise CommandError(f"{path} does not exist.")
+
+        importer = IMPORTERS[options["kind"]]
+        checkpoint_path = f"{path}.checkpoint"
+        errors_path = options["errors"] or f"{path}.errors.csv"
+        fingerprint = {"kind": options["kind"], "size": os.path.getsize(path), "mtime": os.path.getmtime(path)}
+
+        resume_after = 0
+        if options["resume"] and os.path.exists(checkpoint_path):
+            with open(checkpoint_path) as source:
+                checkpoint = json.load(source)
+            if checkpoint["file"] != fingerprint:
+                raise CommandError(f"{path} changed since the checkpoint was written; import it from the start.")
+            resume_after = checkpoint["line"]
+            self.stdout.write(f"Resuming after line {resume_after}.")
+
+        rows = ((line, row) for line, row in iter_rows(path, encoding=options["encoding"]) if line > resume_after)
+        created = rejected = 0
+        started = time.perf_counter()
+
+        with open(errors_path, "a" if resume_after else "w", newline="") as errors_file:
+            errors_writer = csv.writer(errors_file)
+            if not errors_file.tell():
+                errors_writer.writerow(["line", "error"])
+
+            for chunk in chunked(rows, options["chunk_size"]):
+                count, errors = importer(chunk, workers=options["workers"])
+                created += count
+                rejected += len(errors)
+                errors_writer.writerows(sorted(errors))
+                errors_file.flush()
+                self.write_checkpoint(checkpoint_path, fingerprint, chunk[-1][0])
+                self.stdout.write(f"line {chunk[-1][0]}: {created} imported, {rejected} rejected")
+
+        if os.path.exists(checkpoint_path):
+            os.remove(checkpoint_path)
+        elapsed = time.perf_counter() - started
+        style = self.style.WARNING if rejected else self.style.SUCCESS
+        self.stdout.write(style(
+            f"Imported {created} {options['kind']} in {elapsed:.1f}s; {rejected} rows rejected"
+            + (f" (see {errors_path})." if rejected else ".")
+        ))
+
+    def write_checkpoint(self, checkpoint_path, fingerprint, line):
+        # Written after each chunk commits, replaced atomically so a crash never leaves half a file.
+        temporary = f"{checkpoint_path}.tmp"
+        with open(temporary, "w") as target:
+            json.dump({"file": fingerprint, "line": line}, target)
+        os.replace(temporary, checkpoint_path)
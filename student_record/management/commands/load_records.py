@@ -0,0 +1,31 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from student_record.transfer import load, open_dump
+
+
+class Command(BaseCommand):
+    help = (
+        "Load a dump_records file in one transaction, using COPY on PostgreSQL and batched "
+        "inserts elsewhere. Rows keep their ids, codes and timestamps."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("path")
+        parser.add_argument("--batch-size", type=int, default=2000, help="Rows inserted per statement or COPY.")
+        parser.add_argument("--flush", action="store_true", help="Delete existing rows in the dumped tables first.")
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        try:
+            with open_dump(options["path"], "r") as source:
+                load(source, batch_size=options["batch_size"], flush=options["flush"], progress=self.report)
+        except ValueError as exc:
+            raise CommandError(str(exc))
+        self.stdout.write(self.style.SUCCESS(
+            f"Loaded {options['path']} in {time.perf_counter() - started:.1f}s."
+        ))
+
+    def report(self, model, count):
+        self.stdout.write(f"{model._meta.label_lower}: {count} rows")
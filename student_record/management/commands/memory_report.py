@@ -0,0 +1,53 @@
+import json
+from collections import defaultdict
+
+from django.core.management.base import BaseCommand, CommandError
+
+from student_record.memory import memory_log_path
+
+
+def mib(size):
+    return f"{size / 2 ** 20:.1f} MiB"
+
+
+class Command(BaseCommand):
+    help = "Summarize memory-measured requests per view, highest peak first, with allocation sites."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--path", help="Memory log to read (default: MEMORY_LOG).")
+        parser.add_argument("--sites", type=int, default=5, help="Allocation sites shown per view.")
+        parser.add_argument("--over-budget", action="store_true", help="Only show views that went over budget.")
+
+    def handle(self, *args, **options):
+        path = options["path"] or memory_log_path()
+        try:
+            with open(path) as source:
+                entries = [json.loads(line) for line in source if line.strip()]
+        except FileNotFoundError:
+            raise CommandError(f"{path} does not exist; no requests were measured yet.")
+
+        views = defaultdict(list)
+        for entry in entries:
+            views[entry["view"] or entry["route"]].append(entry)
+
+        ranked = sorted(views.items(), key=lambda item: -max(entry["peak_bytes"] for entry in item[1]))
+        for view, measured in ranked:
+            exceeded = [entry for entry in measured if entry["over_budget"]]
+            if options["over_budget"] and not exceeded:
+                continue
+            worst = max(measured, key=lambda entry: entry["peak_bytes"])
+            peaks = [entry["peak_bytes"] for entry in measured]
+            budget = mib(worst["budget_bytes"]) if worst["budget_bytes"] is not None else "none"
+            style = self.style.ERROR if exceeded else self.style.MIGRATE_HEADING
+            self.stdout.write(style(
+                f"{view}: {len(measured)} measured, peak {mib(max(peaks))}, mean {mib(sum(peaks) / len(peaks))}, "
+                f"budget {budget}, {len(exceeded)} over"
+            ))
+            self.stdout.write(f"  worst: {worst['method']} {worst['path']}")
+            for template in sorted(worst["templates"], key=lambda template: -template["peak_bytes"])[:3]:
+                self.stdout.write(f"  template {template['template']}: {mib(template['peak_bytes'])}")
+            for site in (worst["sites"] or [])[:options["sites"]]:
+                self.stdout.write(
+                    f"    {mib(site['size_bytes']):>10}  {site['blocks']:>8} blocks  "
+                    f"{site['site']} -> {site['allocated_in']}"
+                )
@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+
+from student_record.api.sync import tombstone_cutoff
+from student_record.models import Tombstone
+
+
+class Command(BaseCommand):
+    help = "Delete tombstones older than TOMBSTONE_RETENTION_DAYS (run daily, e.g. from cron)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--dry-run", action="store_true", help="Only count what would be deleted.")
+
+    def handle(self, *args, **options):
+        expired = Tombstone.objects.filter(deleted_at__lt=tombstone_cutoff())
+        if options["dry_run"]:
+            self.stdout.write(f"{expired.count()} tombstones would be deleted.")
+            return
+        deleted, _ = expired.delete()
+        self.stdout.write(self.style.SUCCESS(f"Deleted {deleted} tombstones."))
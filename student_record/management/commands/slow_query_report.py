@@ -0,0 +1,47 @@
+import json
+from collections import Counter
+
+from django.core.management.base import BaseCommand, CommandError
+
+from student_record.slow_queries import slow_query_log_path
+
+
+class Command(BaseCommand):
+    help = "Summarize the slow-query log by statement signature, slowest total time first."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--path", help="Slow-query log to read (default: SLOW_QUERY_LOG).")
+        parser.add_argument("--top", type=int, default=20)
+        parser.add_argument("--plans", action="store_true",
+                            help="Print the latest captured plan of each statement (needs SLOW_QUERY_LOG_PARAMS).")
+
+    def handle(self, *args, **options):
+        path = options["path"] or slow_query_log_path()
+        try:
+            with open(path) as source:
+                entries = [json.loads(line) for line in source if line.strip()]
+        except FileNotFoundError:
+            raise CommandError(f"{path} does not exist; no slow queries were logged yet.")
+
+        groups = {}
+        for entry in entries:
+            group = groups.setdefault(entry["signature"], {"durations": [], "views": Counter(), "frames": Counter()})
+            group["durations"].append(entry["duration_ms"])
+            group["views"][entry.get("view")] += 1
+            group["frames"][entry.get("frame")] += 1
+            group["sql"] = entry["sql"]
+            if entry.get("plan") is not None:
+                group["plan"] = entry["plan"]
+
+        ranked = sorted(groups.items(), key=lambda item: -sum(item[1]["durations"]))[:options["top"]]
+        for signature, group in ranked:
+            durations = group["durations"]
+            self.stdout.write(self.style.MIGRATE_HEADING(
+                f"{signature}: {len(durations)}x, total {sum(durations):.0f} ms, "
+                f"mean {sum(durations) / len(durations):.1f} ms, max {max(durations):.1f} ms"
+            ))
+            self.stdout.write(f"  {group['sql'][:400]}")
+            self.stdout.write(f"  view:  {group['views'].most_common(1)[0][0]}")
+            self.stdout.write(f"  frame: {group['frames'].most_common(1)[0][0]}")
+            if options["plans"] and "plan" in group:
+                self.stdout.write("  plan:  " + json.dumps(group["plan"], indent=2).replace("\n", "\n         "))
@@ -0,0 +1,72 @@
+import json
+from collections import Counter, defaultdict
+
+from django.core.management.base import BaseCommand, CommandError
+
+from student_record.tracing import trace_file_path
+
+
+def read_spans(line):
+    export = json.loads(line)
+    for resource in export["resourceSpans"]:
+        for scope in resource["scopeSpans"]:
+            for span in scope["spans"]:
+                attributes = {item["key"]: next(iter(item["value"].values())) for item in span["attributes"]}
+                yield {
+                    "id": span["spanId"],
+                    "parent": span.get("parentSpanId"),
+                    "name": span["name"],
+                    "layer": attributes.get("student_record.layer", "internal"),
+                    "duration_ms": (int(span["endTimeUnixNano"]) - int(span["startTimeUnixNano"])) / 1e6,
+                }
+
+
+def self_times(spans):
+    """Each span's duration minus the time spent in its direct children."""
+    children = defaultdict(float)
+    for span in spans:
+        if span["parent"]:
+            children[span["parent"]] += span["duration_ms"]
+    return {span["id"]: max(span["duration_ms"] - children[span["id"]], 0.0) for span in spans}
+
+
+class Command(BaseCommand):
+    help = "Break traced requests down by layer (view, form, serializer, template, sql) per route."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--path", help="Trace file to read (default: TRACING_FILE).")
+        parser.add_argument("--top", type=int, default=5, help="Slowest spans shown per route.")
+
+    def handle(self, *args, **options):
+        path = options["path"] or trace_file_path()
+        try:
+            with open(path) as source:
+                traces = [list(read_spans(line)) for line in source if line.strip()]
+        except FileNotFoundError:
+            raise CommandError(f"{path} does not exist; no requests were traced yet.")
+
+        routes = defaultdict(lambda: {"count": 0, "total": 0.0, "layers": Counter(), "spans": Counter()})
+        for spans in traces:
+            root = next((span for span in spans if not span["parent"]), None)
+            if root is None:
+                continue
+            route = routes[root["name"]]
+            route["count"] += 1
+            route["total"] += root["duration_ms"]
+            own_times = self_times(spans)
+            for span in spans:
+                route["layers"][span["layer"]] += own_times[span["id"]]
+                if span is not root:
+                    route["spans"][(span["layer"], span["name"])] += span["duration_ms"]
+
+        for name, route in sorted(routes.items(), key=lambda item: -item[1]["total"]):
+            count = route["count"]
+            self.stdout.write(self.style.MIGRATE_HEADING(
+                f"{name}: {count} traces, mean {route['total'] / count:.1f} ms"
+            ))
+            for layer in sorted(route["layers"], key=lambda layer: -route["layers"][layer]):
+                own = route["layers"][layer]
+                share = own / route["total"] * 100 if route["total"] else 0
+                self.stdout.write(f"  {layer:<11} {own / count:8.1f} ms  {share:5.1f}%")
+            for (layer, span_name), total in route["spans"].most_common(options["top"]):
+                self.stdout.write(f"    {total / count:8.1f} ms  {layer:<11} {span_name[:100]}")
@@ -0,0 +1,187 @@
+import functools
+import json
+import logging
+import os
+import threading
+import tracemalloc
+from collections import defaultdict
+from contextvars import ContextVar
+from pathlib import Path
+
+from django.conf import settings
+from django.utils import timezone
+
+from .metrics import registry
+
+logger = logging.getLogger("student_record.memory")
+
+_probe = ContextVar("memory_probe", default=None)
+# tracemalloc is process-wide, so only one request is measured at a time.
+measuring = threading.Lock()
+_write_lock = threading.Lock()
+_INSTRUMENTATION = ("memory.py", "middleware.py", "tracing.py")
+
+
+def memory_log_path():
+    return Path(getattr(settings, "MEMORY_LOG", Path(settings.BASE_DIR) / "memory.ndjson"))
+
+
+def budget_for(view):
+    """Budget in bytes for the dotted view path ``view``: ``MEMORY_BUDGETS`` or ``MEMORY_BUDGET_MB``."""
+    megabytes = getattr(settings, "MEMORY_BUDGETS", {}).get(view, getattr(settings, "MEMORY_BUDGET_MB", 64))
+    return None if megabytes is None else int(megabytes * 1024 * 1024)
+
+
+def _frame_label(frame):
+    filename = frame.filename
+    if "site-packages" in filename:
+        filename = filename.split("site-packages", 1)[1].lstrip(os.sep)
+    elif filename.startswith(str(settings.BASE_DIR)):
+        filename = os.path.relpath(filename, settings.BASE_DIR)
+    return f"{filename}:{frame.lineno}"
+
+
+def allocation_sites(snapshot, limit):
+    """
+    The ``limit`` largest live allocation sites of ``snapshot``, each keyed by the innermost
+    project frame that led to it and the frame that actually allocated.
+    """
+    snapshot = snapshot.filter_traces([
+        tracemalloc.Filter(False, tracemalloc.__file__),
+        tracemalloc.Filter(False, __file__),
+        tracemalloc.Filter(False, "<frozen importlib._bootstrap*>"),
+    ])
+    base_dir = str(settings.BASE_DIR)
+    sites = defaultdict(lambda: [0, 0])
+    for statistic in snapshot.statistics("traceback"):
+        frames = list(reversed(statistic.traceback))
+        project = next((
+            frame for frame in frames
+            if frame.filename.startswith(base_dir) and "site-packages" not in frame.filename
+            and not frame.filename.endswith(_INSTRUMENTATION)
+        ), None)
+        key = (_frame_label(project) if project else None, _frame_label(frames[0]))
+        sites[key][0] += statistic.size
+        sites[key][1] += statistic.count
+
+    ranked = sorted(sites.items(), key=lambda item: -item[1][0])[:limit]
+    return [
+        {"site": site, "allocated_in": allocated_in, "size_bytes": size, "blocks": count}
+        for (site, allocated_in), (size, count) in ranked
+    ]
+
+
+class MemoryProbe:
+    """Peak traced memory of one request and of each top-level template render in it."""
+
+    def __init__(self):
+        self.view = None
+        self.budget = budget_for(None)
+        self.peak = 0
+        self.templates = []
+        self.sites = None
+        self.rendering = False
+
+    def checkpoint(self):
+        """Fold the peak since the last ``reset_peak`` into ``self.peak``; return current usage."""
+        current, peak = tracemalloc.get_traced_memory()
+        self.peak = max(self.peak, peak)
+        return current
+
+    @property
+    def over_budget(self):
+        return self.budget is not None and self.peak > self.budget
+
+    def capture_sites(self):
+        # Taken while the offending objects are still alive: after the render that crossed
+        # the budget, or at the end of the request.
+        if self.sites is None:
+            self.sites = allocation_sites(tracemalloc.take_snapshot(), getattr(settings, "MEMORY_TOP_SITES", 10))
+
+
+def start_probe():
+    tracemalloc.start(getattr(settings, "MEMORY_TRACE_FRAMES", 25))
+    probe = MemoryProbe()
+    return probe, _probe.set(probe)
+
+
+def finish_probe(probe, token):
+    try:
+        probe.checkpoint()
+        if probe.over_budget:
+            probe.capture_sites()
+    finally:
+        _probe.reset(token)
+        tracemalloc.stop()
+
+
+def current_probe():
+    return _probe.get()
+
+
+def record(probe, request, response, route):
+    """Export ``probe`` to the metrics registry and ``MEMORY_LOG``, warning when over budget."""
+    labels = {"route": route}
+    registry.observe("student_record_request_peak_memory_bytes", labels, probe.peak)
+    if probe.over_budget:
+        registry.inc("student_record_memory_budget_exceeded_total", labels)
+
+    entry = {
+        "at": timezone.now().isoformat(),
+        "method": request.method,
+        "path": request.get_full_path(),
+        "route": route,
+        "view": probe.view,
+        "status": response.status_code,
+        "peak_bytes": probe.peak,
+        "budget_bytes": probe.budget,
+        "over_budget": probe.over_budget,
+        "templates": probe.templates,
+        "sites": probe.sites,
+    }
+    if probe.over_budget:
+        top = probe.sites[0] if probe.sites else {}
+        logger.warning(
+            "%s peaked at %.1f MiB, over its %.1f MiB budget; largest site %s (%s)",
+            probe.view or route, probe.peak / 2 ** 20, probe.budget / 2 ** 20, top.get("site"), top.get("allocated_in"),
+        )
+    path = memory_log_path()
+    with _write_lock:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with open(path, "a") as target:
+            target.write(json.dumps(entry) + "\n")
+
+
+def _measured_render(render):
+    @functools.wraps(render)
+    def wrapper(template, *args, **kwargs):
+        probe = _probe.get()
+        if probe is None or probe.rendering:
+            return render(template, *args, **kwargs)
+
+        before = probe.checkpoint()
+        tracemalloc.reset_peak()
+        probe.rendering = True
+        try:
+            result = render(template, *args, **kwargs)
+        finally:
+            probe.rendering = False
+        _, peak = tracemalloc.get_traced_memory()
+        probe.peak = max(probe.peak, peak)
+        probe.templates.append({
+            "template": template.origin.template_name or template.name or "<string>", "peak_bytes": peak - before,
+        })
+        if probe.over_budget:
+            probe.capture_sites()
+        return result
+
+    wrapper.memory_probed = True
+    return wrapper
+
+
+def instrument():
+    """Measure top-level template renders of measured requests. Idempotent."""
+    from django.template.base import Template
+
+    if not getattr(Template.render, "memory_probed", False):
+        Template.render = _measured_render(Template.render)
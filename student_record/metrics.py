@@ -0,0 +1,134 @@
+import hashlib
+import re
+import threading
+from bisect import bisect_left
+from collections import defaultdict
+
+from django.conf import settings
+from django.http import HttpResponse, HttpResponseForbidden
+from django.utils.crypto import constant_time_compare
+
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100, 200, 500)
+MEMORY_BUCKETS = tuple(megabytes * 2 ** 20 for megabytes in (1, 2, 4, 8, 16, 32, 64, 128, 256, 512))
+
+METRICS = {
+    "student_record_requests_total": ("counter", "HTTP requests by route, method and status."),
+    "student_record_request_duration_seconds": ("histogram", "Request latency by route.", DURATION_BUCKETS),
+    "student_record_request_queries": ("histogram", "SQL queries issued per request by route.", QUERY_BUCKETS),
+    "student_record_sql_duration_seconds_total": ("counter", "Time spent executing SQL by route."),
+    "student_record_duplicate_queries_total": (
+        "counter", "Queries repeating a statement already issued by the same request, by route.",
+    ),
+    "student_record_repeated_statements_total": (
+        "counter", "Requests that ran one statement at least SQL_METRICS_DUPLICATE_THRESHOLD times "
+                   "(likely N+1), by route and statement signature.",
+    ),
+    "student_record_request_peak_memory_bytes": (
+        "histogram", "Peak traced memory of memory-measured requests by route.", MEMORY_BUCKETS,
+    ),
+    "student_record_memory_budget_exceeded_total": (
+        "counter", "Memory-measured requests that went over their MEMORY_BUDGET_MB, by route.",
+    ),
+}
+
+_IN_LIST = re.compile(r"\((?:%s, )*%s\)")
+
+
+def statement_signature(sql):
+    """
+    Collapse ``IN (%s, %s, ...)`` lists so the same statement shape shares one signature,
+    and return ``(short hash, normalized sql)``.
+    """
+    normalized = _IN_LIST.sub("(...)", sql)
+    return hashlib.blake2b(normalized.encode(), digest_size=6).hexdigest(), normalized
+
+
+class MetricsRegistry:
+    """
+    Process-local counters and histograms rendered in the Prometheus text format.
+
+    Each worker process keeps its own registry, so scrape every worker (or run one worker
+    per scrape target) for complete numbers.
+    """
+
+    def __init__(self, metrics=METRICS):
+        self.metrics = metrics
+        self._lock = threading.Lock()
+        self._counters = defaultdict(float)
+        self._histograms = {}
+
+    def inc(self, name, labels, value=1):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self._counters[key] += value
+
+    def observe(self, name, labels, value):
+        buckets = self.metrics[name][2]
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            counts = self._histograms.setdefault(key, [0] * (len(buckets) + 1) + [0.0])
+            counts[bisect_left(buckets, value)] += 1
+            counts[-1] += value
+
+    def clear(self):
+        with self._lock:
+            self._counters.clear()
+            self._histograms.clear()
+
+    def render(self):
+        with self._lock:
+            counters = dict(self._counters)
+            histograms = {key: list(counts) for key, counts in self._histograms.items()}
+
+        lines = []
+        for name, (kind, help_text, *rest) in self.metrics.items():
+            lines += [f"# HELP {name} {help_text}", f"# TYPE {name} {kind}"]
+            if kind == "counter":
+                for (metric, labels), value in sorted(counters.items()):
+                    if metric == name:
+                        lines.append(f"{name}{_labels(labels)} {_number(value)}")
+                continue
+
+            buckets = rest[0]
+            for (metric, labels), counts in sorted(histograms.items()):
+                if metric != name:
+                    continue
+                cumulative = 0
+                for bound, count in zip(buckets + ("+Inf",), counts):
+                    cumulative += count
+                    lines.append(f"{name}_bucket{_labels(labels + (('le', _number(bound)),))} {cumulative}")
+                lines.append(f"{name}_sum{_labels(labels)} {_number(counts[-1])}")
+                lines.append(f"{name}_count{_labels(labels)} {cumulative}")
+        return "\n".join(lines) + "\n"
+
+
+def _labels(labels):
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{key}="{_escape(value)}"' for key, value in labels) + "}"
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _number(value):
+    if isinstance(value, str):
+        return value
+    return str(int(value)) if float(value).is_integer() else repr(value)
+
+
+registry = MetricsRegistry()
+
+
+def metrics_view(request):
+    """
+    Serve ``registry`` to Prometheus presenting ``Bearer <METRICS_TOKEN>``, or to logged-in
+    admins. Without a token configured, only admins can read it.
+    """
+    token = getattr(settings, "METRICS_TOKEN", None)
+    scraper = bool(token) and constant_time_compare(request.headers.get("Authorization", ""), f"Bearer {token}")
+    if not scraper and not request.principal.is_admin:
+        return HttpResponseForbidden()
+    return HttpResponse(registry.render(), content_type="text/plain; version=0.0.4; charset=utf-8")
@@ -0,0 +1,340 @@
+import json
+import logging
+import random
+import threading
+import time
+import tracemalloc
+from collections import Counter
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.db import connections
+from django.utils.functional import SimpleLazyObject
+
+from .memory import budget_for, current_probe, finish_probe, measuring, record, start_probe
+from .metrics import registry, statement_signature
+from .profiling import StackSampler, store_profile
+from .slow_queries import current_view
+from .tracing import export, span, start_trace, trace_sql
+
+request_logger = logging.getLogger("student_record.requests")
+memory_logger = logging.getLogger("student_record.memory")
+
+SESSION_KEY = "_principal"
+
+
+class Principal:
+    """The current user's role and the ids of their ``Student`` and ``Teacher`` rows."""
+
+    def __init__(self, role=None, student_id=None, teacher_id=None, is_superuser=False):
+        self.role = role
+        self.student_id = student_id
+        self.teacher_id = teacher_id
+        self.is_superuser = is_superuser
+
+    @property
+    def is_admin(self):
+        return self.is_superuser or self.role == 'admin'
+
+    def as_dict(self):
+        return {'role': self.role, 'student_id': self.student_id, 'teacher_id': self.teacher_id}
+
+    def __repr__(self):
+        return f"<Principal role={self.role} student={self.student_id} teacher={self.teacher_id}>"
+
+
+def resolve_principal(request):
+    """
+    Look up the role, student id and teacher id of ``request.user`` in one query.
+
+    With ``PRINCIPAL_SESSION_TTL`` set, the result is also kept in the session for that many
+    seconds, so role changes reach already logged-in users within the TTL.
+    """
+    user = request.user
+    if not user.is_authenticated:
+        return Principal()
+
+    ttl = getattr(settings, 'PRINCIPAL_SESSION_TTL', 0)
+    session = getattr(request, 'session', None)
+    if ttl and session is not None:
+        cached = session.get(SESSION_KEY)
+        if cached and cached['user_id'] == user.pk and cached['expires'] > time.time():
+            return Principal(cached['role'], cached['student_id'], cached['teacher_id'], user.is_superuser)
+
+    role, student_id, teacher_id = (
+        User.objects.filter(pk=user.pk)
+        .values_list('profile__role', 'student__id', 'teacher_profile__id')
+        .first()
+    ) or (None, None, None)
+    principal = Principal(role, student_id, teacher_id, user.is_superuser)
+
+    if ttl and session is not None:
+        session[SESSION_KEY] = {'user_id': user.pk, 'expires': time.time() + ttl, **principal.as_dict()}
+    return principal
+
+
+class PrincipalMiddleware:
+    """Attach ``request.principal``, resolved on first use and at most once per request."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        request.principal = SimpleLazyObject(lambda: resolve_principal(request))
+        return self.get_response(request)
+
+
+class QueryRecorder:
+    """``execute_wrapper`` that counts and times every statement run through it."""
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+        self.statements = Counter()
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.duration += time.perf_counter() - started
+            self.count += 1
+            self.statements[sql] += 1
+
+    def repeated(self):
+        """``{signature: (count, normalized sql)}`` for statement shapes run more than once."""
+        shapes = {}
+        for sql, count in self.statements.items():
+            signature, normalized = statement_signature(sql)
+            total = shapes.get(signature, (0, normalized))[0] + count
+            shapes[signature] = (total, normalized)
+        return {signature: shape for signature, shape in shapes.items() if shape[0] > 1}
+
+
+class QueryMetricsMiddleware:
+    """
+    Record latency, SQL query count and time, and repeated statements per URL route into
+    ``metrics.registry`` (served at ``/metrics``), optionally logging one JSON line per request.
+
+    Statements that run ``SQL_METRICS_DUPLICATE_THRESHOLD`` times in one request are counted
+    by signature as likely N+1 queries. Queries issued while a streaming response is consumed
+    happen after the middleware returns and are not counted.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.threshold = getattr(settings, "SQL_METRICS_DUPLICATE_THRESHOLD", 5)
+        self.log = getattr(settings, "SQL_METRICS_LOG", False)
+
+    def __call__(self, request):
+        recorder = QueryRecorder()
+        started = time.perf_counter()
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(recorder))
+            response = self.get_response(request)
+        duration = time.perf_counter() - started
+
+        match = request.resolver_match
+        route = match.route if match is not None else "<unmatched>"
+        repeated = recorder.repeated()
+        duplicates = sum(count - 1 for count, _ in repeated.values())
+        suspects = {signature: shape for signature, shape in repeated.items() if shape[0] >= self.threshold}
+
+        labels = {"route": route}
+        registry.inc("student_record_requests_total", {**labels, "method": request.method, "status": response.status_code})
+        registry.observe("student_record_request_duration_seconds", labels, duration)
+        registry.observe("student_record_request_queries", labels, recorder.count)
+        registry.inc("student_record_sql_duration_seconds_total", labels, recorder.duration)
+        if duplicates:
+            registry.inc("student_record_duplicate_queries_total", labels, duplicates)
+        for signature in suspects:
+            registry.inc("student_record_repeated_statements_total", {**labels, "signature": signature})
+
+        if self.log:
+            request_logger.info(json.dumps({
+                "route": route,
+                "method": request.method,
+                "status": response.status_code,
+                "duration_ms": round(duration * 1000, 2),
+                "queries": recorder.count,
+                "sql_ms": round(recorder.duration * 1000, 2),
+                "duplicates": duplicates,
+                "repeated": [
+                    {"signature": signature, "count": count, "sql": sql[:300]}
+                    for signature, (count, sql) in sorted(suspects.items(), key=lambda item: -item[1][0])
+                ],
+            }))
+        return response
+
+
+class ProfilingMiddleware:
+    """
+    Capture a sampled stack profile of requests that admins flag with an ``X-Profile: 1``
+    header, and of a random ``PROFILER_SAMPLE_RATE`` share of all requests.
+
+    Profiles land in ``PROFILER_DIR`` as folded stacks, listed slowest-first at
+    ``/students/profiles/``; the response names its profile in ``X-Profile-Id``.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.rate = getattr(settings, "PROFILER_SAMPLE_RATE", 0.0)
+        self.interval = getattr(settings, "PROFILER_INTERVAL", 0.005)
+
+    def __call__(self, request):
+        if not self.should_profile(request):
+            return self.get_response(request)
+
+        sampler = StackSampler(threading.get_ident(), self.interval)
+        started = time.perf_counter()
+        sampler.start()
+        try:
+            response = self.get_response(request)
+        finally:
+            sampler.stop()
+        duration = time.perf_counter() - started
+
+        match = request.resolver_match
+        response["X-Profile-Id"] = store_profile(
+            sampler.stacks,
+            method=request.method,
+            path=request.get_full_path(),
+            route=match.route if match is not None else "<unmatched>",
+            status=response.status_code,
+            duration_ms=round(duration * 1000, 2),
+        )
+        return response
+
+    def should_profile(self, request):
+        if request.headers.get("X-Profile") == "1" and request.principal.is_admin:
+            return True
+        return self.rate > 0 and random.random() < self.rate
+
+
+class SlowQueryMiddleware:
+    """Tell the slow-query log which request and view issued each statement."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        token = current_view.set(f"{request.method} {request.path}")
+        try:
+            return self.get_response(request)
+        finally:
+            current_view.reset(token)
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        view = getattr(view_func, "cls", view_func)
+        current_view.set(f"{request.method} {request.path} {view.__module__}.{view.__qualname__}")
+
+
+class MemoryBudgetMiddleware:
+    """
+    Measure peak traced memory of requests that admins flag with ``X-Memory-Profile: 1``,
+    and of a random ``MEMORY_SAMPLE_RATE`` share of all requests, overall and per top-level
+    template render.
+
+    Requests over their budget (``MEMORY_BUDGETS`` per view, else ``MEMORY_BUDGET_MB``) are
+    logged on ``student_record.memory`` with their largest allocation sites. Every measurement
+    goes to ``MEMORY_LOG`` (see ``memory_report``) and the response carries ``X-Memory-Peak``.
+
+    tracemalloc slows the measured request several times over and sees every thread, so
+    one request is measured at a time and others running alongside add to its numbers.
+    While something else runs tracemalloc, measuring would reset its peak, so requests are
+    not measured then; this is logged once.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.rate = getattr(settings, "MEMORY_SAMPLE_RATE", 0.0)
+        self.warned = False
+
+    def __call__(self, request):
+        if not self.should_measure(request) or not measuring.acquire(blocking=False):
+            return self.get_response(request)
+        try:
+            if tracemalloc.is_tracing():
+                if not self.warned:
+                    self.warned = True
+                    memory_logger.warning(
+                        "tracemalloc was started outside MemoryBudgetMiddleware; "
+                        "request memory is not measured while it runs."
+                    )
+                return self.get_response(request)
+            probe, token = start_probe()
+            try:
+                response = self.get_response(request)
+            finally:
+                finish_probe(probe, token)
+        finally:
+            measuring.release()
+
+        match = request.resolver_match
+        record(probe, request, response, match.route if match is not None else "<unmatched>")
+        response["X-Memory-Peak"] = str(probe.peak)
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        probe = current_probe()
+        if probe is not None:
+            view = getattr(view_func, "cls", view_func)
+            probe.view = f"{view.__module__}.{view.__qualname__}"
+            probe.budget = budget_for(probe.view)
+
+    def should_measure(self, request):
+        if request.headers.get("X-Memory-Profile") == "1" and request.principal.is_admin:
+            return True
+        return self.rate > 0 and random.random() < self.rate
+
+
+class TracingMiddleware:
+    """
+    Trace requests that admins flag with an ``X-Trace: 1`` header, and a random
+    ``TRACING_SAMPLE_RATE`` share of all requests, into nested spans for the view, form
+    construction, serializers, template rendering and every SQL statement.
+
+    Traces are appended to ``TRACING_FILE`` as OTLP/JSON lines (see ``trace_report``);
+    the response names its trace in ``X-Trace-Id``. Keep this middleware last so the
+    ``view`` span starts right before the view runs.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.rate = getattr(settings, "TRACING_SAMPLE_RATE", 0.0)
+
+    def __call__(self, request):
+        if not self.should_trace(request):
+            return self.get_response(request)
+
+        with start_trace(f"{request.method} {request.path}", **{
+            "http.method": request.method, "http.target": request.get_full_path(),
+        }) as trace:
+            with ExitStack() as stack:
+                for connection in connections.all():
+                    stack.enter_context(connection.execute_wrapper(trace_sql))
+                request._trace_view = stack
+                response = self.get_response(request)
+
+        root = trace.spans[0]
+        match = request.resolver_match
+        if match is not None:
+            root.name = f"{request.method} {match.route}"
+            root.attributes["http.route"] = match.route
+        root.attributes["http.status_code"] = response.status_code
+        export(trace)
+        response["X-Trace-Id"] = trace.trace_id
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        stack = getattr(request, "_trace_view", None)
+        if stack is not None:
+            view = getattr(view_func, "cls", view_func)
+            stack.enter_context(span(f"{view.__module__}.{view.__qualname__}", "view"))
+
+    def should_trace(self, request):
+        if request.headers.get("X-Trace") == "1" and request.principal.is_admin:
+            return True
+        return self.rate > 0 and random.random() < self.rate
@@ -0,0 +1,66 @@
+from django.db import migrations
+
+TRIGRAM_INDEXES = [
+    ('student_record_student', 'name'),
+    ('student_record_student', 'email'),
+    ('student_record_student', 'roll_number'),
+    ('student_record_student', 'phone_number'),
+    ('student_record_teacher', 'name'),
+    ('student_record_teacher', 'email'),
+    ('student_record_teacher', 'teacher_code'),
+    ('student_record_teacher', 'specialization'),
+    ('student_record_course', 'title'),
+    ('student_record_course', 'course_code'),
+    ('student_record_batch', 'batch_code'),
+    ('student_record_enrollment', 'roll_number'),
+]
+
+SEARCH_VECTORS = {
+    'student_record_student': ['name', 'email', 'roll_number', 'phone_number'],
+    'student_record_teacher': ['name', 'email', 'teacher_code', 'specialization'],
+    'student_record_course': ['title', 'course_code', 'description'],
+}
+
+
+def create_search_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+
+    schema_editor.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    # Django compiles icontains to UPPER(col::text) LIKE UPPER(%s), so index that expression.
+    for table, column in TRIGRAM_INDEXES:
+        schema_editor.execute(
+            f"CREATE INDEX IF NOT EXISTS {table}_{column}_trgm "
+            f"ON {table} USING gin ((UPPER({column}::text)) gin_trgm_ops)"
+        )
+    for table, columns in SEARCH_VECTORS.items():
+        document = " || ' ' || ".join(f"coalesce({column}, '')" for column in columns)
+        schema_editor.execute(
+            f"ALTER TABLE {table} ADD COLUMN IF NOT EXISTS search_vector tsvector "
+            f"GENERATED ALWAYS AS (to_tsvector('simple'::regconfig, {document})) STORED"
+        )
+        schema_editor.execute(
+            f"CREATE INDEX IF NOT EXISTS {table}_search_vector ON {table} USING gin (search_vector)"
+        )
+
+
+def drop_search_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+
+    for table in SEARCH_VECTORS:
+        schema_editor.execute(f"DROP INDEX IF EXISTS {table}_search_vector")
+        schema_editor.execute(f"ALTER TABLE {table} DROP COLUMN IF EXISTS search_vector")
+    for table, column in TRIGRAM_INDEXES:
+        schema_editor.execute(f"DROP INDEX IF EXISTS {table}_{column}_trgm")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('student_record', '0009_codesequence'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_indexes, drop_search_indexes),
+    ]
@@ -0,0 +1,68 @@
+# Generated by Django 5.2.18 on 2026-10-19 06:59
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def count_enrollments(apps, schema_editor):
+    Batch = apps.get_model('student_record', 'Batch')
+    Student = apps.get_model('student_record', 'Student')
+    Enrollment = apps.get_model('student_record', 'Enrollment')
+
+    for model, field, counter in ((Batch, 'batch', 'enrolled_count'), (Student, 'student', 'course_count')):
+        counts = (
+            Enrollment.objects.filter(**{field: OuterRef('pk')})
+            .order_by().values(field).annotate(count=Count('pk')).values('count')
+        )
+        model.objects.update(**{counter: Coalesce(Subquery(counts), 0)})
+
+
+def check_enrollment_limits(apps, schema_editor):
+    # Rows that already break a limit would make AddConstraint fail with a bare IntegrityError,
+    # and clamping their counters would let them drift from the real rows. Stop with a list of
+    # what to fix instead.
+    Enrollment = apps.get_model('student_record', 'Enrollment')
+    problems = []
+    for field, label, limit in (('batch', 'Batch', 10), ('student', 'Student', 3)):
+        over = (
+            Enrollment.objects.order_by().values(field).annotate(count=Count('pk'))
+            .filter(count__gt=limit).values_list(field, 'count')
+        )
+        problems += [f"{label} {pk} has {count} enrollments (limit {limit})" for pk, count in over]
+    if problems:
+        raise ValueError(
+            "Remove enrollments over the limits before migrating: " + "; ".join(problems) + "."
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('student_record', '0011_sync_timestamps_tombstone'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='batch',
+            name='enrolled_count',
+            field=models.PositiveSmallIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='student',
+            name='course_count',
+            field=models.PositiveSmallIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(count_enrollments, migrations.RunPython.noop),
+        migrations.RunPython(check_enrollment_limits, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='batch',
+            constraint=models.CheckConstraint(condition=models.Q(('enrolled_count__lte', 10)), name='batch_seat_limit'),
+        ),
+        migrations.AddConstraint(
+            model_name='student',
+            constraint=models.CheckConstraint(condition=models.Q(('course_count__lte', 3)), name='student_course_limit'),
+        ),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 5.2.18 on 2026-10-19 07:26
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('student_record', '0012_enrollment_counters'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='enrollment',
+            index=models.Index(fields=['enrolled_on'], name='student_rec_enrolle_a4f0ab_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='enrollment',
+            index=models.Index(fields=['batch', 'roll_number'], name='student_rec_batch_i_9521b3_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='installment',
+            index=models.Index(fields=['status', 'due_date'], name='student_rec_status_3aed20_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='installment',
+            index=models.Index(fields=['paid_date'], name='student_rec_paid_da_16bf2a_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='lesson',
+            index=models.Index(fields=['batch', 'created_at'], name='student_rec_batch_i_9e2b74_idx'),
+        ),
+    ]
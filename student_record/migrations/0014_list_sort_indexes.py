@@ -0,0 +1,43 @@
+# Generated by Django 5.2.18 on 2026-10-19 07:41
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('student_record', '0013_query_indexes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='enrollment',
+            name='student_rec_enrolle_a4f0ab_idx',
+        ),
+        migrations.AddIndex(
+            model_name='batch',
+            index=models.Index(fields=['start_date', 'id'], name='student_rec_start_d_509471_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='course',
+            index=models.Index(fields=['title', 'id'], name='student_rec_title_3687f1_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='enrollment',
+            index=models.Index(fields=['enrolled_on', 'id'], name='student_rec_enrolle_d8a868_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='lesson',
+            index=models.Index(fields=['created_at', 'id'], name='student_rec_created_5c61b8_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='student',
+            index=models.Index(fields=['name', 'id'], name='student_rec_name_0077f1_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='teacher',
+            index=models.Index(fields=['name', 'id'], name='student_rec_name_466166_idx'),
+        ),
+    ]
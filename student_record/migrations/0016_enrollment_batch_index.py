@@ -0,0 +1,17 @@
+# Generated by Django 5.2.18 on 2026-10-19 08:30
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('student_record', '0015_cache_version'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='enrollment',
+            index=models.Index(fields=['batch', 'id'], name='student_rec_batch_i_5ef686_idx'),
+        ),
+    ]
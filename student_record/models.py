@@ -1,7 +1,27 @@
-from django.db import models
+from collections import Counter, defaultdict
+
+from django.db import models, transaction
+from django.db.models import Case, F, Q, Value, When
 from django.contrib.auth.models import User
 from django.core.exceptions import ValidationError
 from dateutil.relativedelta import relativedelta
+from .sequences import reserve_block, seed_from_codes
+
+MAX_COURSES_PER_STUDENT = 3
+BATCH_CAPACITY = 10
+
+
+def adjust_counters(model, field, deltas):
+    """Add ``deltas[pk]`` to ``field`` of each row in one UPDATE."""
+    deltas = {pk: delta for pk, delta in deltas.items() if delta}
+    if deltas:
+        model.objects.filter(pk__in=deltas).update(**{
+            field: F(field) + Case(
+                *(When(pk=pk, then=Value(delta)) for pk, delta in deltas.items()),
+                default=Value(0),
+                output_field=models.IntegerField(),
+            )
+        })
 
 
 class Student(models.Model):
@@ -12,12 +32,28 @@ class Student(models.Model):
     phone_number = models.CharField(max_length=15, blank=True, null=True)
     date_of_birth = models.DateField(blank=True, null=True)
     roll_number = models.CharField(max_length=10, unique=True, blank=True, editable=False)
+    course_count = models.PositiveSmallIntegerField(default=0, editable=False)
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)
+
+    class Meta:
+        constraints = [
+            models.CheckConstraint(
+                condition=Q(course_count__lte=MAX_COURSES_PER_STUDENT), name='student_course_limit'
+            ),
+        ]
+        indexes = [models.Index(fields=['name', 'id'])]
+
+    @classmethod
+    def allocate_roll_numbers(cls, students):
+        pending = [student for student in students if not student.roll_number]
+        if pending:
+            seed = seed_from_codes(cls.objects.all(), 'roll_number')
+            for student, number in zip(pending, reserve_block('student', len(pending), seed=seed)):
+                student.roll_number = f"STU-{number:02d}"
 
     def save(self, *args, **kwargs):
         if not self.roll_number:
-            last_student = Student.objects.order_by('id').last()
-            number = 1 if not last_student else last_student.id + 1
-            self.roll_number = f"STU-{number:02d}"
+            Student.allocate_roll_numbers([self])
         super().save(*args, **kwargs)
 
     def __str__(self):
@@ -33,12 +69,22 @@ class Course(models.Model):
         default='beginner'
     )
     course_code = models.CharField(max_length=10, unique=True, blank=True)
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)
+
+    class Meta:
+        indexes = [models.Index(fields=['title', 'id'])]
+
+    @classmethod
+    def allocate_course_codes(cls, courses):
+        pending = [course for course in courses if not course.course_code]
+        if pending:
+            seed = seed_from_codes(cls.objects.all(), 'course_code')
+            for course, number in zip(pending, reserve_block('course', len(pending), seed=seed)):
+                course.course_code = f"CRS-{number:02d}"
 
     def save(self, *args, **kwargs):
         if not self.course_code:
-            last_course = Course.objects.order_by('id').last()
-            number = 1 if not last_course else last_course.id + 1
-            self.course_code = f"CRS-{number:02d}"
+            Course.allocate_course_codes([self])
         super().save(*args, **kwargs)
 
     def __str__(self):
@@ -52,10 +98,16 @@ class Batch(models.Model):
     end_date = models.DateField()
     fee = models.PositiveBigIntegerField()
     batch_code = models.CharField(max_length=20, unique=True, blank=True, editable=False)
+    enrolled_count = models.PositiveSmallIntegerField(default=0, editable=False)
     created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)
 
     class Meta:
         unique_together = ("course", "number")
+        constraints = [
+            models.CheckConstraint(condition=Q(enrolled_count__lte=BATCH_CAPACITY), name='batch_seat_limit'),
+        ]
+        indexes = [models.Index(fields=['start_date', 'id'])]
 
     def clean(self):
         if self.course.batches.exclude(pk=self.pk).count() >= 3:
@@ -77,6 +129,8 @@ class Enrollment(models.Model):
         ('installment', 'Installment'),
         ('custom', 'Custom'),
     ]
+    MAX_COURSES_PER_STUDENT = MAX_COURSES_PER_STUDENT
+    BATCH_CAPACITY = BATCH_CAPACITY
 
     student = models.ForeignKey('Student', on_delete=models.CASCADE, related_name='enrollments')
     batch = models.ForeignKey('Batch', on_delete=models.CASCADE, related_name='enrollments')
@@ -90,61 +144,160 @@ class Enrollment(models.Model):
     fee_at_enrollment = models.PositiveBigIntegerField(blank=True, null=True)
     paid_amount = models.PositiveBigIntegerField(default=0)  # for one-time/custom
     roll_number = models.CharField(max_length=20, blank=True, editable=False, unique=True)
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)
 
     class Meta:
         unique_together = ('student', 'batch')
+        indexes = [
+            models.Index(fields=['enrolled_on', 'id']),
+            models.Index(fields=['batch', 'roll_number']),
+            models.Index(fields=['batch', 'id']),
+        ]
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        if 'student_id' in instance.__dict__ and 'batch_id' in instance.__dict__:
+            instance._placement = (instance.student_id, instance.batch_id)
+        return instance
+
+    def stored_placement(self):
+        """``(student_id, batch_id)`` as last saved, read back if they were deferred; ``None`` if unsaved."""
+        if not hasattr(self, '_placement'):
+            if self.pk is None:
+                return None
+            placement = Enrollment.objects.filter(pk=self.pk).values_list('student_id', 'batch_id').first()
+            if placement is None:
+                return None
+            self._placement = placement
+        return self._placement
 
     def clean(self):
-        if self.student:
-            enrolled_courses = Enrollment.objects.filter(student=self.student).exclude(pk=self.pk).values_list(
-                "batch__course", flat=True
-            ).distinct()
-            if len(enrolled_courses) >= 3:
-                raise ValidationError(f"{self.student.name} is already enrolled in 3 courses.")
-
+        # Early, friendly errors for forms; reserve_places() is what actually enforces the limits.
+        if self.student_id and self.batch_id:
+            placement = (None if self._state.adding else self.stored_placement()) or (None, None)
             if Enrollment.objects.filter(student=self.student, batch__course=self.batch.course).exclude(pk=self.pk).exists():
                 raise ValidationError(f"{self.student.name} is already enrolled in {self.batch.course.title}.")
 
-            if self.batch.enrollments.exclude(pk=self.pk).count() >= 10:
+            if self.student_id != placement[0] and self.student.course_count >= self.MAX_COURSES_PER_STUDENT:
+                raise ValidationError(
+                    f"{self.student.name} is already enrolled in {self.MAX_COURSES_PER_STUDENT} courses."
+                )
+
+            if self.batch_id != placement[1] and self.batch.enrolled_count >= self.BATCH_CAPACITY:
                 raise ValidationError(f"Batch {self.batch.number} of {self.batch.course.title} is already full.")
 
+    @classmethod
+    def reserve_places(cls, enrollments):
+        """
+        Take a batch seat and a course slot for each new enrollment, inside the caller's transaction.
+
+        The student and batch rows are locked in primary-key order before their counters are
+        read, so concurrent enrollments queue instead of overbooking; the counters' check
+        constraints back this up. Returns ``{index: message}`` for enrollments that break a
+        limit, in which case no counter is changed.
+        """
+        enrollments = list(enrollments)
+        student_ids = sorted({enrollment.student_id for enrollment in enrollments})
+        batch_ids = sorted({enrollment.batch_id for enrollment in enrollments})
+
+        course_counts = dict(
+            Student.objects.select_for_update().filter(pk__in=student_ids).order_by('pk').values_list('pk', 'course_count')
+        )
+        seat_counts = dict(
+            Batch.objects.select_for_update().filter(pk__in=batch_ids).order_by('pk').values_list('pk', 'enrolled_count')
+        )
+        student_courses = defaultdict(set)
+        for student_id, course_id in (
+            cls.objects.filter(student_id__in=student_ids)
+            .exclude(pk__in=[enrollment.pk for enrollment in enrollments if enrollment.pk])
+            .values_list('student_id', 'batch__course_id')
+        ):
+            student_courses[student_id].add(course_id)
+
+        errors = {}
+        for index, enrollment in enumerate(enrollments):
+            student, batch = enrollment.student, enrollment.batch
+            courses = student_courses[student.pk]
+            if batch.course_id in courses:
+                errors[index] = f"{student.name} is already enrolled in {batch.course.title}."
+            elif course_counts[student.pk] >= cls.MAX_COURSES_PER_STUDENT:
+                errors[index] = f"{student.name} is already enrolled in {cls.MAX_COURSES_PER_STUDENT} courses."
+            elif seat_counts[batch.pk] >= cls.BATCH_CAPACITY:
+                errors[index] = f"Batch {batch.number} of {batch.course.title} is already full."
+            else:
+                courses.add(batch.course_id)
+                course_counts[student.pk] += 1
+                seat_counts[batch.pk] += 1
+
+        if not errors:
+            adjust_counters(Student, 'course_count', Counter(e.student_id for e in enrollments))
+            adjust_counters(Batch, 'enrolled_count', Counter(e.batch_id for e in enrollments))
+        return errors
+
+    @classmethod
+    def release_places(cls, placements):
+        """Give back the seats and course slots of removed ``(student_id, batch_id)`` placements."""
+        placements = list(placements)
+        adjust_counters(Student, 'course_count', {k: -v for k, v in Counter(s for s, _ in placements).items()})
+        adjust_counters(Batch, 'enrolled_count', {k: -v for k, v in Counter(b for _, b in placements).items()})
+
+    @classmethod
+    def allocate_roll_numbers(cls, enrollments):
+        pending = {}
+        for enrollment in enrollments:
+            if not enrollment.roll_number:
+                pending.setdefault(enrollment.batch_id, []).append(enrollment)
+
+        for batch_id, batch_enrollments in pending.items():
+            batch = batch_enrollments[0].batch
+            seed = seed_from_codes(cls.objects.filter(batch_id=batch_id), 'roll_number')
+            numbers = reserve_block(f'enrollment:{batch_id}', len(batch_enrollments), seed=seed)
+            for enrollment, number in zip(batch_enrollments, numbers):
+                enrollment.roll_number = f"{batch.course.course_code}-B{batch.number}-{number:04d}"
+
     def save(self, *args, **kwargs):
         self.full_clean()
 
         if self.fee_at_enrollment is None and self.batch:
             self.fee_at_enrollment = self.batch.fee
 
-        if not self.roll_number:
-            last_enrollment = Enrollment.objects.filter(batch=self.batch).order_by('-roll_number').first()
-            last_num = 0
-            if last_enrollment:
-                try:
-                    last_num = int(last_enrollment.roll_number.split('-')[-1])
-                except ValueError:
-                    pass
-            next_num = str(last_num + 1).zfill(4)
-            self.roll_number = f"{self.batch.course.course_code}-B{self.batch.number}-{next_num}"
-
-        super().save(*args, **kwargs)
-
-        if self.fee_type == 'installment' and not self.installments.exists():
-
-            start = self.batch.start_date
-            end = self.batch.end_date
-            total_months = (end.year - start.year) * 12 + (end.month - start.month)
-
-            if total_months >= 1:
-              installment_amount = self.fee_at_enrollment 
-              for i in range(total_months):
-
-                    due_date = start + relativedelta(months=i)
-                    Installment.objects.create(
-                        enrollment=self,
-                        due_date=due_date,
-                        amount=installment_amount,
-                        paid_amount=0,
-                        status='pending'
-                    )
+        placement = (self.student_id, self.batch_id)
+        previous = None if self._state.adding else self.stored_placement()
+
+        with transaction.atomic():
+            if previous != placement:
+                if previous is not None:
+                    Enrollment.release_places([previous])
+                errors = Enrollment.reserve_places([self])
+                if errors:
+                    raise ValidationError(errors[0])
+
+            if not self.roll_number:
+                Enrollment.allocate_roll_numbers([self])
+
+            super().save(*args, **kwargs)
+            self._placement = placement
+
+            if self.fee_type == 'installment' and not self.installments.exists():
+                Installment.objects.bulk_create(self.build_installments())
+
+    def build_installments(self):
+        """Unsaved monthly installments for the batch period, one per started month."""
+        start = self.batch.start_date
+        end = self.batch.end_date
+        total_months = (end.year - start.year) * 12 + (end.month - start.month)
+
+        return [
+            Installment(
+                enrollment=self,
+                due_date=start + relativedelta(months=i),
+                amount=self.fee_at_enrollment,
+                paid_amount=0,
+                status='pending'
+            )
+            for i in range(total_months)
+        ]
 
     @property
     def pending_amount(self):
@@ -168,12 +321,22 @@ class Teacher(models.Model):
     specialization = models.CharField(max_length=100, blank=True, null=True)
     teacher_code = models.CharField(max_length=10, unique=True, blank=True, editable=False)
     courses = models.ManyToManyField('Course', related_name='teachers', blank=True)
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)
+
+    class Meta:
+        indexes = [models.Index(fields=['name', 'id'])]
+
+    @classmethod
+    def allocate_teacher_codes(cls, teachers):
+        pending = [teacher for teacher in teachers if not teacher.teacher_code]
+        if pending:
+            seed = seed_from_codes(cls.objects.all(), 'teacher_code')
+            for teacher, number in zip(pending, reserve_block('teacher', len(pending), seed=seed)):
+                teacher.teacher_code = f"TEA-{number:02d}"
 
     def save(self, *args, **kwargs):
         if not self.teacher_code:
-            last_teacher = Teacher.objects.order_by('id').last()
-            number = 1 if not last_teacher else last_teacher.id + 1
-            self.teacher_code = f"TEA-{number:02d}"
+            Teacher.allocate_teacher_codes([self])
         super().save(*args, **kwargs)
 
     def __str__(self):
@@ -187,9 +350,11 @@ class Lesson(models.Model):
     batch = models.ForeignKey('Batch', on_delete=models.CASCADE, related_name='lessons')
     students = models.ManyToManyField('Student', blank=True, related_name='completed_lessons')
     created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)
 
     class Meta:
         ordering = ['created_at']
+        indexes = [models.Index(fields=['batch', 'created_at']), models.Index(fields=['created_at', 'id'])]
 
     def __str__(self):
         return f"{self.title} ({self.batch.batch_code})"
@@ -208,10 +373,37 @@ class Profile(models.Model):
     user = models.OneToOneField(User, on_delete=models.CASCADE)
     role = models.CharField(max_length=10, choices=ROLE_CHOICES, default='student')
     full_name = models.CharField(max_length=100, blank=True, null=True)
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)
 
     def __str__(self):
         return f"{self.user.username} - {self.role}"
 
+class CodeSequence(models.Model):
+    name = models.CharField(max_length=50, unique=True)
+    last_value = models.PositiveBigIntegerField(default=0)
+
+    def __str__(self):
+        return f"{self.name} ({self.last_value})"
+
+class CacheVersion(models.Model):
+    name = models.CharField(max_length=100, unique=True)
+    version = models.PositiveBigIntegerField(default=0)
+    changed_at = models.DateTimeField()
+
+    def __str__(self):
+        return f"{self.name} v{self.version}"
+
+class Tombstone(models.Model):
+    model = models.CharField(max_length=50)
+    object_id = models.PositiveBigIntegerField()
+    deleted_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [models.Index(fields=['model', 'deleted_at'])]
+
+    def __str__(self):
+        return f"{self.model} #{self.object_id} deleted {self.deleted_at}"
+
 class Installment(models.Model):
     enrollment = models.ForeignKey(Enrollment, on_delete=models.CASCADE, related_name="installments")
     due_date = models.DateField()
@@ -219,6 +411,13 @@ class Installment(models.Model):
     paid_amount = models.PositiveBigIntegerField(default=0)
     status = models.CharField(max_length=20, choices=[('pending', 'Pending'), ('paid', 'Paid')])
     paid_date = models.DateField(null=True, blank=True)
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['status', 'due_date']),
+            models.Index(fields=['paid_date']),
+        ]
 
     def __str__(self):
         return f"{self.enrollment} - {self.amount} ({self.status})"
@@ -0,0 +1,121 @@
+import base64
+import binascii
+import json
+from functools import reduce
+
+from django.conf import settings
+from django.core.exceptions import FieldDoesNotExist, ValidationError
+from django.db.models import Q
+
+
+class Column:
+    """A sortable column header: the ``sort`` value its link sets and whether it is active."""
+
+    def __init__(self, name, current):
+        self.active = current.lstrip("-") == name
+        self.descending = self.active and current.startswith("-")
+        self.sort = f"-{name}" if self.active and not self.descending else name
+
+
+class KeysetPage:
+    def __init__(self, object_list, sort, columns, next_cursor=None, previous_cursor=None):
+        self.object_list = object_list
+        self.sort = sort
+        self.columns = columns
+        self.next_cursor = next_cursor
+        self.previous_cursor = previous_cursor
+
+    @property
+    def has_next(self):
+        return self.next_cursor is not None
+
+    @property
+    def has_previous(self):
+        return self.previous_cursor is not None
+
+    @property
+    def has_other_pages(self):
+        return self.has_next or self.has_previous
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+
+def _jsonable(value):
+    # Full isoformat: DjangoJSONEncoder cuts datetimes to milliseconds, which would skip rows.
+    return value.isoformat() if hasattr(value, "isoformat") else str(value)
+
+
+def encode_cursor(values):
+    return base64.urlsafe_b64encode(json.dumps(values, default=_jsonable).encode()).decode().rstrip("=")
+
+
+def decode_cursor(model, fields, cursor):
+    """The key values in ``cursor`` converted back to ``fields``' Python types, or ``None`` if invalid."""
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+        if not isinstance(values, list) or len(values) != len(fields):
+            return None
+        return [model._meta.get_field(field).to_python(value) for field, value in zip(fields, values)]
+    except (binascii.Error, ValueError, TypeError, FieldDoesNotExist, ValidationError):
+        return None
+
+
+def _after(fields, values, descending):
+    """``Q`` for rows strictly after ``values`` in the order of ``fields``."""
+    lookup = "lt" if descending else "gt"
+    clauses = []
+    for position, field in enumerate(fields):
+        equal = {name: value for name, value in zip(fields[:position], values)}
+        clauses.append(Q(**equal, **{f"{field}__{lookup}": values[position]}))
+    # The redundant bound on the leading field lets the index scan start at the cursor
+    # instead of filtering every row before it.
+    return Q(**{f"{fields[0]}__{lookup}e": values[0]}) & reduce(lambda left, right: left | right, clauses)
+
+
+def paginate(request, queryset, sorts, default, per_page=None):
+    """
+    One page of ``queryset`` using keyset (seek) pagination.
+
+    ``sorts`` maps each ``?sort=`` name (``-name`` for descending) to the fields it orders by,
+    ending with a unique one so the order is total; each should be backed by an index.
+    ``?after=`` and ``?before=`` carry the key of the last or first row of the current page,
+    so every page costs one indexed range scan however deep the user goes, and rows added or
+    removed meanwhile do not shift the pages.
+    """
+    per_page = per_page or getattr(settings, "LIST_PAGE_SIZE", 25)
+    sort = request.GET.get("sort", default)
+    if sort.lstrip("-") not in sorts:
+        sort = default
+    descending = sort.startswith("-")
+    fields = sorts[sort.lstrip("-")]
+    columns = {name: Column(name, sort) for name in sorts}
+
+    def order(reverse):
+        return [f"-{field}" if descending != reverse else field for field in fields]
+
+    after, before = request.GET.get("after"), request.GET.get("before")
+    cursor = decode_cursor(queryset.model, fields, after or before or "")
+    backwards = cursor is not None and not after
+    if cursor is not None:
+        queryset = queryset.filter(_after(fields, cursor, descending != backwards))
+    rows = list(queryset.order_by(*order(backwards))[:per_page + 1])
+
+    more = len(rows) > per_page
+    rows = rows[:per_page]
+    if backwards:
+        rows.reverse()
+
+    def key(row):
+        return encode_cursor([getattr(row, queryset.model._meta.get_field(field).attname) for field in fields])
+
+    page = KeysetPage(rows, sort, columns)
+    if rows:
+        if more or backwards:
+            page.next_cursor = key(rows[-1])
+        if (more and backwards) or (cursor is not None and not backwards):
+            page.previous_cursor = key(rows[0])
+    return page
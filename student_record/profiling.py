@@ -0,0 +1,119 @@
+import json
+import os
+import re
+import sys
+import threading
+import uuid
+from collections import Counter
+from pathlib import Path
+
+from django.conf import settings
+from django.utils import timezone
+
+INDEX_NAME = "index.ndjson"
+PROFILE_NAME = re.compile(r"^[\w-]+\.folded$")
+_index_lock = threading.Lock()
+
+
+def profile_directory():
+    return Path(getattr(settings, "PROFILER_DIR", Path(settings.BASE_DIR) / "profiles"))
+
+
+def _frame_label(code):
+    filename = code.co_filename
+    if "site-packages" in filename:
+        filename = filename.split("site-packages", 1)[1].lstrip(os.sep)
+    elif filename.startswith(str(settings.BASE_DIR)):
+        filename = os.path.relpath(filename, settings.BASE_DIR)
+    return f"{code.co_name} ({filename}:{code.co_firstlineno})".replace(";", ":")
+
+
+def fold(frame):
+    """The stack ending at ``frame`` as one folded-stack line, outermost frame first."""
+    labels = []
+    while frame is not None:
+        labels.append(_frame_label(frame.f_code))
+        frame = frame.f_back
+    return ";".join(reversed(labels))
+
+
+class StackSampler(threading.Thread):
+    """
+    Sample one thread's Python stack every ``interval`` seconds into folded-stack counts.
+
+    A statistical profile: the sampled thread runs undisturbed apart from sharing the GIL,
+    so the overhead stays small enough for production requests.
+    """
+
+    def __init__(self, thread_id, interval):
+        super().__init__(name="stack-sampler", daemon=True)
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks = Counter()
+        self._finished = threading.Event()
+
+    def run(self):
+        while not self._finished.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is not None:
+                self.stacks[fold(frame)] += 1
+
+    def stop(self):
+        self._finished.set()
+        self.join()
+
+
+def store_profile(stacks, **details):
+    """
+    Write ``stacks`` as a ``.folded`` file (the input of flamegraph.pl, speedscope and
+    inferno) and record ``details`` in the directory index. Returns the file name.
+    """
+    directory = profile_directory()
+    directory.mkdir(parents=True, exist_ok=True)
+    captured_at = timezone.now()
+    name = f"{captured_at:%Y%m%dT%H%M%S%f}-{uuid.uuid4().hex[:6]}.folded"
+    with open(directory / name, "w") as target:
+        target.writelines(f"{stack} {count}\n" for stack, count in stacks.most_common())
+
+    entry = {"name": name, "captured_at": captured_at.isoformat(), "samples": sum(stacks.values()), **details}
+    with _index_lock:
+        with open(directory / INDEX_NAME, "a") as index:
+            index.write(json.dumps(entry) + "\n")
+        _prune(directory)
+    return name
+
+
+def _prune(directory):
+    """Keep the newest ``PROFILER_MAX_PROFILES`` files and drop index lines of deleted ones."""
+    keep = getattr(settings, "PROFILER_MAX_PROFILES", 500)
+    profiles = sorted(directory.glob("*.folded"))
+    if len(profiles) <= keep:
+        return
+    for path in profiles[:len(profiles) - keep]:
+        path.unlink(missing_ok=True)
+
+    index_path = directory / INDEX_NAME
+    with open(index_path) as index:
+        lines = [line for line in index if line.strip() and (directory / json.loads(line)["name"]).exists()]
+    with open(index_path, "w") as index:
+        index.writelines(lines)
+
+
+def captured_profiles(limit=100):
+    """Index entries of the profiles still on disk, slowest request first."""
+    directory = profile_directory()
+    try:
+        with open(directory / INDEX_NAME) as index:
+            entries = [json.loads(line) for line in index if line.strip()]
+    except FileNotFoundError:
+        return []
+    entries = [entry for entry in entries if (directory / entry["name"]).exists()]
+    return sorted(entries, key=lambda entry: -entry["duration_ms"])[:limit]
+
+
+def profile_path(name):
+    """Path of the stored profile ``name``, or ``None`` if the name is not a profile file."""
+    if not PROFILE_NAME.match(name):
+        return None
+    path = profile_directory() / name
+    return path if path.exists() else None
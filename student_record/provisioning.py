@@ -0,0 +1,179 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.db import transaction
+from django.db.models import Q
+
+from .api.cache import bump_model_version
+from .models import Course, Profile, Student, Teacher
+
+# Below this many passwords per worker, starting a pool costs more than it saves.
+MIN_PASSWORDS_PER_WORKER = 8
+
+
+def _setup_worker():
+    # Spawned (non-forked) workers start without Django configured.
+    import django
+    django.setup()
+
+
+def hash_passwords(passwords, workers=None):
+    """Hash ``passwords`` with the default hasher, spreading the work over a process pool."""
+    passwords = list(passwords)
+    workers = workers or os.cpu_count() or 1
+    if workers <= 1 or len(passwords) < workers * MIN_PASSWORDS_PER_WORKER:
+        return [make_password(password) for password in passwords]
+
+    chunksize = max(1, len(passwords) // (workers * 4))
+    with ProcessPoolExecutor(max_workers=workers, initializer=_setup_worker) as executor:
+        return list(executor.map(make_password, passwords, chunksize=chunksize))
+
+
+def default_credentials(email):
+    """The username/password pair the single-record forms hand out for a new account."""
+    username = email.split("@")[0]
+    return username, f"{username}123"
+
+
+def taken_accounts(rows, role):
+    """
+    The ``("username", value)`` and ``("email", value)`` keys of ``rows`` already in use.
+
+    Teacher emails are unique on their own, so for teachers an existing ``Teacher`` with the
+    email counts as taken even when it has no account.
+    """
+    usernames = [row["username"] for row in rows]
+    emails = [row["email"] for row in rows]
+    taken = set()
+    for username, email in User.objects.filter(
+        Q(username__in=usernames) | Q(email__in=emails)
+    ).values_list("username", "email"):
+        taken.update({("username", username), ("email", email)})
+    if role == "teacher":
+        taken.update(("email", email) for email in Teacher.objects.filter(email__in=emails).values_list("email", flat=True))
+    return taken
+
+
+def check_accounts(rows, role, seen=None):
+    """
+    Split ``(line, row)`` pairs into the rows that can be provisioned and ``(line, error)`` pairs.
+
+    Missing usernames get the default one. Rows whose username or email is taken, in the
+    database, earlier in ``rows`` or in ``seen`` (updated in place), are rejected; so are
+    teacher rows naming unknown codes in ``courses``, which are resolved to course ids.
+    """
+    seen = set() if seen is None else seen
+    for _, row in rows:
+        row["username"] = row.get("username") or default_credentials(row["email"])[0]
+    taken = taken_accounts([row for _, row in rows], role)
+
+    course_ids = {}
+    if role == "teacher":
+        codes = {code for _, row in rows for code in row.get("courses") or ()}
+        course_ids = dict(Course.objects.filter(course_code__in=codes).values_list("course_code", "id"))
+
+    valid, errors = [], []
+    for line, row in rows:
+        keys = {("username", row["username"]), ("email", row["email"])}
+        if keys & (taken | seen):
+            errors.append((line, f"username {row['username']} or email {row['email']} is already in use"))
+            continue
+        if role == "teacher":
+            unknown = [code for code in row.get("courses") or () if code not in course_ids]
+            if unknown:
+                errors.append((line, f"unknown course code(s): {', '.join(unknown)}"))
+                continue
+            row["courses"] = [course_ids[code] for code in row.get("courses") or ()]
+        seen.update(keys)
+        valid.append((line, row))
+    return valid, errors
+
+
+def create_users(rows, role, workers=None):
+    """
+    Bulk-create a ``User`` and ``Profile`` per row and return ``(user, password)`` pairs.
+
+    Rows need ``name`` and ``email`` and may carry ``username`` and ``password``; missing ones
+    follow the same ``<local part>`` / ``<local part>123`` scheme as the forms.
+    """
+    accounts = []
+    for row in rows:
+        username, password = default_credentials(row["email"])
+        accounts.append((row.get("username") or username, row.get("password") or password))
+
+    hashes = hash_passwords([password for _, password in accounts], workers=workers)
+    users = User.objects.bulk_create([
+        User(username=username, email=row["email"], password=password_hash)
+        for row, (username, _), password_hash in zip(rows, accounts, hashes)
+    ])
+    Profile.objects.bulk_create([
+        Profile(user=user, full_name=row["name"], role=role) for row, user in zip(rows, users)
+    ])
+    bump_model_version(User)
+    return [(user, password) for user, (_, password) in zip(users, accounts)]
+
+
+def provision_students(rows, workers=None):
+    """
+    Create student accounts (``User``, ``Profile`` and ``Student``) for ``rows`` in bulk.
+
+    Each row is a dict with ``name``, ``email`` and ``age`` and optionally ``username``,
+    ``password``, ``phone_number`` and ``date_of_birth``. Returns the students with a
+    ``credentials`` dict attached, like the single-record API does.
+    """
+    rows = list(rows)
+    with transaction.atomic():
+        accounts = create_users(rows, "student", workers=workers)
+        students = [
+            Student(
+                user=user,
+                name=row["name"],
+                age=row["age"],
+                email=row["email"],
+                phone_number=row.get("phone_number") or None,
+                date_of_birth=row.get("date_of_birth") or None,
+            )
+            for row, (user, _) in zip(rows, accounts)
+        ]
+        Student.allocate_roll_numbers(students)
+        Student.objects.bulk_create(students)
+
+    for student, (user, password) in zip(students, accounts):
+        student.credentials = {"username": user.username, "password": password}
+    return students
+
+
+def provision_teachers(rows, workers=None):
+    """
+    Create teacher accounts (``User``, ``Profile`` and ``Teacher``) for ``rows`` in bulk.
+
+    Rows carry ``name`` and ``email`` and optionally ``username``, ``password``, ``phone``,
+    ``specialization`` and ``courses`` (a list of course ids).
+    """
+    rows = list(rows)
+    with transaction.atomic():
+        accounts = create_users(rows, "teacher", workers=workers)
+        teachers = [
+            Teacher(
+                user=user,
+                name=row["name"],
+                email=row["email"],
+                phone=row.get("phone") or None,
+                specialization=row.get("specialization") or None,
+            )
+            for row, (user, _) in zip(rows, accounts)
+        ]
+        Teacher.allocate_teacher_codes(teachers)
+        Teacher.objects.bulk_create(teachers)
+        Teacher.courses.through.objects.bulk_create([
+            Teacher.courses.through(teacher_id=teacher.pk, course_id=course_id)
+            for teacher, row in zip(teachers, rows)
+            for course_id in row.get("courses") or ()
+        ])
+        bump_model_version(Teacher)
+
+    for teacher, (user, password) in zip(teachers, accounts):
+        teacher.credentials = {"username": user.username, "password": password}
+    return teachers
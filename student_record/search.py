@@ -0,0 +1,64 @@
+from functools import reduce
+from operator import or_
+
+from django.db import connections
+from django.db.models import BooleanField, FloatField, Q, Value
+from django.db.models.expressions import RawSQL
+from django.db.models.functions import Greatest
+
+# Tables that carry a generated ``search_vector`` tsvector column on PostgreSQL (migration 0010).
+SEARCH_VECTOR_MODELS = {
+    'student_record.student',
+    'student_record.teacher',
+    'student_record.course',
+}
+
+
+def search(queryset, term, fields, fuzzy_fields=()):
+    """
+    Filter ``queryset`` to rows matching ``term`` in any of ``fields`` and annotate ``search_rank``.
+
+    Every word must appear in at least one field, as with DRF's ``SearchFilter``. On PostgreSQL
+    the ``icontains`` lookups (``UPPER(col) LIKE UPPER(%term%)``) are served by pg_trgm GIN
+    indexes on ``UPPER(col)``, matches are ranked by trigram word similarity, and models with a
+    ``search_vector`` column also match and rank on full text. Rows whose ``fuzzy_fields``
+    (local columns with a trigram index) are word-similar to ``term`` match despite typos.
+    Other backends (SQLite in tests) fall back to plain ``icontains`` with a constant rank.
+    """
+    words = term.split()
+    if not words or not fields:
+        return queryset
+
+    conditions = Q()
+    for word in words:
+        conditions &= reduce(or_, (Q(**{f"{field}__icontains": word}) for field in fields))
+
+    if connections[queryset.db].vendor != 'postgresql':
+        return queryset.filter(conditions).annotate(search_rank=Value(0.0, output_field=FloatField()))
+
+    from django.contrib.postgres.search import TrigramWordSimilarity
+
+    term = ' '.join(words)
+    similarities = [TrigramWordSimilarity(term, field) for field in fields]
+    rank = Greatest(*similarities) if len(similarities) > 1 else similarities[0]
+
+    quote_name = connections[queryset.db].ops.quote_name
+    table = quote_name(queryset.model._meta.db_table)
+    for field in fuzzy_fields:
+        # ``<%`` is pg_trgm's word-similarity operator, served by the UPPER(col) trigram index.
+        column = quote_name(queryset.model._meta.get_field(field).column)
+        queryset = queryset.alias(**{f"fuzzy_{field}": RawSQL(
+            f"UPPER(%s) <%% UPPER({table}.{column}::text)", [term], output_field=BooleanField()
+        )})
+        conditions |= Q(**{f"fuzzy_{field}": True})
+
+    if queryset.model._meta.label_lower in SEARCH_VECTOR_MODELS:
+        queryset = queryset.alias(search_match=RawSQL(
+            f"{table}.search_vector @@ websearch_to_tsquery('simple', %s)", [term], output_field=BooleanField()
+        ))
+        conditions |= Q(search_match=True)
+        rank = rank + RawSQL(
+            f"ts_rank({table}.search_vector, websearch_to_tsquery('simple', %s))", [term], output_field=FloatField()
+        )
+
+    return queryset.filter(conditions).annotate(search_rank=rank)
@@ -0,0 +1,70 @@
+from django.db import IntegrityError, connection, transaction
+
+
+def code_number(code):
+    """Return the trailing number of a generated code such as ``STU-07`` or ``CRS-01-B2-0003``."""
+    try:
+        return int(str(code).rsplit('-', 1)[-1])
+    except ValueError:
+        return 0
+
+
+def seed_from_codes(queryset, field):
+    """Build a seed callable returning the highest number already used in ``field``."""
+    def seed():
+        codes = queryset.exclude(**{field: ''}).values_list(field, flat=True).iterator()
+        return max((code_number(code) for code in codes), default=0)
+    return seed
+
+
+def reserve(name, count=1, seed=None):
+    """
+    Reserve ``count`` consecutive numbers from the counter ``name`` and return the first one.
+
+    The counter row is updated in place, so concurrent writers queue on its row lock instead
+    of reading the same "last" value. When the counter does not exist yet it is created from
+    ``seed()`` (the highest number already in use), which keeps existing codes unique.
+    """
+    from .models import CodeSequence
+
+    if count < 1:
+        raise ValueError("count must be at least 1")
+
+    with transaction.atomic():
+        last_value = _increment(name, count)
+        if last_value is None:
+            start = seed() if seed else 0
+            try:
+                with transaction.atomic():
+                    CodeSequence.objects.create(name=name, last_value=start + count)
+                return start + 1
+            except IntegrityError:
+                # Another writer created the counter first; take the next block from it.
+                last_value = _increment(name, count)
+    return last_value - count + 1
+
+
+def reserve_block(name, count, seed=None):
+    """Reserve ``count`` numbers and return them as a range, for bulk inserts."""
+    start = reserve(name, count, seed=seed)
+    return range(start, start + count)
+
+
+def _increment(name, count):
+    from .models import CodeSequence
+
+    table = connection.ops.quote_name(CodeSequence._meta.db_table)
+    with connection.cursor() as cursor:
+        if connection.features.can_return_columns_from_insert:
+            cursor.execute(
+                f"UPDATE {table} SET last_value = last_value + %s WHERE name = %s RETURNING last_value",
+                [count, name],
+            )
+            row = cursor.fetchone()
+            return row[0] if row else None
+
+        cursor.execute(f"UPDATE {table} SET last_value = last_value + %s WHERE name = %s", [count, name])
+        if not cursor.rowcount:
+            return None
+        cursor.execute(f"SELECT last_value FROM {table} WHERE name = %s", [name])
+        return cursor.fetchone()[0]
@@ -0,0 +1,56 @@
+from django.core.exceptions import ValidationError
+from django.db import transaction
+
+from .models import Batch, Enrollment, Installment, Student
+
+
+def bulk_enroll(items):
+    """
+    Enroll a list of ``{"student": id, "batch": id, "status": ..., "fee_type": ...}`` items at once.
+
+    Seats and course slots are taken through ``Enrollment.reserve_places`` (the same path as
+    ``Enrollment.save``) for the whole list, counting earlier items of the list. Either every
+    item is enrolled or a ``ValidationError`` keyed by item index is raised and nothing is
+    written.
+    """
+    items = list(items)
+    if not items:
+        return []
+
+    with transaction.atomic():
+        students = Student.objects.in_bulk({item["student"] for item in items})
+        batches = Batch.objects.select_related("course").in_bulk({item["batch"] for item in items})
+
+        errors = {}
+        enrollments = []
+        for index, item in enumerate(items):
+            student = students.get(item["student"])
+            batch = batches.get(item["batch"])
+            if student is None or batch is None:
+                errors[index] = ["Unknown student." if student is None else "Unknown batch."]
+                continue
+            enrollments.append(Enrollment(
+                student=student,
+                batch=batch,
+                status=item.get("status", "enrolled"),
+                fee_type=item.get("fee_type", "one_time"),
+                fee_at_enrollment=batch.fee,
+                paid_amount=0,
+            ))
+        if errors:
+            raise ValidationError(errors)
+
+        errors = Enrollment.reserve_places(enrollments)
+        if errors:
+            raise ValidationError({index: [message] for index, message in errors.items()})
+
+        Enrollment.allocate_roll_numbers(enrollments)
+        Enrollment.objects.bulk_create(enrollments)
+        Installment.objects.bulk_create([
+            installment
+            for enrollment in enrollments
+            if enrollment.fee_type == "installment"
+            for installment in enrollment.build_installments()
+        ])
+
+    return enrollments
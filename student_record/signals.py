@@ -0,0 +1,115 @@
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.db.backends.signals import connection_created
+from django.db.models.signals import m2m_changed, post_delete, post_init, post_save, pre_delete
+from django.dispatch import receiver
+from django.utils import timezone
+from rest_framework.authtoken.models import Token
+
+from .api.authentication import evict_user_tokens, principal_cache
+from .api.cache import bump_model_version
+from .models import Batch, Course, Enrollment, Installment, Lesson, Profile, Student, Teacher, Tombstone
+from .slow_queries import install_slow_query_logger
+
+SYNCED_MODELS = (Student, Course, Batch, Enrollment, Teacher, Lesson, Profile, Installment)
+
+
+@receiver(post_save, sender=Course)
+@receiver(post_delete, sender=Course)
+@receiver(post_save, sender=Batch)
+@receiver(post_delete, sender=Batch)
+@receiver(post_save, sender=Teacher)
+@receiver(post_delete, sender=Teacher)
+@receiver(post_delete, sender=User)
+def bump_catalog_version(sender, **kwargs):
+    bump_model_version(sender)
+
+
+# User fields whose changes invalidate cached data: the teacher's ``user_email`` in API
+# responses, and cached token principals once a user is deactivated, demoted or changes password.
+USER_TRACKED_FIELDS = ("email", "is_active", "is_staff", "is_superuser", "password")
+TOKEN_EVICTING_FIELDS = {"is_active", "is_staff", "is_superuser", "password"}
+_UNSET = object()
+
+
+def _tracked_values(user):
+    # Deferred fields are missing from __dict__; reading them would cost a query.
+    return {field: user.__dict__.get(field, _UNSET) for field in USER_TRACKED_FIELDS}
+
+
+@receiver(post_init, sender=User)
+def remember_user_fields(sender, instance, **kwargs):
+    instance._tracked_values = _tracked_values(instance)
+
+
+def changed_user_fields(user, update_fields):
+    """Tracked fields whose value differs from when ``user`` was loaded or last saved."""
+    previous, current = getattr(user, "_tracked_values", {}), _tracked_values(user)
+    changed = {field for field in USER_TRACKED_FIELDS if previous.get(field, _UNSET) != current[field]}
+    if update_fields is not None:
+        changed &= set(update_fields)
+    return changed
+
+
+@receiver(post_save, sender=User)
+def user_saved(sender, instance, created, update_fields, **kwargs):
+    # Logins save last_login on every request that authenticates; only real changes invalidate.
+    changed = changed_user_fields(instance, update_fields)
+    if not created and "email" in changed:
+        bump_model_version(User)
+    if not created and changed & TOKEN_EVICTING_FIELDS:
+        evict_user_tokens(instance.pk)
+    instance._tracked_values = _tracked_values(instance)
+
+
+@receiver(m2m_changed, sender=Teacher.courses.through)
+def bump_teacher_courses_version(sender, instance, action, reverse, pk_set, **kwargs):
+    # Teachers list their courses, so delta sync must see them as changed too.
+    if reverse and action == "pre_clear":
+        instance._cleared_teachers = list(instance.teachers.values_list("pk", flat=True))
+    if action in ("post_add", "post_remove", "post_clear"):
+        if not reverse:
+            teacher_ids = [instance.pk]
+        elif action == "post_clear":
+            teacher_ids = instance.__dict__.pop("_cleared_teachers", [])
+        else:
+            teacher_ids = pk_set
+        Teacher.objects.filter(pk__in=teacher_ids).update(updated_at=timezone.now())
+        bump_model_version(Teacher)
+
+
+@receiver(post_save, sender=Installment)
+@receiver(post_delete, sender=Installment)
+def touch_installment_enrollment(sender, instance, **kwargs):
+    # An enrollment's payment state comes from its installments.
+    Enrollment.objects.filter(pk=instance.enrollment_id).update(updated_at=timezone.now())
+
+
+@receiver(post_delete, sender=Token)
+def evict_deleted_token(sender, instance, **kwargs):
+    principal_cache.evict(instance.key)
+
+
+@receiver(pre_delete, sender=Enrollment)
+def remember_enrollment_placement(sender, instance, **kwargs):
+    # Read deferred ids while the row still exists.
+    instance.stored_placement()
+
+
+@receiver(post_delete, sender=Enrollment)
+def release_enrollment_places(sender, instance, **kwargs):
+    Enrollment.release_places([instance.stored_placement()])
+
+
+def record_tombstone(sender, instance, **kwargs):
+    Tombstone.objects.create(model=sender._meta.label_lower, object_id=instance.pk)
+
+
+for model in SYNCED_MODELS:
+    post_delete.connect(record_tombstone, sender=model, dispatch_uid=f"tombstone-{model._meta.label_lower}")
+
+
+@receiver(connection_created)
+def log_slow_queries(sender, connection, **kwargs):
+    if getattr(settings, "SLOW_QUERY_THRESHOLD_MS", None) is not None:
+        install_slow_query_logger(connection)
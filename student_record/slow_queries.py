@@ -0,0 +1,121 @@
+import json
+import logging
+import random
+import threading
+import time
+import traceback
+from contextvars import ContextVar
+from pathlib import Path
+
+from django.conf import settings
+from django.db import DatabaseError, transaction
+from django.utils import timezone
+
+from .metrics import statement_signature
+
+logger = logging.getLogger("student_record.slow_queries")
+
+# "<METHOD> <path> <view>" of the request being served, set by SlowQueryMiddleware.
+current_view = ContextVar("current_view", default=None)
+_explaining = threading.local()
+_write_lock = threading.Lock()
+
+
+def slow_query_log_path():
+    return Path(getattr(settings, "SLOW_QUERY_LOG", Path(settings.BASE_DIR) / "slow_queries.ndjson"))
+
+
+def originating_frame():
+    """``file:line in function`` of the innermost project frame outside this module."""
+    base_dir = str(settings.BASE_DIR)
+    for frame in reversed(traceback.extract_stack()[:-2]):
+        if frame.filename.startswith(base_dir) and "site-packages" not in frame.filename \
+                and not frame.filename.endswith(("slow_queries.py", "middleware.py")):
+            return f"{Path(frame.filename).relative_to(base_dir)}:{frame.lineno} in {frame.name}"
+    return None
+
+
+def explain(connection, sql, params, analyze=False):
+    """The backend's plan for ``sql`` (JSON where supported), or ``None`` if it cannot be explained."""
+    features = connection.features
+    explain_format = "json" if "JSON" in features.supported_explain_formats else None
+    try:
+        prefix = connection.ops.explain_query_prefix(explain_format, **({"analyze": True} if analyze else {}))
+    except ValueError:
+        prefix = connection.ops.explain_query_prefix(explain_format)
+
+    _explaining.active = True
+    try:
+        # A savepoint keeps a failed EXPLAIN from breaking the caller's transaction.
+        with transaction.atomic(using=connection.alias), connection.cursor() as cursor:
+            cursor.execute(f"{prefix} {sql}", params)
+            rows = cursor.fetchall()
+    except DatabaseError as exc:
+        return {"error": str(exc)}
+    finally:
+        _explaining.active = False
+
+    if explain_format and len(rows) == 1:
+        plan = rows[0][0]
+        return json.loads(plan) if isinstance(plan, str) else plan
+    return [" ".join(str(column) for column in row) for row in rows]
+
+
+class SlowQueryLogger:
+    """
+    ``execute_wrapper`` that logs statements slower than ``SLOW_QUERY_THRESHOLD_MS`` to the
+    ``student_record.slow_queries`` logger and to the NDJSON file ``SLOW_QUERY_LOG``.
+
+    Parameter values can hold personal data, so they are only stored, each cut to 100
+    characters, with ``SLOW_QUERY_LOG_PARAMS`` on. So are plans: with that setting on, a
+    ``SLOW_QUERY_EXPLAIN_RATE`` share of slow SELECTs is re-run under EXPLAIN (with ANALYZE
+    when ``SLOW_QUERY_EXPLAIN_ANALYZE`` is on, which executes the query again), and plans
+    show the values in their filters.
+    """
+
+    def __init__(self, connection):
+        self.connection = connection
+
+    def __call__(self, execute, sql, params, many, context):
+        if getattr(_explaining, "active", False):
+            return execute(sql, params, many, context)
+
+        started = time.perf_counter()
+        result = execute(sql, params, many, context)
+        duration_ms = (time.perf_counter() - started) * 1000
+        threshold = getattr(settings, "SLOW_QUERY_THRESHOLD_MS", None)
+        if threshold is not None and duration_ms >= threshold:
+            self.record(sql, params, many, duration_ms)
+        return result
+
+    def record(self, sql, params, many, duration_ms):
+        signature, _ = statement_signature(sql)
+        with_params = getattr(settings, "SLOW_QUERY_LOG_PARAMS", False)
+        entry = {
+            "at": timezone.now().isoformat(),
+            "alias": self.connection.alias,
+            "duration_ms": round(duration_ms, 2),
+            "signature": signature,
+            "sql": sql,
+            "params": [str(param)[:100] for param in params or ()] if with_params and not many else None,
+            "view": current_view.get(),
+            "frame": originating_frame(),
+        }
+        is_select = sql.lstrip().upper().startswith(("SELECT", "WITH"))
+        if with_params and not many and is_select and random.random() < getattr(settings, "SLOW_QUERY_EXPLAIN_RATE", 0.1):
+            entry["plan"] = explain(
+                self.connection, sql, params, analyze=getattr(settings, "SLOW_QUERY_EXPLAIN_ANALYZE", False),
+            )
+
+        logger.warning("slow query %.1f ms [%s] from %s: %s", duration_ms, signature, entry["frame"], sql[:500])
+        path = slow_query_log_path()
+        with _write_lock:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            with open(path, "a") as target:
+                target.write(json.dumps(entry, default=str) + "\n")
+
+
+def install_slow_query_logger(connection):
+    """Wrap every statement ``connection`` runs, once per connection object."""
+    if not any(isinstance(wrapper, SlowQueryLogger) for wrapper in connection.execute_wrappers):
+        connection.execute_wrappers.append(SlowQueryLogger(connection))
@@ -1,3 +1,1172 @@
-from django.test import TestCase
+import contextlib
+import csv
+import importlib
+import io
+import json
+import logging
+import tempfile
+import threading
+import tracemalloc
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+from pathlib import Path
+from unittest import mock, skipUnless
 
-# Create your tests here.
+from django.apps import apps
+from django.contrib.admin.models import ADDITION, LogEntry
+from django.contrib.auth.models import AnonymousUser, Group, Permission, User
+from django.core.cache import cache
+from django.core.exceptions import ValidationError
+from django.core.management import CommandError, call_command
+from django.db import connection, connections
+from django.db.models import Count, F
+from django.http import HttpResponse, JsonResponse
+from django.test import RequestFactory, TestCase, TransactionTestCase, override_settings, skipUnlessDBFeature
+from django.utils import timezone
+from rest_framework.authtoken.models import Token
+from rest_framework.exceptions import ParseError
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIClient
+
+from .api.authentication import principal_cache
+from .api.cache import bump_model_version, model_versions
+from .metrics import registry, statement_signature
+from .middleware import SESSION_KEY, Principal, resolve_principal
+from .api.renderers import FastJSONParser, FastJSONRenderer
+from .models import Batch, CacheVersion, CodeSequence, Course, Enrollment, Installment, Lesson, Profile, Student, Teacher, Tombstone
+from .datasets import generate_dataset
+from .forms import LessonForm
+from .management.commands.check_query_plans import sequential_scans
+from .profiling import captured_profiles, store_profile
+from .search import search
+from .slow_queries import SlowQueryLogger
+from .tracing import span, start_trace
+from .sequences import reserve, reserve_block
+
+
+def make_course(title="Python"):
+    return Course.objects.create(title=title, description=f"{title} course")
+
+
+def make_teacher(name="Teacher", email=None):
+    return Teacher.objects.create(name=name, email=email or f"{name.lower().replace(' ', '.')}@example.com")
+
+
+def make_batch(course=None, teacher=None, number=1, fee=1000):
+    start = date.today()
+    return Batch.objects.create(
+        course=course or make_course(), teacher=teacher or make_teacher(), number=number,
+        start_date=start, end_date=start + timedelta(days=90), fee=fee,
+    )
+
+
+def make_student(name="Student", age=20):
+    return Student.objects.create(name=name, age=age, email=f"{name.lower().replace(' ', '.')}@example.com")
+
+
+def make_enrollment(student=None, batch=None, **fields):
+    return Enrollment.objects.create(student=student or make_student(), batch=batch or make_batch(), **fields)
+
+
+def admin_client():
+    client = APIClient()
+    client.force_authenticate(User.objects.create_superuser("admin", "admin@example.com", "secret"))
+    return client
+
+
+class CodeSequenceTests(TestCase):
+    def test_reserve_hands_out_consecutive_numbers(self):
+        self.assertEqual(reserve("widgets"), 1)
+        self.assertEqual(reserve("widgets", 3), 2)
+        self.assertEqual(list(reserve_block("widgets", 2)), [5, 6])
+        self.assertEqual(CodeSequence.objects.get(name="widgets").last_value, 6)
+
+    def test_counter_is_seeded_from_existing_codes(self):
+        Student.objects.bulk_create([Student(name="Old", age=30, email="old@example.com", roll_number="STU-41")])
+        self.assertEqual(make_student("New").roll_number, "STU-42")
+
+    def test_codes_are_generated_per_model(self):
+        course = make_course()
+        teacher = make_teacher()
+        self.assertEqual(course.course_code, "CRS-01")
+        self.assertEqual(teacher.teacher_code, "TEA-01")
+        self.assertEqual(make_batch(course, teacher, number=2).batch_code, "CRS-01-B2")
+
+    def test_enrollment_roll_numbers_count_per_batch(self):
+        first = make_batch(number=1)
+        second = make_batch(first.course, first.teacher, number=2)
+        rolls = [
+            Enrollment.objects.create(student=make_student(f"S{i}"), batch=batch).roll_number
+            for i, batch in enumerate([first, first, second])
+        ]
+        self.assertEqual(rolls, ["CRS-01-B1-0001", "CRS-01-B1-0002", "CRS-01-B2-0001"])
+
+    def test_reserve_rejects_empty_blocks(self):
+        with self.assertRaises(ValueError):
+            reserve("widgets", 0)
+
+
+class CachedResponseTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.client.force_authenticate(User.objects.create_user("reader", password="secret"))
+        self.course = make_course()
+
+    def test_saving_a_model_invalidates_its_cached_responses(self):
+        self.assertEqual(self.client.get("/api/v1/courses/").json()["results"][0]["title"], "Python")
+        self.course.title = "Go"
+        self.course.save()
+        self.assertEqual(self.client.get("/api/v1/courses/").json()["results"][0]["title"], "Go")
+
+    def test_versions_are_read_from_the_database(self):
+        bump_model_version(Course)
+        bump_model_version(Course)
+        cache.clear()  # what another worker, with its own cache, would see
+        self.assertEqual(model_versions([Course])[0][0], CacheVersion.objects.get(name="api-version:student_record.course").version)
+        self.assertEqual(model_versions([Batch]), [(0, None)])
+
+    def test_matching_etag_answers_not_modified(self):
+        etag = self.client.get("/api/v1/courses/").headers["ETag"]
+        self.assertEqual(self.client.get("/api/v1/courses/", HTTP_IF_NONE_MATCH=etag).status_code, 304)
+        self.course.save()
+        self.assertEqual(self.client.get("/api/v1/courses/", HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+    def test_wildcard_etag_only_matches_existing_objects(self):
+        self.assertEqual(self.client.get(f"/api/v1/courses/{self.course.pk}/", HTTP_IF_NONE_MATCH="*").status_code, 304)
+        self.assertEqual(self.client.get("/api/v1/courses/999/", HTTP_IF_NONE_MATCH="*").status_code, 404)
+
+    def test_login_does_not_invalidate_user_backed_responses(self):
+        user = User.objects.create_user("teacher", email="teacher@example.com", password="secret")
+        before = model_versions([User])
+        user.save(update_fields=["last_login"])
+        User.objects.get(pk=user.pk).save()
+        self.assertEqual(model_versions([User]), before)
+
+        user.email = "changed@example.com"
+        user.save()
+        self.assertEqual(model_versions([User])[0][0], before[0][0] + 1)
+
+
+@override_settings(AUTH_TOKEN_CACHE=True)
+class PrincipalCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user("api", password="secret")
+        self.token = Token.objects.create(user=self.user)
+        self.client = APIClient(HTTP_AUTHORIZATION=f"Token {self.token.key}")
+
+    def test_principal_is_cached_after_first_request(self):
+        self.assertEqual(self.client.get("/api/v1/courses/").status_code, 200)
+        self.assertEqual(principal_cache.get(self.token.key)[0], self.user)
+
+    def test_deactivating_the_user_revokes_access(self):
+        self.client.get("/api/v1/courses/")
+        self.user.is_active = False
+        self.user.save()
+        self.assertIsNone(principal_cache.get(self.token.key))
+        self.assertEqual(self.client.get("/api/v1/courses/").status_code, 403)
+
+    def test_demoting_a_staff_user_revokes_admin_access(self):
+        self.user.is_staff = True
+        self.user.save()
+        self.assertEqual(self.client.post("/api/v1/courses/", {}).status_code, 400)
+        self.user.is_staff = False
+        self.user.save()
+        self.assertIsNone(principal_cache.get(self.token.key))
+        self.assertEqual(self.client.post("/api/v1/courses/", {}).status_code, 403)
+
+    def test_deleting_the_token_revokes_access(self):
+        self.client.get("/api/v1/courses/")
+        self.token.delete()
+        self.assertEqual(self.client.get("/api/v1/courses/").status_code, 403)
+
+    def test_unrelated_user_saves_skip_token_lookup(self):
+        self.client.get("/api/v1/courses/")
+        with self.assertNumQueries(1):
+            self.user.save(update_fields=["last_login"])
+        self.assertIsNotNone(principal_cache.get(self.token.key))
+
+    @override_settings(AUTH_TOKEN_CACHE=None)
+    def test_process_local_cache_disables_caching(self):
+        self.assertFalse(principal_cache.enabled)
+        self.client.get("/api/v1/courses/")
+        self.assertIsNone(cache.get(f"auth-token:{principal_cache.digest(self.token.key)}"))
+
+
+class SearchTests(TestCase):
+    def setUp(self):
+        self.ada = make_student("Ada Lovelace")
+        self.alan = make_student("Alan Turing")
+
+    def test_every_word_must_match_some_field(self):
+        fields = ["name", "roll_number"]
+        self.assertEqual(list(search(Student.objects.all(), "ada", fields)), [self.ada])
+        self.assertEqual(list(search(Student.objects.all(), "turing STU", fields)), [self.alan])
+        self.assertEqual(list(search(Student.objects.all(), "ada turing", fields)), [])
+
+    def test_results_are_annotated_with_a_rank(self):
+        self.assertTrue(all(hasattr(row, "search_rank") for row in search(Student.objects.all(), "a", ["name"])))
+
+    @skipUnless(connection.vendor == "postgresql", "ranking and fuzzy matching need pg_trgm")
+    def test_closer_matches_rank_higher(self):
+        adalind = make_student("Adalind Cross")
+        ranked = search(Student.objects.all(), "ada", ["name"]).order_by("-search_rank")
+        self.assertEqual(list(ranked), [self.ada, adalind])
+        self.assertGreater(ranked[0].search_rank, ranked[1].search_rank)
+
+    @skipUnless(connection.vendor == "postgresql", "ranking and fuzzy matching need pg_trgm")
+    def test_typos_match_through_fuzzy_fields(self):
+        self.assertEqual(list(search(Student.objects.all(), "lovelase", ["name"])), [])
+        self.assertEqual(list(search(Student.objects.all(), "lovelase", ["name"], fuzzy_fields=["name"])), [self.ada])
+
+    def test_blank_term_leaves_queryset_alone(self):
+        queryset = Student.objects.all()
+        self.assertIs(search(queryset, "  ", ["name"]), queryset)
+
+    def test_api_search_parameter(self):
+        client = APIClient()
+        client.force_authenticate(User.objects.create_user("reader", password="secret"))
+        results = client.get("/api/v1/students/", {"search": "lovelace"}).json()["results"]
+        self.assertEqual([row["id"] for row in results], [self.ada.pk])
+
+
+class FastJSONTests(TestCase):
+    data = {
+        "name": "Ada \u2028 Lovelace", "fee": Decimal("12.50"), "when": datetime(2024, 1, 2, 3, 4, 5),
+        "nested": [1, 2.5, None, True], 7: "int key",
+    }
+
+    def test_renderer_matches_stdlib_output(self):
+        self.assertEqual(FastJSONRenderer().render(self.data), JSONRenderer().render(self.data))
+
+    def test_indented_output_falls_back(self):
+        rendered = FastJSONRenderer().render({"a": 1}, "application/json; indent=2")
+        self.assertEqual(rendered, JSONRenderer().render({"a": 1}, "application/json; indent=2"))
+
+    def test_parser_round_trip(self):
+        parsed = FastJSONParser().parse(io.BytesIO(FastJSONRenderer().render({"a": [1, "b"]})))
+        self.assertEqual(parsed, {"a": [1, "b"]})
+
+    def test_parser_rejects_invalid_json(self):
+        with self.assertRaises(ParseError):
+            FastJSONParser().parse(io.BytesIO(b"{not json"))
+
+
+class ExportTests(TestCase):
+    def setUp(self):
+        self.batch = make_batch()
+        self.enrollments = [make_enrollment(make_student(f"S{i}"), self.batch) for i in range(3)]
+        self.enrollments[2].status = "dropped"
+        self.enrollments[2].save()
+        self.client = admin_client()
+
+    def streamed(self, response):
+        self.assertTrue(response.streaming)
+        return b"".join(response.streaming_content).decode()
+
+    def test_csv_export_streams_filtered_rows(self):
+        response = self.client.get("/api/v1/enrollments/export/", {"status": "enrolled"})
+        self.assertEqual(response["Content-Type"], "text/csv; charset=utf-8")
+        rows = list(csv.DictReader(io.StringIO(self.streamed(response))))
+        self.assertEqual([row["roll_number"] for row in rows], [e.roll_number for e in self.enrollments[:2]])
+        self.assertEqual(rows[0]["batch_code"], self.batch.batch_code)
+
+    def test_ndjson_export(self):
+        response = self.client.get("/api/v1/enrollments/export/", {"output": "ndjson"})
+        lines = [json.loads(line) for line in self.streamed(response).splitlines()]
+        self.assertEqual([line["id"] for line in lines], [e.pk for e in self.enrollments])
+
+    def test_unknown_output_is_rejected(self):
+        self.assertEqual(self.client.get("/api/v1/enrollments/export/", {"output": "xml"}).status_code, 400)
+
+
+class BatchRequestTests(TestCase):
+    def setUp(self):
+        self.course = make_course()
+        self.client = admin_client()
+
+    def batch(self, *requests):
+        response = self.client.post("/api/v1/batch/", {"requests": list(requests)}, format="json")
+        self.assertEqual(response.status_code, 200)
+        return response.json()["responses"]
+
+    def test_reads_return_each_status_and_body(self):
+        courses, missing = self.batch(
+            {"path": "/api/v1/courses/"}, {"path": "/api/v1/courses/999/"},
+        )
+        self.assertEqual(courses["status"], 200)
+        self.assertEqual(courses["body"]["results"][0]["id"], self.course.pk)
+        self.assertIn("ETag", courses["headers"])
+        self.assertEqual(missing["status"], 404)
+
+    def test_writes_run_in_order(self):
+        created, listed = self.batch(
+            {"method": "POST", "path": "/api/v1/courses/", "body": {"title": "Go", "description": "Go course"}},
+            {"path": "/api/v1/courses/?title=Go"},
+        )
+        self.assertEqual(created["status"], 201)
+        self.assertEqual(listed["body"]["count"], 1)
+
+    def test_streaming_sub_request_gets_an_error_entry(self):
+        export, courses = self.batch({"path": "/api/v1/enrollments/export/"}, {"path": "/api/v1/courses/"})
+        self.assertEqual(export["status"], 400)
+        self.assertIn("Streaming", export["body"]["detail"])
+        self.assertEqual(courses["status"], 200)
+
+    def resolving_to(self, view):
+        return mock.patch(
+            "student_record.api.batch_requests.resolve", return_value=mock.Mock(func=view, args=(), kwargs={}),
+        )
+
+    def test_non_json_body_is_returned_as_text(self):
+        with self.resolving_to(lambda request: HttpResponse("plain text", content_type="text/plain")):
+            (text,) = self.batch({"path": "/api/v1/courses/"})
+        self.assertEqual(text, {"status": 200, "body": "plain text"})
+
+    def test_sub_requests_carry_the_user_and_principal(self):
+        seen = []
+
+        def view(request):
+            seen.append((request.user.username, request.principal.is_admin))
+            return JsonResponse({})
+
+        with self.resolving_to(view):
+            self.batch({"path": "/api/v1/courses/"})
+        self.assertEqual(seen, [("admin", True)])
+
+
+class DeltaSyncTests(TestCase):
+    def setUp(self):
+        self.client = admin_client()
+        self.kept, self.removed = make_course("Kept"), make_course("Removed")
+
+    def sync(self, since, **params):
+        return self.client.get("/api/v1/courses/", {"updated_since": since.isoformat(), **params})
+
+    def test_lists_changed_rows_and_deleted_ids(self):
+        since = timezone.now()
+        self.kept.save()
+        removed_id = self.removed.pk
+        self.removed.delete()
+        data = self.sync(since).json()
+        self.assertEqual([row["id"] for row in data["results"]], [self.kept.pk])
+        self.assertEqual(data["deleted"], [removed_id])
+
+    def test_cursor_overlaps_rows_committed_late(self):
+        Course.objects.update(updated_at=timezone.now() - timedelta(hours=1))
+        synced_at = datetime.fromisoformat(self.sync(timezone.now()).json()["synced_at"])
+        self.assertLessEqual(synced_at, timezone.now() - timedelta(seconds=59))
+        # Stamped before the previous sync ran, but committed after it.
+        Course.objects.filter(pk=self.kept.pk).update(updated_at=timezone.now() - timedelta(seconds=1))
+        self.assertEqual([row["id"] for row in self.sync(synced_at).json()["results"]], [self.kept.pk])
+
+    def test_teacher_course_changes_are_synced(self):
+        teacher = make_teacher()
+        since = timezone.now()
+        teacher.courses.add(self.kept)
+        self.kept.teachers.remove(teacher)
+        teacher.courses.add(self.kept)
+        self.assertGreaterEqual(Teacher.objects.get(pk=teacher.pk).updated_at, since)
+        since = timezone.now()
+        self.kept.teachers.clear()
+        rows = self.client.get("/api/v1/teachers/", {"updated_since": since.isoformat()}).json()["results"]
+        self.assertEqual([(row["id"], row["courses"]) for row in rows], [(teacher.pk, [])])
+
+    def test_paying_an_installment_syncs_the_enrollment(self):
+        enrollment = make_enrollment(fee_type="installment")
+        since = timezone.now()
+        enrollment.installments.update(status="paid", paid_amount=F("amount"))
+        self.assertEqual(self.client.get("/api/v1/enrollments/", {"updated_since": since.isoformat()}).json()["results"], [])
+        installment = enrollment.installments.first()
+        installment.save()
+        rows = self.client.get("/api/v1/enrollments/", {"updated_since": since.isoformat()}).json()["results"]
+        self.assertEqual([(row["id"], row["is_fully_paid"]) for row in rows], [(enrollment.pk, True)])
+
+    @override_settings(TOMBSTONE_RETENTION_DAYS=7)
+    def test_cursors_older_than_tombstone_retention_are_rejected(self):
+        self.assertEqual(self.sync(timezone.now() - timedelta(days=8)).status_code, 400)
+        self.assertEqual(self.sync(timezone.now() - timedelta(days=6)).status_code, 200)
+
+    @override_settings(TOMBSTONE_RETENTION_DAYS=7)
+    def test_prune_tombstones_drops_expired_rows(self):
+        removed_id = self.removed.pk
+        self.removed.delete()
+        Tombstone.objects.create(model="student_record.course", object_id=999)
+        Tombstone.objects.filter(object_id=999).update(deleted_at=timezone.now() - timedelta(days=8))
+        call_command("prune_tombstones", stdout=io.StringIO())
+        self.assertEqual(list(Tombstone.objects.values_list("object_id", flat=True)), [removed_id])
+
+
+class EnrollmentTransitionTests(TestCase):
+    def setUp(self):
+        self.first = make_batch(number=1)
+        self.second = make_batch(self.first.course, self.first.teacher, number=2)
+        self.enrollments = [
+            make_enrollment(make_student(f"S{i}"), batch) for i, batch in enumerate([self.first, self.first, self.second])
+        ]
+        self.client = admin_client()
+
+    def transition(self, query="", **body):
+        return self.client.post(f"/api/v1/enrollments/transition/{query}", body, format="json")
+
+    def statuses(self):
+        return list(Enrollment.objects.order_by("pk").values_list("status", flat=True))
+
+    def test_filters_narrow_the_update(self):
+        response = self.transition(f"?batch={self.first.pk}", status="dropped")
+        self.assertEqual(response.json(), {"status": "dropped", "updated": 2})
+        self.assertEqual(self.statuses(), ["dropped", "dropped", "enrolled"])
+
+    def test_ids_select_the_rows(self):
+        self.transition(status="completed", ids=[self.enrollments[2].pk])
+        self.assertEqual(self.statuses(), ["enrolled", "enrolled", "completed"])
+
+    def test_missing_criteria_are_rejected(self):
+        self.assertEqual(self.transition(status="dropped").status_code, 400)
+        self.assertEqual(self.statuses(), ["enrolled"] * 3)
+
+    def test_blank_filter_values_are_not_criteria(self):
+        for query in ("?batch=", "?student_name=&status=", "?search=%20"):
+            with self.subTest(query=query):
+                self.assertEqual(self.transition(query, status="dropped").status_code, 400)
+        self.assertEqual(self.statuses(), ["enrolled"] * 3)
+
+    def test_invalid_filter_values_are_rejected(self):
+        self.assertEqual(self.transition("?batch=999", status="dropped").status_code, 400)
+        self.assertEqual(self.statuses(), ["enrolled"] * 3)
+
+    def test_search_counts_as_criteria(self):
+        response = self.transition(f"?search={self.enrollments[0].roll_number}", status="dropped")
+        self.assertEqual(response.json()["updated"], 1)
+
+
+class BulkEnrollmentTests(TestCase):
+    def setUp(self):
+        self.batch = make_batch()
+        self.students = [make_student(f"S{i}") for i in range(3)]
+        self.client = admin_client()
+
+    def bulk(self, items):
+        return self.client.post("/api/v1/enrollments/bulk/", {"enrollments": items}, format="json")
+
+    def test_enrolls_the_whole_cohort(self):
+        items = [{"student": student.pk, "batch": self.batch.pk} for student in self.students]
+        items[0]["fee_type"] = "installment"
+        response = self.bulk(items)
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.json()["created"], 3)
+        self.batch.refresh_from_db()
+        self.assertEqual(self.batch.enrolled_count, 3)
+        self.assertTrue(Enrollment.objects.get(student=self.students[0]).installments.exists())
+        self.assertEqual(
+            sorted(Enrollment.objects.values_list("roll_number", flat=True)),
+            [f"{self.batch.batch_code}-{n:04d}" for n in (1, 2, 3)],
+        )
+
+    def test_one_invalid_item_rejects_everything(self):
+        response = self.bulk([
+            {"student": self.students[0].pk, "batch": self.batch.pk},
+            {"student": 999, "batch": self.batch.pk},
+        ])
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json(), {"enrollments": {"1": ["Unknown student."]}})
+        self.assertFalse(Enrollment.objects.exists())
+
+    def test_items_count_against_each_other(self):
+        response = self.bulk([{"student": self.students[0].pk, "batch": self.batch.pk}] * 2)
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("1", response.json()["enrollments"])
+        self.batch.refresh_from_db()
+        self.assertEqual(self.batch.enrolled_count, 0)
+
+    def test_batch_capacity_is_enforced(self):
+        with mock.patch.object(Enrollment, "BATCH_CAPACITY", 2):
+            response = self.bulk([{"student": student.pk, "batch": self.batch.pk} for student in self.students])
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("already full", response.json()["enrollments"]["2"][0])
+
+
+class EnrollmentCounterTests(TestCase):
+    def setUp(self):
+        self.teacher = make_teacher()
+        self.batch = make_batch(teacher=self.teacher)
+        self.student = make_student()
+
+    def assertCounts(self, enrolled, courses):
+        self.batch.refresh_from_db()
+        self.student.refresh_from_db()
+        self.assertEqual((self.batch.enrolled_count, self.student.course_count), (enrolled, courses))
+
+    def test_saving_with_deferred_ids_keeps_counters(self):
+        enrollment = make_enrollment(self.student, self.batch)
+        deferred = Enrollment.objects.only("id", "status").get(pk=enrollment.pk)
+        deferred.status = "completed"
+        deferred.save()
+        self.assertCounts(1, 1)
+
+    def test_moving_batch_with_deferred_ids(self):
+        enrollment = make_enrollment(self.student, self.batch)
+        other = make_batch(make_course("Django"), self.teacher)
+        deferred = Enrollment.objects.only("id").get(pk=enrollment.pk)
+        deferred.batch_id = other.pk
+        deferred.save()
+        self.assertCounts(0, 1)
+        other.refresh_from_db()
+        self.assertEqual(other.enrolled_count, 1)
+
+    def test_delete_with_deferred_ids_releases_places(self):
+        enrollment = make_enrollment(self.student, self.batch)
+        Enrollment.objects.only("id").get(pk=enrollment.pk).delete()
+        self.assertCounts(0, 0)
+
+    def test_full_batch_rejects_enrollment(self):
+        with mock.patch.object(Enrollment, "BATCH_CAPACITY", 1):
+            make_enrollment(self.student, self.batch)
+            with self.assertRaisesMessage(ValidationError, "already full"):
+                make_enrollment(make_student("Other"), self.batch)
+        self.assertCounts(1, 1)
+
+    def test_migration_refuses_batches_over_capacity(self):
+        migration = importlib.import_module("student_record.migrations.0012_enrollment_counters")
+        make_enrollment(self.student, self.batch)
+        migration.check_enrollment_limits(apps, None)
+        # bulk_create skips reserve_places(), as data written before the counters existed did.
+        Enrollment.objects.bulk_create(
+            Enrollment(student=make_student(f"Student {n}"), batch=self.batch, roll_number=f"R{n}")
+            for n in range(Enrollment.BATCH_CAPACITY)
+        )
+        with self.assertRaisesMessage(ValueError, f"Batch {self.batch.pk} has 11 enrollments (limit 10)"):
+            migration.check_enrollment_limits(apps, None)
+
+
+@skipUnlessDBFeature("has_select_for_update")
+class EnrollmentRaceTests(TransactionTestCase):
+    def race(self, placements):
+        start = threading.Event()
+
+        def enroll(placement):
+            start.wait()
+            try:
+                Enrollment.objects.create(student_id=placement[0], batch_id=placement[1])
+                return "created"
+            except ValidationError:
+                return "rejected"
+            finally:
+                connections.close_all()
+
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            futures = [executor.submit(enroll, placement) for placement in placements]
+            start.set()
+            return [future.result() for future in futures]
+
+    def test_batch_capacity_holds(self):
+        batch = make_batch()
+        students = [make_student(f"Racer {i}") for i in range(Enrollment.BATCH_CAPACITY + 6)]
+        outcomes = self.race([(student.pk, batch.pk) for student in students])
+        batch.refresh_from_db()
+        self.assertEqual(outcomes.count("created"), Enrollment.BATCH_CAPACITY)
+        self.assertEqual(batch.enrolled_count, batch.enrollments.count())
+
+    def test_course_limit_holds(self):
+        teacher = make_teacher()
+        batches = [make_batch(make_course(f"Course {i}"), teacher) for i in range(Enrollment.MAX_COURSES_PER_STUDENT + 3)]
+        student = make_student()
+        outcomes = self.race([(student.pk, batch.pk) for batch in batches])
+        student.refresh_from_db()
+        self.assertEqual(outcomes.count("created"), Enrollment.MAX_COURSES_PER_STUDENT)
+        self.assertEqual(student.course_count, student.enrollments.count())
+
+
+class PrincipalTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user("kid", "kid@example.com", "secret")
+        Profile.objects.create(user=self.user, role="student")
+        self.student = make_student("Kid")
+        self.student.user = self.user
+        self.student.save()
+
+    def request(self, session=None):
+        request = RequestFactory().get("/")
+        request.user = self.user
+        if session is not None:
+            request.session = session
+        return request
+
+    def test_resolves_role_and_ids_in_one_query(self):
+        with self.assertNumQueries(1):
+            principal = resolve_principal(self.request())
+        self.assertEqual(principal.as_dict(), {"role": "student", "student_id": self.student.pk, "teacher_id": None})
+        self.assertFalse(principal.is_admin)
+
+    @override_settings(PRINCIPAL_SESSION_TTL=60)
+    def test_session_keeps_the_principal_for_the_ttl(self):
+        session = {}
+        resolve_principal(self.request(session))
+        self.assertEqual(session[SESSION_KEY]["role"], "student")
+        with self.assertNumQueries(0):
+            self.assertEqual(resolve_principal(self.request(session)).student_id, self.student.pk)
+
+        session[SESSION_KEY]["expires"] = 0
+        with self.assertNumQueries(1):
+            resolve_principal(self.request(session))
+
+    def test_views_resolve_the_principal_once_per_request(self):
+        self.client.force_login(self.user)
+        with mock.patch("student_record.middleware.resolve_principal", wraps=resolve_principal) as resolve:
+            response = self.client.get("/students/")
+        self.assertRedirects(response, "/students/student-dashboard/", fetch_redirect_response=False)
+        self.assertEqual(resolve.call_count, 1)
+
+    def test_anonymous_users_have_no_role(self):
+        request = RequestFactory().get("/")
+        request.user = AnonymousUser()
+        with self.assertNumQueries(0):
+            self.assertIsNone(resolve_principal(request).role)
+
+
+class ProvisionAccountsTests(TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory = Path(directory.name)
+
+    def provision(self, role, text):
+        path = self.directory / "accounts.csv"
+        path.write_text(text)
+        out, err = io.StringIO(), io.StringIO()
+        call_command("provision_accounts", str(path), role=role, workers=1, stdout=out, stderr=err)
+        return out.getvalue(), err.getvalue()
+
+    def test_creates_students_with_accounts(self):
+        out, err = self.provision("student", "name,email,age\nAda,ada@example.com,20\nBob,bob@example.com,21\n")
+        self.assertEqual(err, "")
+        self.assertIn("Created 2 student accounts", out)
+        student = Student.objects.get(email="ada@example.com")
+        self.assertEqual(student.user.username, "ada")
+        self.assertEqual(student.user.profile.role, "student")
+        self.assertTrue(student.user.check_password("ada123"))
+
+    def test_existing_teacher_email_is_a_row_error(self):
+        make_teacher("Grace", email="grace@example.com")
+        out, err = self.provision("teacher", "name,email\nGrace,grace@example.com\nAlan,alan@example.com\n")
+        self.assertIn("line 2: username grace or email grace@example.com is already in use", err)
+        self.assertIn("Created 1 teacher accounts", out)
+        self.assertEqual(Teacher.objects.filter(email="grace@example.com").count(), 1)
+
+    def test_duplicates_within_the_file_are_skipped(self):
+        out, err = self.provision("student", "name,email,age\nAda,ada@example.com,20\nAda,ada@example.com,20\n")
+        self.assertIn("line 3:", err)
+        self.assertEqual(Student.objects.count(), 1)
+
+
+class ImportRecordsTests(TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory = Path(directory.name)
+
+    def import_records(self, kind, text):
+        path = self.directory / f"{kind}.csv"
+        path.write_text(text)
+        call_command("import_records", kind, str(path), workers=1, stdout=io.StringIO())
+        with open(f"{path}.errors.csv", newline="") as source:
+            return list(csv.reader(source))[1:]
+
+    def test_errors_report_physical_line_numbers(self):
+        errors = self.import_records(
+            "students", 'name,email,age\n"Ada\nLovelace",ada@example.com,20\nBob,bob@example.com,\n'
+        )
+        self.assertEqual([line for line, _ in errors], ["4"])
+        self.assertTrue(Student.objects.filter(email="ada@example.com").exists())
+
+    def test_teacher_rows_share_the_provisioning_checks(self):
+        course = make_course()
+        make_teacher("Grace", email="grace@example.com")
+        errors = self.import_records("teachers", (
+            "name,email,courses\n"
+            f"Alan,alan@example.com,{course.course_code}\n"
+            "Grace,grace@example.com,\n"
+            "Edsger,edsger@example.com,CRS-99\n"
+            "Alan,alan@example.com,\n"
+        ))
+        self.assertEqual(errors, [
+            ["3", "username grace or email grace@example.com is already in use"],
+            ["4", "unknown course code(s): CRS-99"],
+            ["5", "username alan or email alan@example.com is already in use"],
+        ])
+        self.assertEqual(list(Teacher.objects.get(email="alan@example.com").courses.all()), [course])
+
+
+class DumpLoadTests(TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = str(Path(directory.name) / "records.ndjson.gz")
+
+        self.user = User.objects.create_user("clerk", "clerk@example.com", "secret")
+        self.group = Group.objects.create(name="Clerks")
+        self.group.permissions.add(Permission.objects.get(codename="view_student"))
+        self.user.groups.add(self.group)
+        self.user.user_permissions.add(Permission.objects.get(codename="change_student"))
+        self.token = Token.objects.create(user=self.user)
+        self.enrollment = make_enrollment(fee_type="installment")
+
+    def snapshot(self):
+        enrollment = Enrollment.objects.select_related("batch", "student").get()
+        return {
+            "users": list(User.objects.values_list("username", "password")),
+            "groups": list(self.user.groups.values_list("name", flat=True)),
+            "permissions": sorted(self.user.get_all_permissions()),
+            "tokens": list(Token.objects.values_list("key", "user__username")),
+            "enrollment": (enrollment.roll_number, enrollment.updated_at, enrollment.installments.count()),
+            "counters": (enrollment.batch.enrolled_count, enrollment.student.course_count),
+        }
+
+    def round_trip(self):
+        call_command("dump_records", self.path, stdout=io.StringIO())
+        call_command("load_records", self.path, flush=True, stdout=io.StringIO())
+
+    def test_flush_and_load_restores_the_dump(self):
+        before = self.snapshot()
+        self.round_trip()
+        self.user = User.objects.get(username="clerk")
+        self.assertEqual(self.snapshot(), before)
+        self.assertEqual(self.user.auth_token.key, self.token.key)
+
+    @override_settings(AUTH_TOKEN_CACHE=True)
+    def test_load_invalidates_cached_responses_and_principals(self):
+        cache.clear()
+        call_command("dump_records", self.path, stdout=io.StringIO())
+        before = model_versions([Course, User])
+        self.token.delete()
+        Token.objects.create(user=self.user, key="replaced")
+        principal_cache.set("replaced", (self.user, self.token))
+
+        call_command("load_records", self.path, flush=True, stdout=io.StringIO())
+        self.assertEqual([version for version, _ in model_versions([Course, User])], [v + 1 for v, _ in before])
+        self.assertIsNone(principal_cache.get("replaced"))
+        self.assertEqual(APIClient(HTTP_AUTHORIZATION="Token replaced").get("/api/v1/courses/").status_code, 403)
+
+    def test_flush_leaves_tables_outside_the_dump(self):
+        LogEntry.objects.create(user=self.user, action_flag=ADDITION, object_repr="clerk")
+        self.round_trip()
+        self.assertEqual(LogEntry.objects.get().user_id, self.user.pk)
+
+    def test_refuses_to_load_over_existing_rows(self):
+        call_command("dump_records", self.path, stdout=io.StringIO())
+        with self.assertRaisesMessage(CommandError, "use flush to replace them"):
+            call_command("load_records", self.path, stdout=io.StringIO())
+
+
+class GenerateDatasetTests(TestCase):
+    def snapshot(self):
+        return (
+            list(Course.objects.order_by("course_code").values_list("course_code", "title", "level")),
+            list(Enrollment.objects.order_by("roll_number").values_list("roll_number", "status", "fee_type", "paid_amount")),
+            Installment.objects.count(),
+        )
+
+    def test_seeding_invalidates_cached_responses(self):
+        before = model_versions([User, Course, Batch, Teacher])
+        generate_dataset(scale=0.01)
+        after = model_versions([User, Course, Batch, Teacher])
+        self.assertEqual([version for version, _ in after], [version + 1 for version, _ in before])
+
+    def test_counters_and_limits_match_the_rows(self):
+        totals = generate_dataset(scale=0.05)
+        self.assertEqual(totals["courses"], 5)
+        self.assertEqual(totals["enrollments"], Enrollment.objects.count())
+        for batch in Batch.objects.annotate(actual=Count("enrollments")):
+            self.assertEqual(batch.enrolled_count, batch.actual)
+            self.assertLessEqual(batch.actual, Enrollment.BATCH_CAPACITY)
+        for student in Student.objects.annotate(actual=Count("enrollments")):
+            self.assertEqual(student.course_count, student.actual)
+            self.assertLessEqual(student.actual, Enrollment.MAX_COURSES_PER_STUDENT)
+
+    def test_same_seed_gives_the_same_rows(self):
+        generate_dataset(scale=0.05, seed=3)
+        first = self.snapshot()
+        for model in (Enrollment, Batch, Course, Student, Teacher, User, CodeSequence):
+            model.objects.all().delete()
+        generate_dataset(scale=0.05, seed=3)
+        self.assertEqual(self.snapshot(), first)
+
+    def test_app_enrollments_continue_the_roll_numbers(self):
+        generate_dataset(scale=0.01)
+        batch = Batch.objects.filter(enrolled_count__lt=Enrollment.BATCH_CAPACITY).first()
+        student = Student.objects.exclude(enrollments__batch__course=batch.course).filter(
+            course_count__lt=Enrollment.MAX_COURSES_PER_STUDENT
+        ).first()
+        enrollment = make_enrollment(student, batch)
+        self.assertEqual(enrollment.roll_number, f"{batch.batch_code}-{batch.enrolled_count + 1:04d}")
+
+    def test_command_refuses_a_seed_already_loaded(self):
+        call_command("generate_dataset", scale=0.01, stdout=io.StringIO())
+        with self.assertRaisesMessage(CommandError, "seed 0 already exists"):
+            call_command("generate_dataset", scale=0.01, stdout=io.StringIO())
+
+
+class BenchRoutesTests(TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory = Path(directory.name)
+        # The test database already isolates the run.
+        patcher = mock.patch(
+            "student_record.management.commands.bench_routes.isolated_database", contextlib.nullcontext
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def bench(self, *args):
+        with override_settings(BENCH_DIR=self.directory / "bench"):
+            call_command("bench_routes", "--scale=0.01", "--repeat=1", "--routes=^admin /students/courses/$",
+                         *args, stdout=io.StringIO(), stderr=io.StringIO())
+
+    def test_report_and_baseline_go_to_the_bench_dir(self):
+        self.bench("--update-baseline")
+        report = json.loads((self.directory / "bench" / "bench_routes.json").read_text())
+        self.assertEqual(list(report["routes"]), ["admin /students/courses/"])
+        self.assertEqual(report["routes"]["admin /students/courses/"]["status"], 200)
+        self.assertGreater(report["routes"]["admin /students/courses/"]["queries"], 0)
+        self.assertTrue((self.directory / "bench" / "bench_routes_baseline.json").exists())
+
+    def test_request_logging_is_restored_after_a_failure(self):
+        with mock.patch(
+            "student_record.management.commands.bench_routes.generate_dataset", side_effect=RuntimeError("boom")
+        ), self.assertRaisesMessage(RuntimeError, "boom"):
+            self.bench()
+        self.assertFalse(logging.getLogger("django.request").disabled)
+
+    def test_more_queries_than_the_baseline_is_a_regression(self):
+        (self.directory / "bench").mkdir()
+        (self.directory / "bench" / "bench_routes_baseline.json").write_text(json.dumps({
+            "dataset": {"scale": 0.01, "seed": 0},
+            "routes": {"admin /students/courses/": {"status": 200, "queries": 0, "p50_ms": 1e6, "peak_kb": 1e6}},
+        }))
+        with self.assertRaisesMessage(CommandError, "admin /students/courses/: 0 ->"):
+            self.bench()
+
+
+class MetricsViewTests(TestCase):
+    def test_anonymous_requests_are_denied_without_a_token(self):
+        with override_settings(METRICS_TOKEN=None):
+            self.assertEqual(self.client.get("/metrics").status_code, 403)
+
+    def test_scraper_token(self):
+        with override_settings(METRICS_TOKEN="s3cret"):
+            self.assertEqual(self.client.get("/metrics", HTTP_AUTHORIZATION="Bearer wrong").status_code, 403)
+            response = self.client.get("/metrics", HTTP_AUTHORIZATION="Bearer s3cret")
+        self.assertEqual(response.status_code, 200)
+        self.assertIn("student_record_requests_total", response.content.decode())
+
+    def test_admins_can_read_without_a_token(self):
+        self.client.force_login(User.objects.create_superuser("admin", "admin@example.com", "secret"))
+        with override_settings(METRICS_TOKEN=None):
+            self.assertEqual(self.client.get("/metrics").status_code, 200)
+
+    def test_other_users_are_denied(self):
+        self.client.force_login(User.objects.create_user("kid", "kid@example.com", "secret"))
+        with override_settings(METRICS_TOKEN=None):
+            self.assertEqual(self.client.get("/metrics").status_code, 403)
+
+
+class QueryMetricsTests(TestCase):
+    def setUp(self):
+        registry.clear()
+        self.client.force_login(User.objects.create_superuser("admin", "admin@example.com", "secret"))
+
+    def test_requests_are_counted_per_route(self):
+        self.client.get("/students/courses/")
+        metrics = registry.render()
+        self.assertIn('student_record_requests_total{method="GET",route="students/courses/",status="200"} 1', metrics)
+        self.assertIn('student_record_request_queries_count{route="students/courses/"} 1', metrics)
+
+    @override_settings(SQL_METRICS_DUPLICATE_THRESHOLD=3)
+    def test_repeated_statements_are_flagged(self):
+        teacher = make_teacher()
+        for number in range(1, 4):
+            make_batch(make_course(f"Course {number}"), teacher, number=number)
+        # The batch list renders each batch's course and teacher.
+        with mock.patch("django.db.models.QuerySet.select_related", lambda queryset, *fields: queryset):
+            self.client.get("/students/batches/")
+        self.assertIn('student_record_repeated_statements_total{route="students/batches/"', registry.render())
+
+    def test_in_lists_share_a_signature(self):
+        self.assertEqual(
+            statement_signature("SELECT 1 WHERE id IN (%s, %s)")[0], statement_signature("SELECT 1 WHERE id IN (%s)")[0],
+        )
+
+
+class ProfilerTests(TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        settings_override = override_settings(PROFILER_DIR=Path(directory.name), PROFILER_SAMPLE_RATE=0.0)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        self.admin = User.objects.create_superuser("admin", "admin@example.com", "secret")
+
+    def test_admins_can_profile_a_request(self):
+        self.client.force_login(self.admin)
+        response = self.client.get("/students/courses/", HTTP_X_PROFILE="1")
+        name = response["X-Profile-Id"]
+        [entry] = captured_profiles()
+        self.assertEqual((entry["name"], entry["route"], entry["status"]), (name, "students/courses/", 200))
+
+        download = self.client.get(f"/students/profiles/{name}")
+        self.assertEqual(download.status_code, 200)
+        self.assertEqual(self.client.get("/students/profiles/..%2Findex.ndjson").status_code, 404)
+
+    def test_header_is_ignored_for_other_users(self):
+        self.client.force_login(User.objects.create_user("kid", "kid@example.com", "secret"))
+        response = self.client.get("/students/courses/", HTTP_X_PROFILE="1")
+        self.assertFalse(response.has_header("X-Profile-Id"))
+        self.assertEqual(captured_profiles(), [])
+
+    @override_settings(PROFILER_MAX_PROFILES=2)
+    def test_only_the_newest_profiles_are_kept(self):
+        names = [store_profile(Counter({"main;view": 1}), duration_ms=n) for n in range(3)]
+        self.assertEqual([entry["name"] for entry in captured_profiles()], [names[2], names[1]])
+
+
+class SlowQueryLogTests(TestCase):
+    sql = 'SELECT "id" FROM "student_record_student" WHERE "email" = %s'
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = Path(directory.name) / "slow.ndjson"
+
+    def record(self, **settings):
+        with override_settings(SLOW_QUERY_LOG=self.path, SLOW_QUERY_EXPLAIN_RATE=1.0, **settings), \
+                self.assertLogs("student_record.slow_queries", "WARNING"):
+            SlowQueryLogger(connection).record(self.sql, ["ada@example.com" + "x" * 200], False, 250.0)
+        return json.loads(self.path.read_text().splitlines()[-1])
+
+    def test_parameters_and_plans_are_left_out_by_default(self):
+        entry = self.record()
+        self.assertEqual((entry["sql"], entry["duration_ms"]), (self.sql, 250.0))
+        self.assertIsNone(entry["params"])
+        self.assertNotIn("plan", entry)
+        self.assertNotIn("ada@example.com", self.path.read_text())
+
+    def test_parameters_are_logged_when_enabled(self):
+        entry = self.record(SLOW_QUERY_LOG_PARAMS=True)
+        self.assertEqual(entry["params"], [("ada@example.com" + "x" * 200)[:100]])
+        self.assertIn("plan", entry)
+
+
+class QueryPlanTests(TestCase):
+    def test_hot_querysets_use_indexes(self):
+        out = io.StringIO()
+        with mock.patch(
+            "student_record.management.commands.check_query_plans.isolated_database", contextlib.nullcontext
+        ):
+            call_command("check_query_plans", scale=0.05, stdout=out)
+        self.assertNotIn("SEQ SCAN", out.getvalue())
+
+    def test_unindexed_filters_are_reported(self):
+        if connection.vendor == "postgresql":
+            # As in the command: tiny tables are scanned whatever their indexes.
+            with connection.cursor() as cursor:
+                cursor.execute("SET LOCAL enable_seqscan = off")
+        self.assertEqual(sequential_scans(Installment.objects.filter(amount=5)), ["student_record_installment"])
+        self.assertEqual(sequential_scans(Installment.objects.filter(pk=5)), [])
+
+
+class TracingTests(TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = Path(directory.name) / "traces.ndjson"
+        settings_override = override_settings(TRACING_FILE=self.path, TRACING_SAMPLE_RATE=0.0)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+    def spans(self):
+        [line] = self.path.read_text().splitlines()
+        return json.loads(line)["resourceSpans"][0]["scopeSpans"][0]["spans"]
+
+    def test_admin_requests_are_traced_by_layer(self):
+        self.client.force_login(User.objects.create_superuser("admin", "admin@example.com", "secret"))
+        make_course()
+        response = self.client.get("/students/courses/", HTTP_X_TRACE="1")
+        spans = self.spans()
+        self.assertEqual({item["traceId"] for item in spans}, {response["X-Trace-Id"]})
+        self.assertEqual(spans[0]["name"], "GET students/courses/")
+        layers = {
+            attribute["value"]["stringValue"] for item in spans for attribute in item["attributes"]
+            if attribute["key"] == "student_record.layer"
+        }
+        self.assertLessEqual({"request", "view", "sql", "template"}, layers)
+
+        out = io.StringIO()
+        call_command("trace_report", stdout=out)
+        self.assertIn("GET students/courses/: 1 traces", out.getvalue())
+
+    def test_header_is_ignored_for_other_users(self):
+        self.client.force_login(User.objects.create_user("kid", "kid@example.com", "secret"))
+        response = self.client.get("/students/courses/", HTTP_X_TRACE="1")
+        self.assertFalse(response.has_header("X-Trace-Id"))
+        self.assertFalse(self.path.exists())
+
+    @override_settings(TRACING_MAX_SPANS=3)
+    def test_spans_past_the_limit_are_counted(self):
+        with start_trace("job") as trace:
+            for n in range(5):
+                with span(f"step {n}"):
+                    pass
+        self.assertEqual(len(trace.spans), 3)
+        self.assertEqual(trace.spans[0].attributes["student_record.dropped_spans"], 3)
+
+
+class MemoryBudgetTests(TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = Path(directory.name) / "memory.ndjson"
+        settings_override = override_settings(MEMORY_LOG=self.path, MEMORY_SAMPLE_RATE=0.0)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        self.client.force_login(User.objects.create_superuser("admin", "admin@example.com", "secret"))
+
+    def measure(self):
+        return self.client.get("/students/courses/", HTTP_X_MEMORY_PROFILE="1")
+
+    def test_flagged_requests_are_measured(self):
+        response = self.measure()
+        [entry] = [json.loads(line) for line in self.path.read_text().splitlines()]
+        self.assertEqual(entry["peak_bytes"], int(response["X-Memory-Peak"]))
+        self.assertEqual(entry["view"], "student_record.views.course_list")
+        self.assertEqual(entry["templates"][0]["template"], "pages/course_list.html")
+        self.assertFalse(entry["over_budget"])
+        self.assertFalse(tracemalloc.is_tracing())
+
+    @override_settings(MEMORY_BUDGET_MB=0.001)
+    def test_over_budget_requests_are_logged_with_their_sites(self):
+        with self.assertLogs("student_record.memory", "WARNING") as logs:
+            self.measure()
+        self.assertIn("over its 0.0 MiB budget", logs.output[0])
+        entry = json.loads(self.path.read_text())
+        self.assertTrue(entry["over_budget"])
+        self.assertTrue(entry["sites"])
+
+    def test_running_tracer_disables_measurement_with_a_warning(self):
+        tracemalloc.start()
+        self.addCleanup(tracemalloc.stop)
+        with self.assertLogs("student_record.memory", "WARNING") as logs:
+            response = self.measure()
+        self.assertIn("not measured", logs.output[0])
+        self.assertFalse(response.has_header("X-Memory-Peak"))
+        self.assertFalse(self.path.exists())
+
+
+@override_settings(LIST_PAGE_SIZE=2)
+class EnrollmentListPaginationTests(TestCase):
+    def setUp(self):
+        teacher = make_teacher()
+        self.batches = [
+            make_batch(Course.objects.create(title=title, description=title, course_code=code), teacher)
+            for title, code in (("Late", "CRS-100"), ("Early", "CRS-11"))
+        ]
+        self.enrollments = [
+            make_enrollment(make_student(f"S{batch.pk}-{n}"), batch) for batch in self.batches for n in range(3)
+        ]
+        self.client.force_login(User.objects.create_superuser("admin", "admin@example.com", "secret"))
+
+    def walk(self, sort):
+        seen, query = [], f"?sort={sort}"
+        while True:
+            page = self.client.get(f"/students/enrollments/{query}").context["page"]
+            seen += [enrollment.roll_number for enrollment in page]
+            if not page.has_next:
+                return seen
+            query = f"?sort={sort}&after={page.next_cursor}"
+
+    def test_roll_number_sort_keeps_batches_in_roll_order(self):
+        by_batch = [enrollment.roll_number for enrollment in self.enrollments]
+        self.assertEqual(self.walk("roll_number"), by_batch)
+        self.assertEqual(self.walk("-roll_number"), by_batch[::-1])
+
+    def test_pages_do_not_shift_when_earlier_rows_are_removed(self):
+        first = self.client.get("/students/enrollments/?sort=roll_number").context["page"]
+        self.enrollments[0].delete()
+        second = self.client.get(f"/students/enrollments/?sort=roll_number&after={first.next_cursor}").context["page"]
+        self.assertEqual(
+            [enrollment.roll_number for enrollment in second],
+            [enrollment.roll_number for enrollment in self.enrollments[2:4]],
+        )
+
+
+class AutocompleteTests(TestCase):
+    def setUp(self):
+        self.teacher = make_teacher()
+        self.batch = make_batch(teacher=self.teacher)
+        self.other = make_batch(make_course("Django"), make_teacher("Other"))
+        self.ada = make_enrollment(make_student("Ada"), self.batch).student
+        self.adam = make_enrollment(make_student("Adam"), self.other).student
+        self.bada = make_enrollment(make_student("Bada"), self.batch).student
+        admin = User.objects.create_superuser("admin", "admin@example.com", "secret")
+        Profile.objects.create(user=admin, role="admin")
+        self.client.force_login(admin)
+
+    def lookup(self, source, **params):
+        response = self.client.get(f"/students/ajax/autocomplete/{source}/", params)
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def test_prefix_matches_come_first(self):
+        data = self.lookup("students", q="ada")
+        self.assertEqual([item["id"] for item in data["results"]][:2], [self.ada.pk, self.adam.pk])
+        self.assertIn(self.bada.pk, [item["id"] for item in data["results"]])
+
+    @override_settings(AUTOCOMPLETE_PAGE_SIZE=2)
+    def test_results_are_paged(self):
+        first, second = self.lookup("students"), self.lookup("students", page=2)
+        self.assertTrue(first["pagination"]["more"])
+        self.assertFalse(second["pagination"]["more"])
+        self.assertEqual(len(first["results"] + second["results"]), 3)
+
+    def test_forwarded_batch_narrows_students(self):
+        ids = [item["id"] for item in self.lookup("students", batch=self.batch.pk)["results"]]
+        self.assertEqual(sorted(ids), sorted([self.ada.pk, self.bada.pk]))
+
+    def test_teachers_only_see_their_students(self):
+        user = User.objects.create_user("teach", "teach@example.com", "secret")
+        Profile.objects.create(user=user, role="teacher")
+        self.teacher.user = user
+        self.teacher.save()
+        self.client.force_login(user)
+        ids = [item["id"] for item in self.lookup("students")["results"]]
+        self.assertEqual(sorted(ids), sorted([self.ada.pk, self.bada.pk]))
+        self.assertEqual(self.client.get("/students/ajax/autocomplete/users/").status_code, 404)
+
+    def test_widgets_render_only_selected_choices(self):
+        lesson = Lesson.objects.create(title="Intro", content="Hello", batch=self.batch)
+        lesson.students.add(self.ada)
+        form = LessonForm(instance=lesson, principal=Principal(role="admin"))
+        html = str(form["students"])
+        self.assertIn(f'<option value="{self.ada.pk}" selected>', html)
+        self.assertNotIn(f'value="{self.bada.pk}"', html)
+        self.assertIn('data-autocomplete-forward="batch"', html)
+        self.assertFalse(LessonForm(instance=lesson, principal=Principal(role="admin"), data={
+            "title": "Intro", "content": "Hello", "batch": self.batch.pk, "students": [999],
+        }).is_valid())
+
+    def test_send_lesson_page_uses_the_autocomplete_widget(self):
+        content = self.client.get("/students/send-lesson/").content.decode()
+        self.assertIn('name="students"', content)
+        self.assertIn("assets/js/autocomplete.js", content)
+        self.assertNotIn("loadStudents", content)
+        self.assertNotIn("code.jquery.com", content)
+
+    def test_send_lesson_saves_the_chosen_students(self):
+        response = self.client.post("/students/send-lesson/", {
+            "title": "Intro", "content": "Hello", "batch": self.batch.pk, "students": [self.ada.pk],
+        })
+        self.assertRedirects(response, "/students/send-lesson/", fetch_redirect_response=False)
+        self.assertEqual(list(Lesson.objects.get().students.all()), [self.ada])
@@ -0,0 +1,212 @@
+import functools
+import json
+import os
+import re
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from pathlib import Path
+
+from django.conf import settings
+
+from .metrics import statement_signature
+
+# OTLP span kinds.
+INTERNAL, SERVER, CLIENT = 1, 2, 3
+LAYER_KINDS = {"request": SERVER, "sql": CLIENT}
+
+_trace = ContextVar("trace", default=None)
+_span = ContextVar("span", default=None)
+_write_lock = threading.Lock()
+_SQL_TABLE = re.compile(r'\b(?:FROM|INTO|UPDATE)\s+"?(\w+)', re.IGNORECASE)
+
+
+def trace_file_path():
+    return Path(getattr(settings, "TRACING_FILE", Path(settings.BASE_DIR) / "traces.ndjson"))
+
+
+class Span:
+    __slots__ = ("name", "layer", "span_id", "parent_id", "attributes", "start_ns", "end_ns", "error")
+
+    def __init__(self, name, layer, parent, attributes):
+        self.name = name
+        self.layer = layer
+        self.span_id = os.urandom(8).hex()
+        self.parent_id = parent.span_id if parent is not None else None
+        self.attributes = attributes
+        self.start_ns = time.time_ns()
+        self.end_ns = None
+        self.error = None
+
+    def finish(self):
+        self.end_ns = time.time_ns()
+
+    def as_otlp(self, trace_id):
+        attributes = {"student_record.layer": self.layer, **self.attributes}
+        span = {
+            "traceId": trace_id,
+            "spanId": self.span_id,
+            "name": self.name,
+            "kind": LAYER_KINDS.get(self.layer, INTERNAL),
+            "startTimeUnixNano": str(self.start_ns),
+            "endTimeUnixNano": str(self.end_ns or self.start_ns),
+            "attributes": [{"key": key, "value": _otlp_value(value)} for key, value in attributes.items()],
+            "status": {"code": 2, "message": self.error} if self.error else {},
+        }
+        if self.parent_id:
+            span["parentSpanId"] = self.parent_id
+        return span
+
+
+def _otlp_value(value):
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        return {"intValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    return {"stringValue": str(value)}
+
+
+class Trace:
+    """The spans of one request; spans past ``max_spans`` are counted but not kept."""
+
+    def __init__(self, max_spans):
+        self.trace_id = os.urandom(16).hex()
+        self.max_spans = max_spans
+        self.spans = []
+        self.dropped = 0
+
+    def start(self, name, layer, parent, attributes):
+        if len(self.spans) >= self.max_spans:
+            self.dropped += 1
+            return None
+        span = Span(name, layer, parent, attributes)
+        self.spans.append(span)
+        return span
+
+    def as_otlp(self):
+        """One OTLP/JSON ``ExportTraceServiceRequest``, the line format of the collector file exporter."""
+        return {"resourceSpans": [{
+            "resource": {"attributes": [{"key": "service.name", "value": {"stringValue": "student_record"}}]},
+            "scopeSpans": [{
+                "scope": {"name": __name__},
+                "spans": [span.as_otlp(self.trace_id) for span in self.spans],
+            }],
+        }]}
+
+
+@contextmanager
+def span(name, layer="internal", **attributes):
+    """Record a child of the active span; does nothing outside a traced request."""
+    trace = _trace.get()
+    current = trace.start(name, layer, _span.get(), attributes) if trace is not None else None
+    if current is None:
+        yield None
+        return
+
+    token = _span.set(current)
+    try:
+        yield current
+    except BaseException as exc:
+        current.error = type(exc).__name__
+        raise
+    finally:
+        _span.reset(token)
+        current.finish()
+
+
+@contextmanager
+def start_trace(name, **attributes):
+    """Make a new trace the active one for the block, with a root ``request`` span."""
+    trace = Trace(getattr(settings, "TRACING_MAX_SPANS", 5000))
+    root = trace.start(name, "request", None, attributes)
+    trace_token, span_token = _trace.set(trace), _span.set(root)
+    try:
+        yield trace
+    finally:
+        _span.reset(span_token)
+        _trace.reset(trace_token)
+        root.finish()
+        if trace.dropped:
+            root.attributes["student_record.dropped_spans"] = trace.dropped
+
+
+def export(trace):
+    path = trace_file_path()
+    with _write_lock:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with open(path, "a") as target:
+            target.write(json.dumps(trace.as_otlp()) + "\n")
+
+
+def trace_sql(execute, sql, params, many, context):
+    """``execute_wrapper`` recording one ``sql`` span per statement."""
+    if _trace.get() is None:
+        return execute(sql, params, many, context)
+    signature, _ = statement_signature(sql)
+    attributes = {
+        "db.system": context["connection"].vendor,
+        "db.statement": sql[:1000],
+        "db.signature": signature,
+    }
+    table = _SQL_TABLE.search(sql)
+    name = " ".join(filter(None, [sql.split(None, 1)[0].upper() if sql.strip() else "SQL", table and table.group(1)]))
+    with span(name, "sql", **attributes):
+        return execute(sql, params, many, context)
+
+
+def _traced(function, layer, describe):
+    """
+    Wrap ``function`` in a ``layer`` span named by ``describe(*args)``; ``describe`` may
+    return ``None`` to run without a span of its own.
+    """
+    @functools.wraps(function)
+    def wrapper(*args, **kwargs):
+        if _trace.get() is None:
+            return function(*args, **kwargs)
+        name = describe(*args)
+        if name is None:
+            return function(*args, **kwargs)
+        with span(name, layer):
+            return function(*args, **kwargs)
+
+    wrapper.traced = True
+    return wrapper
+
+
+def _patch(owner, attribute, layer, describe):
+    function = getattr(owner, attribute)
+    if not getattr(function, "traced", False):
+        setattr(owner, attribute, _traced(function, layer, describe))
+
+
+def _serializer_name(serializer, *args):
+    # Nested and per-item serializers roll up into the outermost serializer's span.
+    current = _span.get()
+    if current is not None and current.layer == "serializer":
+        return None
+    if hasattr(serializer, "child"):
+        return f"{type(serializer.child).__name__}(many=True).to_representation"
+    return f"{type(serializer).__name__}.to_representation"
+
+
+def instrument():
+    """
+    Open spans around form construction (including queries made in ``__init__``),
+    serializer ``to_representation`` and template rendering. Idempotent; the wrappers
+    cost one context-variable lookup outside traced requests.
+    """
+    from django.forms.forms import DeclarativeFieldsMetaclass
+    from django.template.base import Template
+    from rest_framework.serializers import ListSerializer, Serializer
+
+    # Forms are constructed through their metaclass, so this times the whole __init__ chain.
+    _patch(DeclarativeFieldsMetaclass, "__call__", "form", lambda form_class, *args: f"{form_class.__name__}()")
+    _patch(Serializer, "to_representation", "serializer", _serializer_name)
+    _patch(ListSerializer, "to_representation", "serializer", _serializer_name)
+    _patch(
+        Template, "render", "template",
+        lambda template, *args: f"render {template.origin.template_name or template.name or '<string>'}",
+    )
@@ -0,0 +1,205 @@
+import datetime
+import gzip
+import json
+from decimal import Decimal
+
+from django.contrib.auth.models import Group, User
+from django.core.management.color import no_style
+from django.db import IntegrityError, connection, transaction
+from rest_framework.authtoken.models import Token
+
+from .api.authentication import principal_cache
+from .api.cache import bump_model_version
+from .models import (
+    Batch, CodeSequence, Course, Enrollment, Installment, Lesson, LessonImage, Profile, Student, Teacher, Tombstone,
+)
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+FORMAT = "student_record-ndjson"
+VERSION = 2
+
+
+def transfer_models():
+    """
+    Models in insert order: every foreign key points at a model listed before it, or at
+    ``Permission``, whose rows ``migrate`` creates alike in every environment.
+    """
+    return [
+        User,
+        Group,
+        Group.permissions.through,
+        User.groups.through,
+        User.user_permissions.through,
+        Token,
+        Course,
+        Teacher,
+        Teacher.courses.through,
+        Batch,
+        Student,
+        Profile,
+        Enrollment,
+        Installment,
+        Lesson,
+        Lesson.students.through,
+        LessonImage,
+        CodeSequence,
+        Tombstone,
+    ]
+
+
+def _default(value):
+    if isinstance(value, (datetime.date, datetime.time)):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return str(value)
+    raise TypeError(f"{type(value).__name__} is not JSON serializable")
+
+
+def _dumps(value):
+    if orjson is not None:
+        return orjson.dumps(value, default=_default) + b"\n"
+    return (json.dumps(value, default=_default, ensure_ascii=False, separators=(",", ":")) + "\n").encode()
+
+
+def _loads(line):
+    return orjson.loads(line) if orjson is not None else json.loads(line)
+
+
+def open_dump(path, mode):
+    """Open ``path`` for binary reading or writing, gzip-compressed when it ends in ``.gz``."""
+    return gzip.open(path, mode + "b") if str(path).endswith(".gz") else open(path, mode + "b")
+
+
+def columns(model):
+    return list(model._meta.concrete_fields)
+
+
+def dump(target, chunk_size=2000, progress=None):
+    """
+    Write every ``transfer_models()`` row to the binary file ``target`` as NDJSON.
+
+    The stream is a format header, then per model a ``{"model": ..., "columns": [...]}``
+    line followed by one JSON array per row. Rows are read through server-side cursors in
+    ``chunk_size`` batches inside one transaction (REPEATABLE READ on PostgreSQL), so the
+    dump is a consistent snapshot and memory stays flat however large the tables are.
+    """
+    target.write(_dumps({"format": FORMAT, "version": VERSION}))
+    # Inside a caller's transaction the snapshot is whatever isolation that transaction has.
+    outermost = not connection.in_atomic_block
+    with transaction.atomic():
+        if connection.vendor == "postgresql" and outermost:
+            with connection.cursor() as cursor:
+                cursor.execute("SET TRANSACTION ISOLATION LEVEL REPEATABLE READ")
+
+        for model in transfer_models():
+            fields = columns(model)
+            target.write(_dumps({"model": model._meta.label_lower, "columns": [f.column for f in fields]}))
+            rows = model._base_manager.order_by("pk").values_list(*(f.attname for f in fields))
+            count = 0
+            for row in rows.iterator(chunk_size=chunk_size):
+                target.write(_dumps(row))
+                count += 1
+            if progress:
+                progress(model, count)
+
+
+def load(source, batch_size=2000, flush=False, progress=None):
+    """
+    Insert a ``dump()`` stream into the database in one transaction.
+
+    Rows are inserted as stored, bypassing ``save()``, signals and ``auto_now`` so codes,
+    counters and timestamps survive the trip. PostgreSQL uses ``COPY``; other backends use
+    batched ``executemany`` inserts. Sequences are reset afterwards. ``flush`` first empties
+    the dumped tables only; rows elsewhere that point into them (admin log entries) must
+    still find their targets once the dump is loaded, or nothing is committed.
+
+    As no signal fires, the loaded models' cached responses and the replaced tokens' cached
+    principals are invalidated here once the load commits.
+    """
+    header = _loads(source.readline() or b"{}")
+    if header.get("format") != FORMAT or header.get("version") != VERSION:
+        raise ValueError("Not a student_record dump (or an unsupported version).")
+
+    models = {model._meta.label_lower: model for model in transfer_models()}
+    try:
+        with transaction.atomic():
+            replaced_tokens = list(Token.objects.values_list("key", flat=True)) if flush else []
+            loaded = _load(source, models, batch_size, flush, progress)
+    except IntegrityError as exc:
+        raise ValueError(f"The dump does not fit the target database: {exc}")
+
+    for model in loaded:
+        bump_model_version(model)
+    for key in replaced_tokens:
+        principal_cache.evict(key)
+
+
+def _load(source, models, batch_size, flush, progress):
+    loaded = []
+    if flush:
+        with connection.cursor() as cursor:
+            for model in reversed(transfer_models()):
+                cursor.execute(f"DELETE FROM {connection.ops.quote_name(model._meta.db_table)}")
+    else:
+        non_empty = [label for label, model in models.items() if model._base_manager.exists()]
+        if non_empty:
+            raise ValueError(f"Target tables are not empty ({', '.join(non_empty)}); use flush to replace them.")
+
+    model, fields, pending, count = None, None, [], 0
+    for line in source:
+        record = _loads(line)
+        if isinstance(record, dict):
+            if model is not None:
+                _insert(model, fields, pending)
+                if progress:
+                    progress(model, count)
+            model = models.get(record["model"])
+            if model is None:
+                raise ValueError(f"Unknown model {record['model']} in dump.")
+            by_column = {field.column: field for field in columns(model)}
+            fields = [by_column[column] for column in record["columns"]]
+            pending, count = [], 0
+            loaded.append(model)
+            continue
+
+        pending.append(record)
+        count += 1
+        if len(pending) >= batch_size:
+            _insert(model, fields, pending)
+            pending = []
+
+    if model is not None:
+        _insert(model, fields, pending)
+        if progress:
+            progress(model, count)
+
+    with connection.cursor() as cursor:
+        for sql in connection.ops.sequence_reset_sql(no_style(), loaded):
+            cursor.execute(sql)
+    return loaded
+
+
+def _insert(model, fields, rows):
+    if not rows:
+        return
+    values = [
+        [field.get_db_prep_save(field.to_python(value), connection) for field, value in zip(fields, row)]
+        for row in rows
+    ]
+    table = connection.ops.quote_name(model._meta.db_table)
+    column_list = ", ".join(connection.ops.quote_name(field.column) for field in fields)
+
+    with connection.cursor() as cursor:
+        copy = getattr(cursor.cursor, "copy", None) if connection.vendor == "postgresql" else None
+        if copy is not None:
+            # psycopg 3: stream the batch through COPY instead of parsing INSERT statements.
+            with copy(f"COPY {table} ({column_list}) FROM STDIN") as stream:
+                for row in values:
+                    stream.write_row(row)
+        else:
+            placeholders = ", ".join(["%s"] * len(fields))
+            cursor.executemany(f"INSERT INTO {table} ({column_list}) VALUES ({placeholders})", values)
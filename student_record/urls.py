@@ -39,6 +39,7 @@ urlpatterns = [
 
     path('ajax/get-batch-students/', views.get_batch_students, name='get_batch_students'),
     path('ajax/get-batch-teachers/', views.get_batch_teachers, name='get_batch_teachers'),
+    path('ajax/autocomplete/<str:source>/', views.autocomplete, name='autocomplete'),
 
     path('courses/', views.course_list, name='course_list'),
     path('courses/new/', views.course_create, name='course_create'),
@@ -56,4 +57,7 @@ urlpatterns = [
     path('installments/paid/<int:installment_id>/', views.mark_installment_paid, name='mark_installment_paid'),
 
     path('forms/', views.student_create, name='basic_elements'),
+
+    path('profiles/', views.profile_list, name='profile_list'),
+    path('profiles/<str:name>', views.profile_download, name='profile_download'),
 ]
@@ -2,14 +2,19 @@ from datetime import datetime, timedelta
 from dateutil.relativedelta import relativedelta
 from django.contrib import messages
 from django.contrib.auth import authenticate, login, logout
-from django.contrib.auth.decorators import login_required, user_passes_test
+from django.contrib.auth.decorators import login_required
 from django.contrib.auth.models import User
-from django.db.models import Count, Sum, Q, F, Prefetch
-from django.http import HttpResponseForbidden, JsonResponse
+from django.core.exceptions import ValidationError
+from django.db.models import Count, OuterRef, Sum, Subquery, Q, F, Prefetch
+from django.http import FileResponse, Http404, HttpResponseForbidden, JsonResponse
 from django.shortcuts import get_object_or_404, redirect, render
 from django.utils import timezone
 from django.utils.timezone import now
-from .decorator import role_required
+from .autocomplete import SOURCES as AUTOCOMPLETE_SOURCES, lookup
+from .decorator import principal_passes_test, role_required
+from .pagination import paginate
+from .profiling import captured_profiles, profile_path
+from .search import search as search_records
 from .forms import (
     BatchForm,
     CourseForm,
@@ -216,17 +221,17 @@ def dashboard(request):
 
 @login_required
 def teacher_dashboard(request):
-    teacher = Teacher.objects.get(email=request.user.email)
-    batches = Batch.objects.filter(teacher=teacher).select_related('course')
+    teacher_id = request.principal.teacher_id
+    batches = Batch.objects.filter(teacher_id=teacher_id).select_related('course')
     total_batches_count = batches.count()
-    courses = Course.objects.filter(batches__teacher=teacher).distinct()
+    courses = Course.objects.filter(batches__teacher_id=teacher_id).distinct()
     total_courses_count = courses.count()
     students = Student.objects.filter(
         enrollments__batch__in=batches
     ).distinct()
     total_students_count = students.count()
-    recent_lessons = Lesson.objects.filter(teacher=teacher).order_by('-created_at')[:5]
-    total_lessons_count = Lesson.objects.filter(teacher=teacher).count()
+    recent_lessons = Lesson.objects.filter(teacher_id=teacher_id).order_by('-created_at')[:5]
+    total_lessons_count = Lesson.objects.filter(teacher_id=teacher_id).count()
     batch_stats = batches.annotate(
         students_count=Count('enrollments')
     ).order_by('-students_count')
@@ -245,11 +250,11 @@ def teacher_dashboard(request):
     return render(request, "pages/teacher_dashboard.html", context)
 
 def student_dashboard(request):
-    student = Student.objects.get(user=request.user)
+    student_id = request.principal.student_id
 
     all_enrollments = Enrollment.objects.select_related(
         'batch', 'batch__course', 'batch__teacher'
-    ).filter(student=student).order_by('-enrolled_on')
+    ).filter(student_id=student_id).order_by('-enrolled_on')
 
     completed_course_ids = all_enrollments.filter(status='completed')\
                                          .values_list('batch__course_id', flat=True)
@@ -257,7 +262,7 @@ def student_dashboard(request):
     pending_lessons_count = Lesson.objects.filter(
         course__in=all_enrollments.values_list('batch__course', flat=True)
     ).exclude(
-        students=student
+        students__id=student_id
     ).count()
     my_enrollments = all_enrollments[:5]
 
@@ -266,7 +271,7 @@ def student_dashboard(request):
         total_lessons = Lesson.objects.filter(course=enrollment.batch.course).count()
         completed_lessons = Lesson.objects.filter(
             course=enrollment.batch.course,
-            students=student
+            students__id=student_id
         ).count()
 
         batch_progress.append({
@@ -315,7 +320,7 @@ def home_redirect(request):
     if request.user.is_superuser:
         return redirect('admin_analytics')
 
-    role = getattr(request.user.profile, 'role', None)
+    role = request.principal.role
     if role == 'student':
         return redirect('student_dashboard')
     elif role == 'teacher':
@@ -374,9 +379,14 @@ def logout_view(request):
     logout(request)
     return redirect('login')
 
+# Generated codes are allocated in creation order but compare wrongly as strings past 99
+# (STU-100 < STU-11), so code columns sort by the primary key or the fields behind the code.
+STUDENT_SORTS = {'roll_number': ('id',), 'name': ('name', 'id')}
+
+
 def student_list(request):
-    students = Student.objects.all()
-    return render(request, 'pages/student_list.html', {'students': students})
+    page = paginate(request, Student.objects.all(), STUDENT_SORTS, 'roll_number')
+    return render(request, 'pages/student_list.html', {'students': page.object_list, 'page': page})
 
 def student_create(request):
     credentials = None
@@ -444,10 +454,13 @@ def student_delete(request, pk):
         return redirect('student_list')
     return render(request, 'students/student_confirm_delete.html', {'student': student})
 
+USER_SORTS = {'username': ('username',)}
+
+
 @role_required('admin')
 def user_list(request):
     form = UserFilterForm(request.GET or None)
-    users = User.objects.select_related('profile').all().order_by('username')
+    users = User.objects.select_related('profile')
 
     if form.is_valid():
         name_or_email = form.cleaned_data.get('name_or_email')
@@ -461,7 +474,8 @@ def user_list(request):
         if role:
             users = users.filter(profile__role=role)
 
-    return render(request, 'pages/user_list.html', {'users': users, 'form': form})
+    page = paginate(request, users, USER_SORTS, 'username')
+    return render(request, 'pages/user_list.html', {'users': page.object_list, 'page': page, 'form': form})
 
 def user_update_role(request, pk):
     user = get_object_or_404(User, pk=pk)
@@ -536,9 +550,13 @@ def teacher_delete(request, pk):
         messages.error(request, 'Invalid request method.')
         return redirect('teacher_list')
 
+TEACHER_SORTS = {'teacher_code': ('id',), 'name': ('name', 'id'), 'email': ('email',)}
+
+
 def teacher_list(request):
-    teachers = Teacher.objects.all()
-    return render(request, 'pages/teacher_list.html', {'teachers': teachers})
+    teachers = Teacher.objects.prefetch_related(Prefetch('courses', queryset=Course.objects.only('title')))
+    page = paginate(request, teachers, TEACHER_SORTS, 'teacher_code')
+    return render(request, 'pages/teacher_list.html', {'teachers': page.object_list, 'page': page})
 
 def teacher_edit(request, pk):
     teacher = get_object_or_404(Teacher, pk=pk)
@@ -563,13 +581,16 @@ def course_create(request):
         form = CourseForm()
     return render(request, 'course/course_form.html', {'form': form})
 
+COURSE_SORTS = {'course_code': ('id',), 'title': ('title', 'id')}
+
+
 def course_list(request):
-    courses = Course.objects.all()
-    return render(request, 'pages/course_list.html', {'courses': courses})
+    page = paginate(request, Course.objects.all(), COURSE_SORTS, 'course_code')
+    return render(request, 'pages/course_list.html', {'courses': page.object_list, 'page': page})
 
 @login_required
 def edit_course(request, course_id):
-    if not (request.user.is_superuser or request.user.profile.role == 'admin'):
+    if not request.principal.is_admin:
         return HttpResponseForbidden("You are not allowed to edit courses")
 
     course = get_object_or_404(Course, id=course_id)
@@ -586,7 +607,7 @@ def edit_course(request, course_id):
 
 @login_required
 def delete_course(request, course_id):
-    if not (request.user.is_superuser or request.user.profile.role == 'admin'):
+    if not request.principal.is_admin:
         return HttpResponseForbidden("You are not allowed to delete courses")
 
     course = get_object_or_404(Course, id=course_id)
@@ -620,11 +641,15 @@ def create_batch(request):
 
     return render(request, 'pages/create_batch.html', {'form': form})
 
+BATCH_SORTS = {'batch_code': ('course', 'number'), 'start_date': ('start_date', 'id')}
+
+
 @role_required('admin')
 def batch_list(request):
-    batches = Batch.objects.select_related('course', 'teacher').order_by('course__title', 'number')
+    page = paginate(request, Batch.objects.select_related('course', 'teacher'), BATCH_SORTS, 'batch_code')
     context = {
-        'batches': batches,
+        'batches': page.object_list,
+        'page': page,
         'today': timezone.now().date(),
     }
     return render(request, 'pages/batch_list.html', context)
@@ -673,6 +698,20 @@ def get_batch_teachers(request):
             teachers = []
     return JsonResponse({'teachers': teachers})
 
+@login_required
+def autocomplete(request, source):
+    """Select2-format page of ``source`` matches for ``?q=``; see ``autocomplete.lookup``."""
+    if source not in AUTOCOMPLETE_SOURCES:
+        raise Http404
+    page = request.GET.get('page', '')
+    results, more = lookup(
+        source, request.principal, request.GET.get('q', ''), page=int(page) if page.isdigit() else 1, params=request.GET,
+    )
+    return JsonResponse({
+        'results': [{'id': pk, 'text': label} for pk, label in results],
+        'pagination': {'more': more},
+    })
+
 def add_student(request):
     if request.method == 'POST':
         form = StudentForm(request.POST)
@@ -694,43 +733,54 @@ def batch_fee(request, batch_id):
 
 def enrollment_create(request):
     if request.method == 'POST':
-        form = EnrollmentForm(request.POST, user=request.user)
+        form = EnrollmentForm(request.POST, principal=request.principal)
         if form.is_valid():
-            enrollment = form.save()
+            try:
+                enrollment = form.save()
+            except ValidationError as exc:
+                # Lost a race for the last seat or course slot after the form validated.
+                form.add_error(None, exc)
+                return render(request, 'pages/enrollments.html', {'form': form})
             if enrollment.fee_type == 'installment':
                 enrollment.paid_amount = 0
-                enrollment.save(update_fields=["paid_amount"])
+                enrollment.save(update_fields=["paid_amount", "updated_at"])
                 generate_installments(enrollment)
 
-            if getattr(request.user.profile, 'role', None) == 'student':
+            if request.principal.role == 'student':
                 return redirect('student_dashboard')
             else:
                 return redirect('dashboard')
         else:
             print(form.errors)
     else:
-        form = EnrollmentForm(user=request.user)
+        form = EnrollmentForm(principal=request.principal)
 
     return render(request, 'pages/enrollments.html', {
         'form': form
     })
 
+# Roll numbers are "<course>-B<n>-<seq>" strings, which compare wrongly once course codes
+# grow a digit (CRS-100 < CRS-11); batch and id keep each batch in roll-number order.
+ENROLLMENT_SORTS = {'roll_number': ('batch', 'id'), 'enrolled_on': ('enrolled_on', 'id')}
+
+
 @login_required
 def enrollment_list(request):
-    user = request.user
-    if user.is_superuser or user.profile.role == 'admin':
+    principal = request.principal
+    if principal.is_admin:
         enrollments = Enrollment.objects.select_related('student', 'batch__course').all()
     else:
         enrollments = (
             Enrollment.objects
-            .filter(student=user.student)
+            .filter(student_id=principal.student_id)
             .select_related('batch__course')
         )
-    return render(request, 'pages/enrollment_list.html', {'enrollments': enrollments})
+    page = paginate(request, enrollments, ENROLLMENT_SORTS, '-enrolled_on')
+    return render(request, 'pages/enrollment_list.html', {'enrollments': page.object_list, 'page': page})
 
 @login_required
 def enrollment_edit(request, enrollment_id):
-    if not (request.user.is_superuser or request.user.profile.role == 'admin'):
+    if not request.principal.is_admin:
         return HttpResponseForbidden("You are not allowed to edit enrollments")
 
     enrollment = get_object_or_404(Enrollment, id=enrollment_id)
@@ -747,7 +797,7 @@ def enrollment_edit(request, enrollment_id):
 
 @login_required
 def enrollment_delete(request, enrollment_id):
-    if not (request.user.is_superuser or request.user.profile.role == 'admin'):
+    if not request.principal.is_admin:
         return HttpResponseForbidden("You are not allowed to delete enrollments")
 
     enrollment = get_object_or_404(Enrollment, id=enrollment_id)
@@ -761,21 +811,19 @@ def enrollment_delete(request, enrollment_id):
 
 @login_required
 def send_lesson(request, lesson_id=None):
-    user = request.user
-    teacher = getattr(user, 'teacher_profile', None)
-    is_admin = user.profile.role == 'admin'
+    principal = request.principal
+    teacher_id = principal.teacher_id
+    is_admin = principal.role == 'admin'
     lesson = None
-    selected_students = []
 
     if lesson_id:
         try:
             lesson = Lesson.objects.get(id=lesson_id)
-            selected_students = list(lesson.students.values_list('id', flat=True))
         except Lesson.DoesNotExist:
             lesson = None
 
     if request.method == "POST":
-        form = LessonForm(request.POST, request.FILES, teacher=teacher if teacher else None, user=user, instance=lesson)
+        form = LessonForm(request.POST, request.FILES, principal=principal, instance=lesson)
         batch_id = request.POST.get('batch')
 
         if batch_id:
@@ -788,8 +836,8 @@ def send_lesson(request, lesson_id=None):
         if form.is_valid():
             lesson_obj = form.save(commit=False)
 
-            if teacher:
-                lesson_obj.teacher = teacher
+            if teacher_id:
+                lesson_obj.teacher_id = teacher_id
             elif is_admin:
                 lesson_obj.teacher = None
 
@@ -803,48 +851,50 @@ def send_lesson(request, lesson_id=None):
             return redirect("send-lesson")
 
     else:
-        form = LessonForm(teacher=teacher if teacher else None, user=user, instance=lesson)
+        form = LessonForm(principal=principal, instance=lesson)
 
         if is_admin:
             form.fields['batch'].queryset = Batch.objects.all()
             form.fields['students'].queryset = Student.objects.all()
             form.fields.pop('teacher', None)
-        elif teacher:
-            form.fields['batch'].queryset = Batch.objects.filter(teacher=teacher)
+        elif teacher_id:
+            form.fields['batch'].queryset = Batch.objects.filter(teacher_id=teacher_id)
 
     return render(request, "pages/send_lesson.html", {
         "form": form,
         "is_admin": is_admin,
         "lesson": lesson,
-        "selected_students": selected_students
     })
 
+LESSON_SORTS = {'created_at': ('created_at', 'id')}
+
+
 @login_required
 def lesson_list(request):
     form = LessonFilterForm(request.GET or None)
 
-    if request.user.profile.role == 'student':
-        student = Student.objects.get(user=request.user)
-        enrolled_batches = Batch.objects.filter(enrollments__student=student)
-        form.fields['batch'].queryset = enrolled_batches
-        form.fields['student'].initial = student.id
+    principal = request.principal
+    if principal.role == 'student':
+        student_id = principal.student_id
+        enrolled_batches = Batch.objects.filter(enrollments__student_id=student_id)
+        form.fields['batch'].queryset = enrolled_batches.select_related('course', 'teacher')
+        form.fields['student'].initial = student_id
 
         lessons = Lesson.objects.filter(batch__in=enrolled_batches).filter(
-            Q(students=student) | Q(students__isnull=True)
-        ).distinct().order_by('-created_at')
+            Q(students__id=student_id) | Q(students__isnull=True)
+        ).distinct()
 
-    elif request.user.profile.role == 'teacher':
-        teacher = Teacher.objects.get(user=request.user)
-        batches_taught = Batch.objects.filter(teacher=teacher)
-        form.fields['batch'].queryset = batches_taught
+    elif principal.role == 'teacher':
+        batches_taught = Batch.objects.filter(teacher_id=principal.teacher_id)
+        form.fields['batch'].queryset = batches_taught.select_related('course', 'teacher')
         enrolled_students = Student.objects.filter(enrollments__batch__in=batches_taught).distinct()
         form.fields['student'].queryset = enrolled_students
-        lessons = Lesson.objects.filter(batch__in=batches_taught).order_by('-created_at')
+        lessons = Lesson.objects.filter(batch__in=batches_taught)
 
     else:  # Admin
-        form.fields['batch'].queryset = Batch.objects.all()
+        form.fields['batch'].queryset = Batch.objects.select_related('course', 'teacher')
         form.fields['student'].queryset = Student.objects.all()
-        lessons = Lesson.objects.all().order_by('-created_at')
+        lessons = Lesson.objects.all()
 
     if form.is_valid():
         batch = form.cleaned_data.get('batch')
@@ -854,19 +904,30 @@ def lesson_list(request):
         if student:
             lessons = lessons.filter(Q(students=student) | Q(students__isnull=True)).distinct()
 
-    return render(request, 'pages/lessons.html', {'form': form, 'lessons': lessons})
+    # Counted in a subquery: the student filters above join the same table and would skew a Count().
+    student_count = (
+        Lesson.students.through.objects.filter(lesson=OuterRef('pk'))
+        .values('lesson').annotate(total=Count('*')).values('total')
+    )
+    lessons = (
+        lessons.select_related('batch', 'teacher')
+        .prefetch_related('images')
+        .annotate(student_count=Subquery(student_count))
+    )
+    page = paginate(request, lessons, LESSON_SORTS, '-created_at')
+    return render(request, 'pages/lessons.html', {'form': form, 'lessons': page.object_list, 'page': page})
 
-def is_teacher_or_admin(user):
-    return user.is_superuser or user.profile.role in ['teacher', 'admin']
+def is_teacher_or_admin(principal):
+    return principal.is_superuser or principal.role in ['teacher', 'admin']
 
 @login_required
-@user_passes_test(is_teacher_or_admin)
+@principal_passes_test(is_teacher_or_admin)
 # views.py
 def lesson_update(request, pk):
     lesson = get_object_or_404(Lesson, pk=pk)
 
     if request.method == 'POST':
-        form = LessonForm(request.POST, request.FILES, instance=lesson, user=request.user)
+        form = LessonForm(request.POST, request.FILES, instance=lesson, principal=request.principal)
         if form.is_valid():
             lesson = form.save(commit=False)
             lesson.save()
@@ -874,7 +935,7 @@ def lesson_update(request, pk):
             lesson.students.set(students_ids)
             return redirect('lesson_list')
     else:
-        form = LessonForm(instance=lesson, user=request.user)
+        form = LessonForm(instance=lesson, principal=request.principal)
     selected_students = lesson.students.values_list('id', flat=True)
     form.fields['students'].initial = selected_students
 
@@ -884,7 +945,7 @@ def lesson_update(request, pk):
     })
 
 @login_required
-@user_passes_test(is_teacher_or_admin)
+@principal_passes_test(is_teacher_or_admin)
 def lesson_delete(request, pk):
     lesson = get_object_or_404(Lesson, pk=pk)
     if request.method == 'POST':
@@ -904,10 +965,7 @@ def fee_management(request):
     status = request.GET.get('status')
 
     if search:
-        enrollments = enrollments.filter(
-            Q(student__name__icontains=search) |
-            Q(student__email__icontains=search)
-        )
+        enrollments = search_records(enrollments, search, ['student__name', 'student__email'])
     if course_id:
         enrollments = enrollments.filter(batch__course__id=course_id)
     if batch_id:
@@ -997,10 +1055,7 @@ def installments_list(request):
     status = request.GET.get('status')
 
     if search:
-        enrollments = enrollments.filter(
-            Q(student__name__icontains=search) |
-            Q(student__email__icontains=search)
-        )
+        enrollments = search_records(enrollments, search, ['student__name', 'student__email'])
 
     if course_id:
         enrollments = enrollments.filter(batch__course__id=course_id)
@@ -1046,4 +1101,17 @@ def mark_installment_paid(request, installment_id):
         installment.paid_amount = installment.amount
         installment.paid_date = timezone.now().date()
         installment.save()
-    return redirect('installments_list')
\ No newline at end of file
+    return redirect('installments_list')
+
+@login_required
+@principal_passes_test(lambda principal: principal.is_admin)
+def profile_list(request):
+    return render(request, 'pages/profile_list.html', {'profiles': captured_profiles()})
+
+@login_required
+@principal_passes_test(lambda principal: principal.is_admin)
+def profile_download(request, name):
+    path = profile_path(name)
+    if path is None:
+        raise Http404("No such profile.")
+    return FileResponse(open(path, 'rb'), as_attachment=True, filename=name, content_type='text/plain')
@@ -0,0 +1,60 @@
+from django import forms
+from django.urls import reverse
+from django.utils.http import urlencode
+
+
+class AutocompleteMixin:
+    """
+    Render only the selected options and let ``assets/js/autocomplete.js`` (select2) fetch the
+    rest from the ``autocomplete`` endpoint as the user types.
+
+    Submitted ids are still validated against the field's queryset, so narrowing what the
+    endpoint offers never widens what the form accepts. ``forward`` names sibling fields whose
+    values are sent along (``students`` of the chosen ``batch``); ``params`` are fixed ones.
+    """
+
+    def __init__(self, source, forward=(), params=None, attrs=None):
+        super().__init__(attrs)
+        self.source = source
+        self.forward = tuple(forward)
+        self.params = params or {}
+
+    class Media:
+        js = ('assets/js/autocomplete.js',)
+
+    def build_attrs(self, base_attrs, extra_attrs=None):
+        attrs = super().build_attrs(base_attrs, extra_attrs)
+        url = reverse('autocomplete', args=[self.source])
+        if self.params:
+            url += '?' + urlencode(self.params)
+        attrs['data-autocomplete-url'] = url
+        if self.forward:
+            attrs['data-autocomplete-forward'] = ','.join(self.forward)
+        return attrs
+
+    def selected_choices(self, value):
+        """The empty choice, if any, and the choices of ``value``, in one query."""
+        iterator = self.choices
+        choices = []
+        if not self.allow_multiple_selected and iterator.field.empty_label is not None:
+            choices.append(('', iterator.field.empty_label))
+        ids = [item for item in value if str(item).isdigit()]
+        if ids:
+            choices += [iterator.choice(obj) for obj in iterator.queryset.filter(pk__in=ids)]
+        return choices
+
+    def optgroups(self, name, value, attrs=None):
+        choices = self.choices
+        self.choices = self.selected_choices(value)
+        try:
+            return super().optgroups(name, value, attrs)
+        finally:
+            self.choices = choices
+
+
+class AutocompleteSelect(AutocompleteMixin, forms.Select):
+    pass
+
+
+class AutocompleteSelectMultiple(AutocompleteMixin, forms.SelectMultiple):
+    pass